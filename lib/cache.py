@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Tuple, Union
+
+import pandas as pd
+
+from lib.candles import CandleSeries
+from lib.checkpoint import checkpointer
+from lib.metrics import registry
+from lib.shm import SHM_NAME, SharedCandleReader
+from lib.utils import GranularityType, get_candle_series
+
+# 🗃️ Paylaşılan önbellek ayarları
+CANDLE_CACHE_TTL = 60  # sn: aynı coin/periyot bu süre içinde tekrar çekilmez
+CANDLE_REFRESH_LIMIT = 5  # bayat pencere yenilenirken sadece bu kadar son mum çekilir (0: her seferinde tam pencere)
+INDICATOR_CACHE_SIZE = 2048  # en fazla bu kadar indikatör sonucu tutulur (LRU)
+
+
+class CandleCache:
+    """
+    Aynı süreçteki stratejilerin paylaştığı mum önbelleği. Mumlar kompakt CandleSeries olarak tutulur
+    (lib/candles.py); çağıranlara kopyasız, salt okunur DataFrame görünümü döner.
+    Aynı (coin, periyot) için TTL içinde tek istek atılır; eşzamanlı istekler aynı sonucu bekler.
+    TTL dolunca sadece son CANDLE_REFRESH_LIMIT mum çekilip seriye eklenir (süren mum yerinde güncellenir);
+    kopukluk varsa tam pencere yeniden çekilir. İstek thread'de yapılır, seriye ekleme event loop'ta yapılır.
+    shared verilirse (CANDLE_SHM) ıskalamada önce yayıncının paylaşılan bellek deposuna bakılır: TTL içinde
+    yayınlanmış yeterli pencere varsa istek atılmadan tutarlı bir kopyası döner (lib/shm.py).
+    """
+
+    def __init__(self, fetch: Callable[..., Union[CandleSeries, None]] = get_candle_series, ttl: float = CANDLE_CACHE_TTL,
+                 refresh_limit: int = CANDLE_REFRESH_LIMIT, shared: Union[SharedCandleReader, None] = None):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.refresh_limit = refresh_limit
+        self.shared = shared
+        # (coin, periyot) -> (çekilme zamanı, limit, seri)
+        self._entries: Dict[Tuple[str, str], Tuple[float, int, CandleSeries]] = {}
+        self._inflight: Dict[Tuple[str, str, int], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0  # tam pencere yerine son mumlarla yenilenen istekler
+        self.shared_hits = 0  # paylaşılan bellekten karşılanan istekler
+
+    async def get(self, symbol: str, granularity: GranularityType = "15min", limit: int = 200) -> Union[pd.DataFrame, None]:
+        key = (symbol, granularity)
+        entry = self._entries.get(key)
+        if entry is not None:
+            fetched_at, cached_limit, series = entry
+            # Daha uzun pencere çekildiyse kısa istekler de ondan karşılanır
+            if time.monotonic() - fetched_at < self.ttl and cached_limit >= limit:
+                self.hits += 1
+                return series.frame(limit)
+        if self.shared is not None:
+            # Kopya + seqlock doğrulaması: strateji pencereyi await'ler boyunca tutar, yazıcı süreç bu sürede
+            # görünümün tamponunu yeniden yazabilir (kopyasız view() sadece senkron kullanım içindir)
+            frame = self.shared.read(symbol, granularity, limit, max_age=self.ttl)
+            if frame is not None:
+                self.shared_hits += 1
+                return frame
+
+        flight_key = (symbol, granularity, limit)
+        future = self._inflight.get(flight_key)
+        if future is None:
+            self.misses += 1
+            future = asyncio.ensure_future(self._fetch(symbol, granularity, limit))
+            self._inflight[flight_key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(flight_key, None))
+        else:
+            self.hits += 1
+        series = await asyncio.shield(future)
+        return None if series is None else series.frame(limit)
+
+    async def _fetch(self, symbol: str, granularity: GranularityType, limit: int) -> Union[CandleSeries, None]:
+        key = (symbol, granularity)
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] >= limit and self.refresh_limit:
+            _, cached_limit, series = entry
+            tail = await asyncio.to_thread(self.fetch, symbol=symbol, granularity=granularity, limit=self.refresh_limit)
+            if tail is None or len(tail) == 0:
+                return None
+            if series.merge(tail):
+                self.refreshes += 1
+                self._entries[key] = (time.monotonic(), cached_limit, series)
+                return series
+
+        series = await asyncio.to_thread(self.fetch, symbol=symbol, granularity=granularity, limit=limit)
+        if series is not None and len(series) > 0:
+            self._entries[key] = (time.monotonic(), limit, series)
+        return series
+
+    def series(self, symbol: str, granularity: GranularityType = "15min") -> Union[CandleSeries, None]:
+        """Önbellekteki seri (yayıncı için); yoksa None"""
+        entry = self._entries.get((symbol, granularity))
+        return None if entry is None else entry[2]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "refreshes": self.refreshes,
+                "shared_hits": self.shared_hits,
+                "bytes": sum(series.nbytes for _, _, series in self._entries.values())}
+
+    def snapshot(self) -> List[Tuple[str, str, float, int, CandleSeries]]:
+        """Durum kaydı için mum serileri; monotonic zaman yerine duvar saati saklanır"""
+        offset = time.time() - time.monotonic()
+        return [(symbol, granularity, fetched_at + offset, limit, series)
+                for (symbol, granularity), (fetched_at, limit, series) in self._entries.items()]
+
+    def restore(self, state: List[Tuple[str, str, float, int, CandleSeries]]):
+        offset = time.time() - time.monotonic()
+        for symbol, granularity, fetched_at, limit, series in state:
+            # Eski kayıtlardaki DataFrame pencereleri yok sayılır
+            if isinstance(series, CandleSeries):
+                self._entries.setdefault((symbol, granularity), (fetched_at - offset, limit, series))
+
+
+class IndicatorCache:
+    """
+    İndikatör sonuçlarını (coin, periyot, son mum zamanı, mum sayısı, veri sürümü, indikatör, parametreler)
+    anahtarıyla saklar: aynı mumlar için RSI/EMA/MACD/ADX stratejiler arasında bir kez hesaplanır.
+    Kaynak DataFrame/Series'in attrs içinde symbol ve granularity olmalı (CandleSeries.frame() ekler);
+    yoksa önbellek atlanır. Dönen sonuçlar paylaşılır, yerinde değiştirilmemelidir.
+    """
+
+    def __init__(self, max_entries: int = INDICATOR_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, source: Union[pd.DataFrame, pd.Series], name: str, func: Callable, *args, **kwargs) -> Any:
+        symbol = source.attrs.get("symbol")
+        granularity = source.attrs.get("granularity")
+        if symbol is None or granularity is None or len(source) == 0:
+            return func(*args, **kwargs)
+
+        # Veri sürümü: CandleCache çekim zamanı, yoksa son satırın değerleri (süren mum güncellenir)
+        version = source.attrs.get("fetched_at")
+        if version is None:
+            last = source.iloc[-1]
+            version = tuple(last) if isinstance(last, pd.Series) else last
+        key = (symbol, granularity, source.index[-1], len(source), version, name, tuple(sorted(kwargs.items())))
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        self.misses += 1
+        value = func(*args, **kwargs)
+        self._entries[key] = value
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def snapshot(self) -> List[Tuple[Hashable, Any]]:
+        """Durum kaydı için sonuçlar, en eskiden en yeniye"""
+        return list(self._entries.items())
+
+    def restore(self, state: List[Tuple[Hashable, Any]]):
+        for key, value in state:
+            self._entries.setdefault(key, value)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+# Süreç genelinde paylaşılan önbellekler
+candle_cache = CandleCache(shared=SharedCandleReader(SHM_NAME) if SHM_NAME else None)
+indicator_cache = IndicatorCache()
+checkpointer.register("candles", candle_cache.snapshot, candle_cache.restore)
+checkpointer.register("indicators", indicator_cache.snapshot, indicator_cache.restore)
+registry.gauge("bot_cache_lookups", "Önbellek isabet/ıskalama sayısı (süreç başından beri)", ("cache", "result"),
+               callback=lambda: {(name, result): cache.stats()[result]
+                                 for name, cache in (("candles", candle_cache), ("indicators", indicator_cache))
+                                 for result in ("hits", "misses")})
+
+
+def indicator(source: Union[pd.DataFrame, pd.Series], name: str, func: Callable, *args, **kwargs) -> Any:
+    """indicator_cache.get kısayolu: indicator(close, "rsi", ta.rsi, close, length=14)"""
+    return indicator_cache.get(source, name, func, *args, **kwargs)
+
+
+def log_cache_stats():
+    candles = candle_cache.stats()
+    indicators = indicator_cache.stats()
+    shared = f", {candles['shared_hits']} paylaşılan bellekten" if candle_cache.shared is not None else ""
+    logging.info(f"🗃️ Önbellek: mum {candles['hits']} isabet{shared} / {candles['misses']} istek | "
+                 f"indikatör {indicators['hits']} isabet / {indicators['misses']} hesaplama")
@@ -0,0 +1,198 @@
+import os
+import time
+from typing import Dict, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+# 🕯️ Kompakt mum serisi ayarları
+CANDLE_COLUMNS = ("open", "high", "low", "close", "volume", "quote_volume")
+CANDLE_DTYPE = os.getenv("CANDLE_DTYPE") or "float64"  # "float32": yarı bellek (fiyatlarda ~7 anlamlı basamak)
+CANDLE_SLACK = 16  # kapasitenin ötesinde ayrılan satır: bu kadar eklemede bir tampon yeniden düzenlenir
+
+
+class CandleSeries:
+    """
+    Tek coin/periyot için mum serisi: zamanlar (int64, UTC ns) ve OHLCV kolonları bitişik numpy dizilerinde.
+    Sabit kapasiteli halka tampon gibi çalışır: append() yeni mumu tamponun sonuna yazar, kapasite dolunca
+    en eski mum düşer (ayırma yapılmaz); süren mum aynı zamanla gelirse yerinde güncellenir.
+    Tampon sonuna gelindiğinde (CANDLE_SLACK eklemede bir) son `capacity` satır yeni tampona taşınır;
+    eski görünümler eski tamponu tutmaya devam eder, bozulmaz.
+
+    frame() / column() kopyasız, salt okunur pandas görünümleri döndürür (sadece DatetimeIndex yeni mum
+    eklenince bir kez oluşturulur). Sonraki eklemeler eldeki görünümleri değiştirmez; tek istisna süren mumun
+    yerinde güncellenmesidir (görünümün son satırında da görünür).
+    """
+
+    def __init__(self, capacity: int, symbol: str = "", granularity: str = "", dtype: str = CANDLE_DTYPE,
+                 slack: int = CANDLE_SLACK):
+        self.capacity = capacity
+        self.symbol = symbol
+        self.granularity = granularity
+        self.dtype = np.dtype(dtype)
+        self.slack = slack
+        self._times = np.zeros(capacity + slack, dtype=np.int64)
+        self._values = np.zeros((len(CANDLE_COLUMNS), capacity + slack), dtype=self.dtype)
+        self._start = 0
+        self._end = 0
+        self.version = 0  # her değişiklikte artar
+        self.updated_at = 0.0  # son değişikliğin duvar saati (indikatör önbelleği sürümü)
+        self._index = None  # ((başlangıç, bitiş, tampon), DatetimeIndex): sadece zamanlar değişince yenilenir
+
+    @classmethod
+    def from_arrays(cls, times: np.ndarray, values: np.ndarray, symbol: str = "", granularity: str = "",
+                    capacity: Union[int, None] = None, dtype: str = CANDLE_DTYPE) -> "CandleSeries":
+        """times: artan sıralı int64 UTC ns, values: (kolon, satır) dizisi (CANDLE_COLUMNS sırasıyla)"""
+        count = len(times)
+        series = cls(max(capacity or count, 1), symbol=symbol, granularity=granularity, dtype=dtype)
+        keep = min(count, series.capacity)
+        series._times[:keep] = times[count - keep:]
+        series._values[:, :keep] = values[:, count - keep:]
+        series._end = keep
+        series._touch()
+        return series
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def __getstate__(self):
+        # Durum kaydı: sadece dolu satırlar, önbelleğe alınmış index olmadan
+        state = dict(self.__dict__)
+        state["_times"] = self._times[self._start:self._end].copy()
+        state["_values"] = self._values[:, self._start:self._end].copy()
+        state["_start"], state["_end"], state["_index"] = 0, len(self), None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        times, values = self._times, self._values
+        self._times = np.zeros(self.capacity + self.slack, dtype=np.int64)
+        self._values = np.zeros((len(CANDLE_COLUMNS), self.capacity + self.slack), dtype=self.dtype)
+        self._times[:len(times)] = times
+        self._values[:, :len(times)] = values
+
+    @property
+    def nbytes(self) -> int:
+        return self._times.nbytes + self._values.nbytes
+
+    @property
+    def last_time(self) -> Union[int, None]:
+        return int(self._times[self._end - 1]) if len(self) else None
+
+    def _touch(self):
+        self.version += 1
+        self.updated_at = time.time()
+
+    def _compact(self):
+        # Yeni tampon: eldeki görünümler eski tamponu kullanmaya devam eder
+        count = len(self)
+        times = np.zeros_like(self._times)
+        values = np.zeros_like(self._values)
+        times[:count] = self._times[self._start:self._end]
+        values[:, :count] = self._values[:, self._start:self._end]
+        self._times, self._values = times, values
+        self._start, self._end = 0, count
+
+    def append(self, timestamp: int, row: Sequence[float]) -> bool:
+        """
+        Tek mum ekler (timestamp: UTC ns). Son mumla aynı zamandaysa yerinde günceller, daha eskiyse yok sayar.
+        Seri değiştiyse True döner.
+        """
+        last = self.last_time
+        if last is not None and timestamp < last:
+            return False
+        if last is not None and timestamp == last:
+            self._values[:, self._end - 1] = row
+        else:
+            if self._end == len(self._times):
+                self._compact()
+            self._times[self._end] = timestamp
+            self._values[:, self._end] = row
+            self._end += 1
+            if len(self) > self.capacity:
+                self._start += 1
+        self._touch()
+        return True
+
+    def merge(self, other: "CandleSeries") -> bool:
+        """
+        Yeni çekilen son mumları (kısa bir seri) ekler.
+        Araya eksik mum giriyorsa (kopukluk) hiçbir şey yapmaz ve False döner: çağıran tam pencereyi çekmeli.
+        """
+        times = other._times[other._start:other._end]
+        values = other._values[:, other._start:other._end]
+        last = self.last_time
+        if last is not None and len(self) >= 2:
+            step = last - int(self._times[self._end - 2])
+            newer = times[times > last]
+            if len(newer) and newer[0] > last + step:
+                return False
+        for i in range(len(times)):
+            self.append(int(times[i]), values[:, i])
+        return True
+
+    def index(self) -> pd.DatetimeIndex:
+        """Tüm satırların zaman index'i (yeni mum eklenene kadar aynı nesne kullanılır)"""
+        key = (self._start, self._end, id(self._times))
+        if self._index is None or self._index[0] != key:
+            times = self._times[self._start:self._end]
+            self._index = (key, pd.DatetimeIndex(times.view("M8[ns]"), name="timestamp").tz_localize("UTC"))
+        return self._index[1]
+
+    def _view(self, array: np.ndarray) -> np.ndarray:
+        view = array.view()
+        view.flags.writeable = False
+        return view
+
+    def frame(self, limit: Union[int, None] = None) -> pd.DataFrame:
+        """Son `limit` mumun kopyasız, salt okunur DataFrame görünümü (attrs: symbol, granularity, fetched_at)"""
+        start = self._start if limit is None else max(self._start, self._end - limit)
+        values = self._view(self._values[:, start:self._end].T)
+        index = self.index()[start - self._start:]
+        df = pd.DataFrame(values, index=index, columns=list(CANDLE_COLUMNS), copy=False)
+        df.attrs.update(symbol=self.symbol, granularity=self.granularity, fetched_at=self.updated_at)
+        return df
+
+    def column(self, name: str, limit: Union[int, None] = None) -> pd.Series:
+        """Tek kolonun kopyasız Series görünümü"""
+        start = self._start if limit is None else max(self._start, self._end - limit)
+        values = self._view(self._values[CANDLE_COLUMNS.index(name), start:self._end])
+        series = pd.Series(values, index=self.index()[start - self._start:], name=name, copy=False)
+        series.attrs.update(symbol=self.symbol, granularity=self.granularity, fetched_at=self.updated_at)
+        return series
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Kolon adı -> salt okunur numpy görünümü (pandas'sız hızlı yol)"""
+        arrays = {name: self._view(self._values[i, self._start:self._end]) for i, name in enumerate(CANDLE_COLUMNS)}
+        arrays["timestamp"] = self._view(self._times[self._start:self._end])
+        return arrays
+
+
+def parse_rows(rows: list) -> Union[tuple, None]:
+    """
+    Bitget mum satırlarını ([ts, open, high, low, close, volume, quote_volume, ...] metin listeleri)
+    (zamanlar int64 UTC ns, değerler (kolon, satır) float64) dizilerine çevirir. Zamana göre sıralar.
+    """
+    rows = [row[:7] for row in rows if row is not None and len(row) >= 8 and all(value is not None for value in row[:8])]
+    if not rows:
+        return None
+    try:
+        table = np.asarray(rows, dtype=np.float64)
+        stamps = table[:, 0]
+        values = table[:, 1:].T
+    except (TypeError, ValueError):
+        # Sayı olmayan alanlar NaN olur; zaman metin olabilir
+        frame = pd.DataFrame(rows)
+        values = np.vstack([pd.to_numeric(frame[i], errors="coerce").to_numpy(dtype=np.float64) for i in range(1, 7)])
+        stamps = pd.to_numeric(frame[0], errors="coerce").to_numpy(dtype=np.float64)
+        if np.isnan(stamps).any():
+            times = pd.to_datetime(frame[0], errors="coerce", utc=True).to_numpy(dtype="M8[ns]").view(np.int64)
+            stamps = None
+    if stamps is not None:
+        # ms (Bitget) veya sn
+        unit = 1_000_000 if np.nanmax(stamps) > 1e11 else 1_000_000_000
+        times = stamps.astype(np.int64) * unit
+    order = np.argsort(times, kind="stable")
+    if np.any(order != np.arange(len(order))):
+        times, values = times[order], values[:, order]
+    return times, np.ascontiguousarray(values)
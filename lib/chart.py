@@ -0,0 +1,307 @@
+import io
+import time
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, List, Literal, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+
+# 🎨 mplfinance "charles" stili ile aynı renkler
+UP_COLOR = "#006340"
+DOWN_COLOR = "#a02128"
+VOLUME_UP_COLOR = "#007a00"
+VOLUME_DOWN_COLOR = "#d50d18"
+
+FIGSIZE = (8.0, 5.75)  # mpf.plot varsayılan boyutu
+DPI = 100
+BODY_WIDTH = 0.6
+DEFAULT_MAX_BARS = None  # None: pencere olduğu gibi çizilir; küçültme (downsample) isteğe bağlı
+MAX_TEMPLATES = 8  # önbellekte tutulan en fazla figür (en eski kullanılan bırakılır)
+
+# 📦 Çıktı boyutu / kodlama ayarları
+ChartFormat = Literal["png", "webp"]
+MIN_DPI = 50  # boyut bütçesi için inilebilecek en düşük DPI
+DPI_STEP = 0.8  # her denemede DPI bu oranla küçültülür
+PALETTE_COLORS = 64  # palet (8-bit) PNG renk sayısı
+WEBP_QUALITIES = (80, 60, 40)
+RENDER_HISTORY = 200  # saklanan son çizim istatistikleri
+
+INTRADAY_GRANULARITIES = {"1min", "3min", "5min", "15min", "30min", "1h", "4h", "6h", "12h", "6Hutc", "12Hutc"}
+
+
+# 📉 Uzun pencereler için OHLC küçültme
+def downsample_ohlc(df: pd.DataFrame, max_bars: Union[int, None] = DEFAULT_MAX_BARS) -> pd.DataFrame:
+    """
+    Ardışık mumları gruplayarak en fazla max_bars mum döndürür.
+    open=ilk, high=max, low=min, close=son, volume=toplam
+    """
+    n = len(df)
+    if max_bars is None or max_bars <= 0 or n <= max_bars:
+        return df
+
+    step = -(-n // max_bars)  # ceil(n / max_bars)
+    starts = np.arange(0, n, step)
+    ends = np.minimum(starts + step, n) - 1
+
+    data = {
+        "open": df["open"].to_numpy()[starts],
+        "high": np.maximum.reduceat(df["high"].to_numpy(), starts),
+        "low": np.minimum.reduceat(df["low"].to_numpy(), starts),
+        "close": df["close"].to_numpy()[ends],
+    }
+    if "volume" in df.columns:
+        data["volume"] = np.add.reduceat(df["volume"].to_numpy(), starts)
+    return pd.DataFrame(data, index=df.index[starts])
+
+
+class _ChartTemplate:
+    """Bir (granularity, pencere boyutu) için önceden kurulmuş figür"""
+
+    def __init__(self, granularity: str, window: int, figsize: Tuple[float, float] = FIGSIZE, dpi: int = DPI):
+        self.granularity = granularity
+        self.window = window
+        self.dpi = dpi
+        self.index = None
+        self.time_format = "%H:%M" if granularity in INTRADAY_GRANULARITIES else "%d.%m"
+
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        grid = self.fig.add_gridspec(2, 1, height_ratios=(3, 1), hspace=0.05)
+        self.ax = self.fig.add_subplot(grid[0])
+        self.vol_ax = self.fig.add_subplot(grid[1], sharex=self.ax)
+
+        # Artist'ler bir kez oluşturulur, her çizimde sadece verileri güncellenir
+        self.wicks = LineCollection([], linewidths=0.8)
+        self.bodies = PolyCollection([], linewidths=0.5)
+        self.volumes = PolyCollection([], linewidths=0)
+        self.ax.add_collection(self.wicks)
+        self.ax.add_collection(self.bodies)
+        self.vol_ax.add_collection(self.volumes)
+
+        # TP/SL: make_addplot yerine tek bir yatay eksen çizgisi
+        self.tp_line = self.ax.axhline(0, color="green", linestyle="--", linewidth=1, visible=False)
+        self.sl_line = self.ax.axhline(0, color="red", linestyle="--", linewidth=1, visible=False)
+        self.title = self.ax.set_title("")
+
+        self.ax.grid(True, linestyle=":", alpha=0.4)
+        self.vol_ax.grid(True, linestyle=":", alpha=0.4)
+        self.ax.tick_params(labelbottom=False)
+        self.ax.set_ylabel("Price")
+        self.vol_ax.set_ylabel("Volume")
+        self.vol_ax.xaxis.set_major_locator(MaxNLocator(nbins=8, integer=True))
+        self.vol_ax.xaxis.set_major_formatter(FuncFormatter(self._format_x))
+
+    def _format_x(self, x, pos=None) -> str:
+        i = int(round(x))
+        if self.index is None or i < 0 or i >= len(self.index):
+            return ""
+        return self.index[i].strftime(self.time_format)
+
+    def update(self, df: pd.DataFrame, tp: Union[float, None] = None, sl: Union[float, None] = None, title: str = ""):
+        """Mum, hacim ve TP/SL verilerini yerinde günceller"""
+        o = df["open"].to_numpy(dtype=float)
+        h = df["high"].to_numpy(dtype=float)
+        l = df["low"].to_numpy(dtype=float)
+        c = df["close"].to_numpy(dtype=float)
+        n = len(c)
+        x = np.arange(n, dtype=float)
+        up = c >= o
+        self.index = df.index
+
+        colors = np.where(up, UP_COLOR, DOWN_COLOR)
+
+        segments = np.empty((n, 2, 2))
+        segments[:, 0, 0] = x
+        segments[:, 1, 0] = x
+        segments[:, 0, 1] = l
+        segments[:, 1, 1] = h
+        self.wicks.set_segments(segments)
+        self.wicks.set_color(colors)
+
+        bottom = np.minimum(o, c)
+        top = np.maximum(o, c)
+        self.bodies.set_verts(self._bars(x, bottom, top))
+        self.bodies.set_facecolor(colors)
+        self.bodies.set_edgecolor(colors)
+
+        if "volume" in df.columns:
+            v = df["volume"].to_numpy(dtype=float)
+            self.volumes.set_verts(self._bars(x, np.zeros(n), v))
+            self.volumes.set_facecolor(np.where(up, VOLUME_UP_COLOR, VOLUME_DOWN_COLOR))
+            self.vol_ax.set_ylim(0, float(np.nanmax(v)) * 1.1 if n and np.nanmax(v) > 0 else 1)
+        else:
+            self.volumes.set_verts([])
+
+        self.ax.set_xlim(-1, n)
+        self.ax.set_ylim(float(np.nanmin(l)) * 0.99, float(np.nanmax(h)) * 1.01)
+
+        for line, level in ((self.tp_line, tp), (self.sl_line, sl)):
+            if level:
+                line.set_ydata([level, level])
+                line.set_visible(True)
+            else:
+                line.set_visible(False)
+
+        self.title.set_text(title)
+
+    @staticmethod
+    def _bars(x: np.ndarray, bottom: np.ndarray, top: np.ndarray) -> np.ndarray:
+        verts = np.empty((len(x), 4, 2))
+        left = x - BODY_WIDTH / 2
+        right = x + BODY_WIDTH / 2
+        verts[:, 0, 0] = left
+        verts[:, 0, 1] = bottom
+        verts[:, 1, 0] = left
+        verts[:, 1, 1] = top
+        verts[:, 2, 0] = right
+        verts[:, 2, 1] = top
+        verts[:, 3, 0] = right
+        verts[:, 3, 1] = bottom
+        return verts
+
+    def draw(self, dpi: int) -> Image.Image:
+        """Figürü verilen DPI ile rasterize eder"""
+        self.fig.set_dpi(dpi)
+        self.canvas.draw()
+        return Image.fromarray(np.asarray(self.canvas.buffer_rgba())).convert("RGB")
+
+
+@dataclass
+class ChartRender:
+    """Bir grafik çiziminin boyut ve süre kaydı"""
+    path: str
+    format: str
+    bytes: int
+    width: int
+    height: int
+    dpi: int
+    palette: bool
+    quality: Union[int, None]
+    render_ms: float
+    encode_ms: float
+    attempts: int
+    within_budget: bool
+
+
+def encode_image(image: Image.Image, fmt: ChartFormat = "png", palette: bool = False, quality: int = 80) -> bytes:
+    """RGB görüntüyü PNG (opsiyonel palet) veya WebP olarak kodlar"""
+    buf = io.BytesIO()
+    if fmt == "webp":
+        image.save(buf, "WEBP", quality=quality, method=4)
+    else:
+        if palette:
+            image = image.quantize(colors=PALETTE_COLORS)
+        image.save(buf, "PNG", optimize=palette)
+    return buf.getvalue()
+
+
+def _encode_ladder(fmt: ChartFormat, palette: bool) -> List[Tuple[bool, Union[int, None]]]:
+    """Bütçe aşıldığında denenecek (palet, kalite) sırası - kaliteden azalan"""
+    if fmt == "webp":
+        return [(False, q) for q in WEBP_QUALITIES]
+    return [(True, None)] if palette else [(False, None), (True, None)]
+
+
+class ChartEngine:
+    """
+    Hızlı grafik motoru: her (granularity, pencere boyutu) için figürü bir kez kurar,
+    sonraki çizimlerde artist'leri yerinde günceller.
+    """
+
+    def __init__(self, max_bars: Union[int, None] = DEFAULT_MAX_BARS, figsize: Tuple[float, float] = FIGSIZE,
+                 dpi: int = DPI, max_templates: int = MAX_TEMPLATES):
+        self.max_bars = max_bars
+        self.figsize = figsize
+        self.dpi = dpi
+        self.max_templates = max_templates
+        self._templates: "OrderedDict[Tuple[str, int], _ChartTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.renders: Deque[ChartRender] = deque(maxlen=RENDER_HISTORY)
+
+    def _template(self, granularity: str, window: int) -> _ChartTemplate:
+        key = (granularity, window)
+        template = self._templates.get(key)
+        if template is None:
+            template = _ChartTemplate(granularity, window, figsize=self.figsize, dpi=self.dpi)
+            self._templates[key] = template
+            while len(self._templates) > self.max_templates:
+                self._templates.popitem(last=False)
+        else:
+            self._templates.move_to_end(key)
+        return template
+
+    def render(self, df: pd.DataFrame, path: str, granularity: str = "15min", tp: Union[float, None] = None,
+               sl: Union[float, None] = None, title: str = "", fmt: ChartFormat = "png",
+               max_bytes: Union[int, None] = None, palette: bool = False, dpi: Union[int, None] = None) -> ChartRender:
+        """
+        Grafiği çizer ve path'e kaydeder.
+        max_bytes verilirse önce daha kompakt kodlamalar (palet PNG / düşük WebP kalitesi),
+        sonra daha düşük DPI denenir; bütçeye sığan ilk sonuç yazılır.
+        """
+        df = downsample_ohlc(df, self.max_bars)
+        dpi = dpi or self.dpi
+        ladder = _encode_ladder(fmt, palette)
+        if not max_bytes:
+            ladder = ladder[:1]
+
+        render_ms = encode_ms = 0.0
+        attempts = 0
+        # Aynı figür birden fazla thread'den aynı anda güncellenmemeli. Çizim ve kodlama GIL'e bağlı: ayrı figürlerle
+        # iki thread de tek thread kadar sürer (ölçüm: 59 / 65 ms/grafik), bu yüzden motor başına tek kilit yeterli
+        with self._lock:
+            template = self._template(granularity, len(df))
+            start = time.perf_counter()
+            template.update(df, tp=tp, sl=sl, title=title)
+            render_ms += (time.perf_counter() - start) * 1000
+
+            while True:
+                start = time.perf_counter()
+                image = template.draw(dpi)
+                render_ms += (time.perf_counter() - start) * 1000
+
+                for use_palette, quality in ladder:
+                    start = time.perf_counter()
+                    data = encode_image(image, fmt=fmt, palette=use_palette, quality=quality or 0)
+                    encode_ms += (time.perf_counter() - start) * 1000
+                    attempts += 1
+                    if not max_bytes or len(data) <= max_bytes:
+                        break
+                if not max_bytes or len(data) <= max_bytes or dpi <= MIN_DPI:
+                    break
+                dpi = max(MIN_DPI, int(dpi * DPI_STEP))
+
+        with open(path, "wb") as f:
+            f.write(data)
+
+        result = ChartRender(
+            path=path,
+            format=fmt,
+            bytes=len(data),
+            width=image.width,
+            height=image.height,
+            dpi=dpi,
+            palette=use_palette,
+            quality=quality,
+            render_ms=render_ms,
+            encode_ms=encode_ms,
+            attempts=attempts,
+            within_budget=not max_bytes or len(data) <= max_bytes,
+        )
+        self.renders.append(result)
+        return result
+
+    def clear(self):
+        """Önbellekteki tüm figürleri bırakır"""
+        with self._lock:
+            self._templates.clear()
+
+
+# Tüm stratejilerin paylaştığı motor
+chart_engine = ChartEngine()
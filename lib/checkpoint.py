@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import os
+import pickle
+import signal
+import threading
+import time
+import weakref
+import zlib
+from typing import Any, Callable, Dict, Tuple, Union
+
+# 💾 Durum kaydı (checkpoint) ayarları
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH") or "temp/checkpoint.bin"
+CHECKPOINT_INTERVAL = 60.0  # sn: döngü sonlarında diske en sık bu aralıkla yazılır
+CHECKPOINT_MAX_AGE = 6 * 60 * 60  # bundan eski kayıt yüklenmez (sn)
+CHECKPOINT_VERSION = 1
+
+
+class Checkpointer:
+    """
+    Çalışma durumunu (mum pencereleri, indikatör sonuçları, strateji tarama/özet durumu) tek bir
+    sıkıştırılmış dosyaya atomik olarak kaydeder ve yeniden başlatmada geri yükler.
+    Her bileşen kendi durumunu register(ad, snapshot, restore) ile bildirir:
+    snapshot() pickle edilebilir bir değer döndürür, restore(state) onu geri yükler.
+    restore() çağrıldıktan sonra kaydolan bileşenlere durumları kayıt anında verilir.
+    Sinyal dedup deposu kendi dosyasına yazar (lib/dedup.py); kapanışta o da birlikte kaydedilir.
+    """
+
+    def __init__(self, path: Union[str, None] = CHECKPOINT_PATH, interval: float = CHECKPOINT_INTERVAL,
+                 max_age: float = CHECKPOINT_MAX_AGE):
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age
+        self._providers: Dict[str, Tuple[Callable[[], Any], Callable[[Any], None]]] = {}
+        self._pending: Dict[str, Any] = {}  # yüklenmiş ama henüz kaydolmamış bileşenlerin durumu
+        self._lock = threading.Lock()
+        self._restored = False
+        self._saved_at = time.monotonic()
+
+    def register(self, name: str, snapshot: Callable[[], Any], restore: Callable[[Any], None]):
+        """Bileşeni kaydeder; aynı adla tekrar kaydolan (ör. yeniden yüklenen strateji) eskisinin yerine geçer"""
+        with self._lock:
+            self._providers[name] = (snapshot, restore)
+            state = self._pending.pop(name, None)
+        if state is not None:
+            self._apply(name, restore, state)
+
+    def _apply(self, name: str, restore: Callable[[Any], None], state: Any):
+        try:
+            restore(state)
+        except Exception as e:
+            logging.warning(f"⚠️ {name} durumu geri yüklenemedi, boş başlatılıyor: {e}")
+
+    def restore(self) -> bool:
+        """Kayıt dosyasını bir kez okur ve bileşenlere dağıtır. Kayıt yüklendiyse True döner."""
+        with self._lock:
+            if self._restored:
+                return False
+            self._restored = True
+        if not self.path or not os.path.exists(self.path):
+            return False
+        started = time.perf_counter()
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.loads(zlib.decompress(f.read()))
+            if data.get("version") != CHECKPOINT_VERSION:
+                logging.warning(f"⚠️ Durum kaydı sürümü uyumsuz, yok sayılıyor ({self.path})")
+                return False
+            age = time.time() - data["saved_at"]
+            if age > self.max_age:
+                logging.info(f"💾 Durum kaydı çok eski ({age / 3600:.1f} saat), yok sayılıyor")
+                return False
+        except Exception as e:
+            logging.warning(f"⚠️ Durum kaydı okunamadı, boş başlatılıyor: {e}")
+            return False
+
+        with self._lock:
+            providers = dict(self._providers)
+            self._pending = {name: state for name, state in data["states"].items() if name not in providers}
+        for name, (_, restore) in providers.items():
+            if name in data["states"]:
+                self._apply(name, restore, data["states"][name])
+        logging.info(f"💾 Durum kaydı yüklendi: {len(data['states'])} bileşen, {age:.0f} sn önce kaydedilmiş "
+                     f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+        return True
+
+    def save(self, force: bool = False) -> bool:
+        """Tüm bileşenlerin durumunu atomik olarak yazar (geçici dosya + os.replace). force=False ise aralık sınırlı."""
+        if not self.path:
+            return False
+        with self._lock:
+            if not force and time.monotonic() - self._saved_at < self.interval:
+                return False
+            self._saved_at = time.monotonic()
+            providers = dict(self._providers)
+            # Henüz kaydolmamış bileşenlerin yüklenmiş durumu kaybolmasın
+            states = dict(self._pending)
+
+        started = time.perf_counter()
+        for name, (snapshot, _) in providers.items():
+            try:
+                states[name] = snapshot()
+            except Exception as e:
+                logging.warning(f"⚠️ {name} durumu alınamadı: {e}")
+        try:
+            payload = zlib.compress(pickle.dumps({"version": CHECKPOINT_VERSION, "saved_at": time.time(),
+                                                  "states": states}, protocol=pickle.HIGHEST_PROTOCOL), 1)
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.warning(f"⚠️ Durum kaydı yazılamadı: {e}")
+            return False
+        logging.debug(f"💾 Durum kaydedildi: {len(states)} bileşen, {len(payload) / 1024:.0f} KB "
+                      f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+        return True
+
+
+# Süreç genelinde paylaşılan kayıt
+checkpointer = Checkpointer()
+
+
+def save_all():
+    """Kapanışta tüm kalıcı durumu yazar: checkpoint + sinyal dedup deposu"""
+    from lib.dedup import signal_store
+    checkpointer.save(force=True)
+    signal_store.save(force=True)
+
+
+def install_shutdown_handler():
+    """
+    SIGTERM gelince durumu kaydeder ve süreci düzgünce kapatır. Çalışan event loop içinden çağrılmalı.
+    Ana görev (loop'ta ilk çağıran, en dıştaki görev) Ctrl+C'deki gibi iptal edilir: yeni döngü başlamaz,
+    finally blokları çalışır ve shutdown_bot() gönderim kuyruğunu worker'lar hâlâ çalışırken boşaltır.
+    Ana görev bitince süreç SystemExit(0) ile kapanır.
+    """
+    def on_sigterm(*_):
+        logging.info("🛑 SIGTERM alındı, durum kaydedilip kapatılıyor...")
+        save_all()
+        raise SystemExit(0)
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if loop is not None and loop in _shutdown_tasks:
+        # Aynı loop'ta iç görevlerden (ör. runner altındaki stratejiler) tekrar çağrıldı: ana görev aynı kalır
+        return
+
+    def on_sigterm_async():
+        main_task = _shutdown_tasks.get(loop)
+        logging.info("🛑 SIGTERM alındı, durum kaydedilip kuyruk boşaltılarak kapatılıyor...")
+        save_all()
+        if main_task is None or main_task.done():
+            raise SystemExit(0)
+        main_task.add_done_callback(_exit)
+        main_task.cancel()
+
+    try:
+        loop.add_signal_handler(signal.SIGTERM, on_sigterm_async)
+        _shutdown_tasks[loop] = asyncio.current_task()
+    except (NotImplementedError, RuntimeError, AttributeError):
+        # Windows, ana thread dışı veya loop yok: klasik sinyal yakalayıcı
+        try:
+            signal.signal(signal.SIGTERM, on_sigterm)
+        except ValueError:
+            pass
+
+
+def _exit(_task):
+    raise SystemExit(0)
+
+
+# loop -> SIGTERM'de iptal edilecek ana görev
+_shutdown_tasks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Task]" = weakref.WeakKeyDictionary()
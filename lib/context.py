@@ -0,0 +1,217 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Tuple, Union
+
+import numpy as np
+
+# 🌐 Piyasa bağlamı ayarları
+CONTEXT_BENCHMARK = "BTCUSDT"  # piyasa yönünü belirleyen coin
+CONTEXT_GRANULARITY = "15min"
+CONTEXT_LIMIT = 300  # benchmark için çekilen mum sayısı (EMA200 için yeterli)
+CONTEXT_WINDOW = 96  # korelasyon ve genişlik penceresi (15 dk mumda 24 saat)
+CONTEXT_RETURN_BARS = 16  # değişim yüzdesi ufku (15 dk mumda 4 saat)
+CONTEXT_FAST = 50  # trend EMA'ları
+CONTEXT_SLOW = 200
+CONTEXT_CORRELATION_MIN = 0.5  # regime_conflict: BTC ile en az bu kadar korele coinlerde ters yönlü sinyal
+
+
+def _ema(values: np.ndarray, span: int) -> np.ndarray:
+    """
+    Son eksen boyunca EMA (pandas ewm(span, adjust=False) ile aynı), tüm satırlar için birlikte.
+    Döngü zaman adımları üzerindedir; coin sayısından bağımsız sayıda numpy işlemi yapılır.
+    """
+    alpha = 2.0 / (span + 1)
+    out = np.empty_like(values, dtype=np.float64)
+    out[..., 0] = values[..., 0]
+    for i in range(1, values.shape[-1]):
+        out[..., i] = alpha * values[..., i] + (1 - alpha) * out[..., i - 1]
+    return out
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+@dataclass(frozen=True)
+class MarketContext:
+    """
+    Döngü başında bir kez hesaplanan piyasa geneli özellikler; tüm coinlerin calculate_signal çağrılarına
+    salt okunur olarak verilir. Coin başına ek hesaplama yoktur (features() sadece sözlük okur).
+    """
+    computed_at: float
+    benchmark: str
+    btc_price: Union[float, None] = None
+    btc_trend: Union[str, None] = None  # "up" (EMA50 > EMA200), "down" veya None (yetersiz veri)
+    btc_change_pct: Union[float, None] = None  # son CONTEXT_RETURN_BARS mumdaki değişim
+    breadth_above_ema: Union[float, None] = None  # kapanışı kendi EMA50'sinin üstünde olan coin oranı
+    breadth_advancing: Union[float, None] = None  # son CONTEXT_RETURN_BARS mumda yükselen coin oranı
+    symbols: Tuple[str, ...] = ()
+    correlation: np.ndarray = field(default_factory=lambda: _readonly(np.empty((0, 0))), repr=False)
+    btc_correlation: Mapping[str, float] = field(default_factory=lambda: MappingProxyType({}))
+
+    def correlation_between(self, symbol: str, other: str) -> Union[float, None]:
+        """İki coinin getiri korelasyonu (ikisi de matristeyse)"""
+        try:
+            return float(self.correlation[self.symbols.index(symbol), self.symbols.index(other)])
+        except ValueError:
+            return None
+
+    def features(self, symbol: Union[str, None]) -> Dict[str, Any]:
+        """Sinyal detaylarına eklenecek alanlar"""
+        return {
+            "btc_trend": self.btc_trend,
+            "btc_change_pct": self.btc_change_pct,
+            "btc_corr": self.btc_correlation.get(symbol) if symbol else None,
+            "breadth": self.breadth_above_ema,
+        }
+
+    def regime_conflict(self, symbol: Union[str, None], side: str) -> bool:
+        """Sinyal BTC trendine ters ve coin BTC ile yeterince korele mi (rejim filtresi için)"""
+        if self.btc_trend is None or symbol == self.benchmark:
+            return False
+        correlation = self.btc_correlation.get(symbol) if symbol else None
+        if correlation is None or correlation < CONTEXT_CORRELATION_MIN:
+            return False
+        return (side == "LONG" and self.btc_trend == "down") or (side == "SHORT" and self.btc_trend == "up")
+
+
+def compute_context(benchmark: Union[np.ndarray, None], closes: Mapping[str, np.ndarray],
+                    benchmark_symbol: str = CONTEXT_BENCHMARK, window: int = CONTEXT_WINDOW,
+                    return_bars: int = CONTEXT_RETURN_BARS) -> MarketContext:
+    """
+    benchmark: BTC kapanışları (eskiden yeniye), closes: coin -> kapanışlar (son mumları aynı zamanda bitmeli).
+    En az window + 1 mumu olan coinler (window + 1, coin) matrisine dizilir; korelasyon, genişlik ve
+    BTC korelasyonu tek seferde hesaplanır. closes benchmark'ı da içeriyorsa (diğer coinlere hizalanmış pencere)
+    matriste o kullanılır; fiyat, trend ve değişim her zaman benchmark'ın son mumundan hesaplanır.
+    """
+    btc_price = btc_trend = btc_change = None
+    if benchmark is not None and len(benchmark):
+        btc_price = float(benchmark[-1])
+        if len(benchmark) >= CONTEXT_SLOW:
+            fast, slow = _ema(benchmark, CONTEXT_FAST)[-1], _ema(benchmark, CONTEXT_SLOW)[-1]
+            btc_trend = "up" if fast > slow else "down"
+        if len(benchmark) > return_bars and benchmark[-1 - return_bars]:
+            btc_change = float((benchmark[-1] / benchmark[-1 - return_bars] - 1) * 100)
+
+    aligned = closes.get(benchmark_symbol, benchmark)
+    if aligned is not None and len(aligned) > window:
+        closes = {benchmark_symbol: aligned, **{s: c for s, c in closes.items() if s != benchmark_symbol}}
+    symbols = tuple(symbol for symbol, close in closes.items() if len(close) > window)
+    if len(symbols) < 2:
+        return MarketContext(time.time(), benchmark_symbol, btc_price, btc_trend, btc_change)
+
+    matrix = np.vstack([closes[symbol][-window - 1:] for symbol in symbols]).astype(np.float64)
+    valid = np.all(np.isfinite(matrix) & (matrix > 0), axis=1)
+    if not valid.all():
+        symbols = tuple(symbol for symbol, ok in zip(symbols, valid) if ok)
+        matrix = matrix[valid]
+    if len(symbols) < 2:
+        return MarketContext(time.time(), benchmark_symbol, btc_price, btc_trend, btc_change)
+
+    returns = np.diff(np.log(matrix), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        correlation = np.corrcoef(returns)
+    correlation[~np.isfinite(correlation)] = 0.0  # fiyatı hiç değişmeyen coinler
+    breadth_above = float(np.mean(matrix[:, -1] > _ema(matrix, CONTEXT_FAST)[:, -1]))
+    breadth_advancing = float(np.mean(matrix[:, -1] > matrix[:, -1 - min(return_bars, window)]))
+    btc_correlation = {}
+    if benchmark_symbol in symbols:
+        row = correlation[symbols.index(benchmark_symbol)]
+        btc_correlation = {symbol: float(value) for symbol, value in zip(symbols, row)}
+    return MarketContext(time.time(), benchmark_symbol, btc_price, btc_trend, btc_change, breadth_above,
+                         breadth_advancing, symbols, _readonly(correlation), MappingProxyType(btc_correlation))
+
+
+def align_windows(windows: Mapping[str, Tuple[np.ndarray, np.ndarray]],
+                  benchmark: str = CONTEXT_BENCHMARK) -> Tuple[Union[int, None], Dict[str, np.ndarray]]:
+    """
+    coin -> (mum zamanları, kapanışlar) pencerelerini aynı son muma hizalar; (son mum zamanı, coin -> kapanışlar) döner.
+    Hedef mum, benchmark dışındaki coinlerin çoğunun bittiği mumdur (eşitlikte en yenisi): önceki döngüden kalan
+    pencereler yeni çekilen benchmark'tan bir mum geride olur, benchmark o muma kırpılır. Hedef mumu içermeyen
+    seriler atlanır, daha yeni mumu olanlar kırpılır.
+    """
+    lasts = [int(times[-1]) for coin, (times, _) in windows.items() if coin != benchmark and len(times)]
+    if not lasts and benchmark in windows and len(windows[benchmark][0]):
+        lasts = [int(windows[benchmark][0][-1])]
+    if not lasts:
+        return None, {}
+    values, counts = np.unique(lasts, return_counts=True)
+    end = int(values[counts == counts.max()][-1])
+    aligned = {}
+    for coin, (times, closes) in windows.items():
+        i = int(np.searchsorted(times, end))
+        if i < len(times) and times[i] == end:
+            aligned[coin] = closes[:i + 1]
+    return end, aligned
+
+
+class MarketContextBuilder:
+    """
+    Döngü başında refresh(coins) çağrılır: benchmark mumları paylaşılan önbellekten alınır (tek istek, BTC'nin
+    kendi analiziyle paylaşılır), diğer coinler için önbellekte zaten olan seriler kullanılır (ek istek yok).
+    Önceki döngüden kalan pencereler genelde benchmark'tan bir mum geride biter: korelasyon ve genişlik için
+    tüm seriler mum zamanına göre aynı son muma hizalanır (align_windows). Aynı benchmark mumu ve coin kümesi
+    için sonuç yeniden kullanılır: aynı süreçteki stratejiler bağlamı bir kez hesaplar.
+    """
+
+    def __init__(self, benchmark: str = CONTEXT_BENCHMARK, granularity: str = CONTEXT_GRANULARITY,
+                 limit: int = CONTEXT_LIMIT):
+        self.benchmark = benchmark
+        self.granularity = granularity
+        self.limit = limit
+        self.context: Union[MarketContext, None] = None
+        self._key = None
+        self.computed = 0
+        self.reused = 0
+
+    async def refresh(self, coins: Iterable[str]) -> MarketContext:
+        from lib.cache import candle_cache
+        started = time.perf_counter()
+        try:
+            frame = await candle_cache.get(symbol=self.benchmark, granularity=self.granularity, limit=self.limit)
+        except Exception as e:
+            logging.warning(f"⚠️ {self.benchmark} mumları alınamadı, piyasa bağlamı eksik: {e}")
+            frame = None
+        benchmark = None if frame is None or len(frame) == 0 else frame["close"].to_numpy()
+
+        # coin -> (mum zamanları, kapanışlar): önbellekteki seri, yoksa paylaşılan bellekteki pencere (kopya)
+        windows, versions = {}, {}
+        for coin in coins:
+            cached = candle_cache.series(coin, self.granularity)
+            if cached is not None and len(cached):
+                arrays = cached.arrays()
+                windows[coin], versions[coin] = (arrays["timestamp"], arrays["close"]), cached.version
+            elif candle_cache.shared is not None:
+                view = candle_cache.shared.view(coin, self.granularity, CONTEXT_WINDOW + 2)
+                if view is not None:
+                    window = (view.frame.index.asi8.copy(), view.frame["close"].to_numpy().copy())
+                    if view.valid():
+                        windows[coin], versions[coin] = window, view.seq
+        if benchmark is not None:
+            windows[self.benchmark] = (frame.index.asi8, benchmark)
+        # Farklı zamanlarda biten seriler korelasyonu bozar: hepsi aynı son muma hizalanır
+        end, closes = align_windows(windows, self.benchmark)
+
+        key = (None if frame is None else frame.index[-1].value, None if frame is None else frame.attrs.get("fetched_at"),
+               end, tuple((coin, versions.get(coin)) for coin in sorted(closes)))
+        if self.context is not None and key == self._key:
+            self.reused += 1
+            return self.context
+        self.context = compute_context(benchmark, closes, benchmark_symbol=self.benchmark)
+        self._key = key
+        self.computed += 1
+        context = self.context
+        logging.info(
+            "🌐 Piyasa bağlamı: BTC trend %s (%s%%), genişlik %s, %d coin korelasyonu (%.1f ms)",
+            context.btc_trend or "N/A",
+            f"{context.btc_change_pct:+.2f}" if context.btc_change_pct is not None else "N/A",
+            f"%{context.breadth_above_ema * 100:.0f}" if context.breadth_above_ema is not None else "N/A",
+            len(context.symbols), (time.perf_counter() - started) * 1000)
+        return context
+
+
+# Süreç genelinde paylaşılan bağlam (stratejiler aynı döngüde aynı sonucu kullanır)
+market_context = MarketContextBuilder()
@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Tuple, Union
+
+# 🧷 Sinyal tekrar (dedup) deposu ayarları
+DEDUP_PATH = os.getenv("SIGNAL_DEDUP_PATH") or "temp/signal_dedup.json"
+DEDUP_TTL_SECONDS = 24 * 60 * 60  # bir parmak izi bu süre sonunda unutulur
+DEDUP_MAX_ENTRIES = 10_000  # LRU sınırı: en eski kayıtlar atılır
+DEDUP_SAVE_INTERVAL = 5.0  # diske en sık bu aralıkla yazılır (sn)
+
+
+def signal_fingerprint(strategy: str, symbol: str, side: str, bar_time: Any) -> str:
+    """Sinyal parmak izi: (strateji, coin, yön, mum zamanı). Mesaj metni ve gönderim saati dahil değil."""
+    if hasattr(bar_time, "isoformat"):
+        bar_time = bar_time.isoformat()
+    return f"{strategy}|{symbol}|{side}|{bar_time}"
+
+
+class SignalDedupStore:
+    """
+    Gönderilen sinyallerin parmak izlerini tutan, TTL ve boyut sınırlı, diske kalıcı depo.
+    Aynı süreçteki tüm stratejiler tek depoyu paylaşır; kontrol ve kayıt O(1)'dir.
+    Yeniden başlatmada dosyadan yüklenir, böylece aynı mum için sinyal tekrar gönderilmez.
+    """
+
+    def __init__(self, path: Union[str, None] = DEDUP_PATH, ttl_seconds: float = DEDUP_TTL_SECONDS,
+                 max_entries: int = DEDUP_MAX_ENTRIES, save_interval: float = DEDUP_SAVE_INTERVAL):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.save_interval = save_interval
+
+        # parmak izi -> gönderim zamanı (epoch sn), eskiden yeniye sıralı
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        # (strateji, coin) -> son gönderim zamanı (minimum bekleme süresi için)
+        self._last_sent: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = 0.0
+        self._loaded = False
+
+    # --------------------------
+    # Sorgu / kayıt
+    # --------------------------
+
+    def should_send(self, strategy: str, symbol: str, side: str, bar_time: Any, min_interval: float = 0) -> bool:
+        """
+        Sinyal gönderilmeli mi? Aynı parmak izi TTL içinde gönderildiyse veya aynı coin için
+        son gönderimden bu yana min_interval (sn) geçmediyse False döner.
+        """
+        key = signal_fingerprint(strategy, symbol, side, bar_time)
+        now = time.time()
+        with self._lock:
+            self._ensure_loaded()
+            sent_at = self._entries.get(key)
+            if sent_at is not None and now - sent_at < self.ttl_seconds:
+                return False
+            last = self._last_sent.get((strategy, symbol))
+            if min_interval and last is not None and now - last < min_interval:
+                return False
+            return True
+
+    def mark_sent(self, strategy: str, symbol: str, side: str, bar_time: Any):
+        """Sinyali gönderildi olarak kaydeder (kuyruğa eklendikten sonra çağrılır)"""
+        key = signal_fingerprint(strategy, symbol, side, bar_time)
+        now = time.time()
+        with self._lock:
+            self._ensure_loaded()
+            self._entries[key] = now
+            self._entries.move_to_end(key)
+            self._last_sent[(strategy, symbol)] = now
+            self._last_sent.move_to_end((strategy, symbol))
+            self._evict(now)
+            self._dirty = True
+        self.save()
+
+    def seconds_since_last(self, strategy: str, symbol: str) -> Union[float, None]:
+        """Coin için son sinyalden bu yana geçen süre (sn); hiç gönderilmediyse None"""
+        with self._lock:
+            self._ensure_loaded()
+            last = self._last_sent.get((strategy, symbol))
+        return None if last is None else time.time() - last
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, now: float):
+        # Kayıtlar gönderim zamanına göre sıralı: baştan itibaren süresi dolanları / fazlaları at
+        for entries in (self._entries, self._last_sent):
+            while entries:
+                sent_at = next(iter(entries.values()))
+                if now - sent_at < self.ttl_seconds and len(entries) <= self.max_entries:
+                    break
+                entries.popitem(last=False)
+
+    # --------------------------
+    # Kalıcılık
+    # --------------------------
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for key, sent_at in sorted(data.get("entries", {}).items(), key=lambda item: item[1]):
+                self._entries[key] = float(sent_at)
+            for item in sorted(data.get("last_sent", []), key=lambda item: item["sent_at"]):
+                self._last_sent[(item["strategy"], item["symbol"])] = float(item["sent_at"])
+            self._evict(time.time())
+            logging.info(f"🧷 Sinyal dedup deposu yüklendi: {len(self._entries)} kayıt ({self.path})")
+        except Exception as e:
+            logging.warning(f"⚠️ Sinyal dedup deposu okunamadı, boş başlatılıyor: {e}")
+            self._entries.clear()
+            self._last_sent.clear()
+
+    def save(self, force: bool = False):
+        """Değişiklik varsa dosyaya atomik olarak yazar (geçici dosya + os.replace)"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty or (not force and time.monotonic() - self._saved_at < self.save_interval):
+                return
+            data = {
+                "entries": dict(self._entries),
+                "last_sent": [
+                    {"strategy": strategy, "symbol": symbol, "sent_at": sent_at}
+                    for (strategy, symbol), sent_at in self._last_sent.items()
+                ],
+            }
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.warning(f"⚠️ Sinyal dedup deposu kaydedilemedi: {e}")
+            with self._lock:
+                self._dirty = True
+
+
+# Süreç genelinde paylaşılan depo
+signal_store = SignalDedupStore()
@@ -0,0 +1,663 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import random
+import struct
+import time
+import zlib
+from collections import defaultdict, deque
+from typing import Any, Dict, Iterable, List, Set, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+DEFAULT_PORT = 8082
+CANDLES_PATH = "/api/v2/spot/market/candles"
+TICKERS_PATH = "/api/v2/spot/market/tickers"
+WS_PATH = "/v2/ws/public"
+STATS_PATH = "/__stats"  # sunucu istatistikleri (ayrı süreçte çalışırken yük testi okur; sayılmaz)
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+WS_MAX_BUFFER = 4 * 1024 * 1024  # yavaş abonenin yazma tamponu bunu aşarsa itme düşürülür (byte)
+
+# 📈 Sentetik piyasa ayarları
+GRANULARITY_SECONDS = {"1min": 60, "3min": 180, "5min": 300, "15min": 900, "30min": 1800, "1h": 3600,
+                       "4h": 14400, "6h": 21600, "12h": 43200, "1day": 86400, "1week": 604800}
+MAX_CANDLE_LIMIT = 1000  # Bitget spot mum isteğinin üst sınırı (seri başına saklanan mum)
+YEAR_SECONDS = 365 * 24 * 3600
+DEFAULT_VOLATILITY = 0.8  # yıllık oynaklık (coin başına 0.5x-1.5x dağıtılır)
+# Rejim değiştiren model: (yıllık sürüklenme, oynaklık çarpanı) -> boğa, ayı, yatay
+REGIMES = ((1.5, 0.8), (-1.5, 1.4), (0.0, 0.6))
+REGIME_MEAN_HOURS = 12  # ortalama rejim süresi
+KNOWN_PRICES = {"BTCUSDT": 60000.0, "ETHUSDT": 3000.0, "SOLUSDT": 150.0}
+
+
+def _format(value: float) -> str:
+    return format(float(value), ".10g")
+
+
+class SyntheticMarket:
+    """
+    Sembol başına deterministik fiyat yolları (aynı seed ve sembol -> aynı geçmiş).
+    model="gbm": sabit sürüklenme/oynaklıkla geometrik Brown hareketi;
+    model="regime": boğa/ayı/yatay rejimleri arasında rastgele geçiş yapan GBM.
+
+    Canlı fiyatlar tüm coinler için tek numpy adımıyla ilerler (tick). Mum geçmişi ilk istekte üretilir ve
+    canlı fiyatta biter; zaman yeni mumlara geçtikçe eksik mumlar önceki kapanıştan canlı fiyata köprülenir,
+    açık mumun kapanış/yüksek/düşük değerleri her istekte canlı fiyatla güncellenir.
+
+    Args:
+        model: "gbm" veya "regime"
+        seed: Rastgelelik tohumu
+        drift: Yıllık sürüklenme (gbm)
+        volatility: Yıllık oynaklık
+        speed: Saat hızı (ör. 60: bir dakikada bir saatlik mum üretilir)
+    """
+
+    def __init__(self, model: str = "gbm", seed: Union[int, None] = None, drift: float = 0.0,
+                 volatility: float = DEFAULT_VOLATILITY, speed: float = 1.0):
+        if model not in ("gbm", "regime"):
+            raise ValueError(f"Bilinmeyen model: {model}")
+        self.model = model
+        self.seed = 0 if seed is None else seed
+        self.drift = drift
+        self.volatility = volatility
+        self.speed = speed
+        self._epoch = time.time()
+        self._rng = np.random.default_rng(self.seed)
+
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.prices = np.empty(0)
+        self.sigmas = np.empty(0)
+        self.regimes = np.empty(0, dtype=np.int8)
+        self.open_24h = np.empty(0)
+        self.high_24h = np.empty(0)
+        self.low_24h = np.empty(0)
+        self.base_volume = np.empty(0)
+        self._paths: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self._last_tick = self.now()
+
+    def now(self) -> float:
+        """Simülasyon saati (sn)"""
+        return self._epoch + (time.time() - self._epoch) * self.speed
+
+    def _symbol_rng(self, symbol: str, salt: int = 0) -> np.random.Generator:
+        return np.random.default_rng([self.seed, zlib.crc32(symbol.encode()), salt])
+
+    def add(self, symbols: Iterable[str]) -> List[int]:
+        """Sembolleri evrene ekler (zaten varsa dokunmaz); indekslerini döndürür"""
+        new = [s for s in dict.fromkeys(symbols) if s not in self._index]
+        if new:
+            prices, sigmas, regimes, volumes = [], [], [], []
+            for symbol in new:
+                rng = self._symbol_rng(symbol)
+                prices.append(KNOWN_PRICES.get(symbol, 10 ** rng.uniform(-4, 3)))
+                sigmas.append(self.volatility * (0.6 if symbol in KNOWN_PRICES else rng.uniform(0.5, 1.5)))
+                regimes.append(rng.integers(len(REGIMES)))
+                volumes.append(10 ** rng.uniform(5, 7))
+                self._index[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+            prices = np.asarray(prices)
+            self.prices = np.concatenate([self.prices, prices])
+            self.sigmas = np.concatenate([self.sigmas, sigmas])
+            self.regimes = np.concatenate([self.regimes, np.asarray(regimes, dtype=np.int8)])
+            self.open_24h = np.concatenate([self.open_24h, prices])
+            self.high_24h = np.concatenate([self.high_24h, prices])
+            self.low_24h = np.concatenate([self.low_24h, prices])
+            # base_volume: 24 saatlik işlem tutarı (USDT); coin adedi fiyata bölünerek bulunur
+            self.base_volume = np.concatenate([self.base_volume, volumes])
+        return [self._index[s] for s in symbols]
+
+    def _drift_sigma(self, regimes: np.ndarray, sigmas: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.model == "gbm":
+            return np.full_like(sigmas, self.drift), sigmas
+        table = np.asarray(REGIMES)
+        return table[regimes, 0], sigmas * table[regimes, 1]
+
+    def _returns(self, rng: np.random.Generator, steps: int, dt: float, sigma: float, regime: int) -> np.ndarray:
+        """steps adet log getirisi (dt sn aralıklı)"""
+        years = dt / YEAR_SECONDS
+        if self.model == "regime":
+            # Rejim geçişleri: her adımda dt / ortalama süre olasılıkla yeni (rastgele) rejim
+            switches = rng.random(steps) < min(1.0, dt / (REGIME_MEAN_HOURS * 3600))
+            segments = np.cumsum(switches)
+            choices = np.concatenate([[regime], rng.integers(len(REGIMES), size=int(segments[-1]))])
+            regimes = choices[segments]
+        else:
+            regimes = np.zeros(steps, dtype=np.int8)
+        mu, sig = self._drift_sigma(regimes, np.full(steps, sigma))
+        return (mu - 0.5 * sig ** 2) * years + sig * np.sqrt(years) * rng.standard_normal(steps)
+
+    def tick(self) -> float:
+        """Tüm canlı fiyatları son tick'ten bu yana geçen simülasyon süresi kadar ilerletir; dt döndürür"""
+        now = self.now()
+        dt, self._last_tick = now - self._last_tick, now
+        if dt <= 0 or not self.symbols:
+            return 0.0
+        if self.model == "regime":
+            switch = self._rng.random(len(self.symbols)) < min(1.0, dt / (REGIME_MEAN_HOURS * 3600))
+            self.regimes[switch] = self._rng.integers(len(REGIMES), size=int(switch.sum()))
+        mu, sig = self._drift_sigma(self.regimes, self.sigmas)
+        years = dt / YEAR_SECONDS
+        self.prices *= np.exp((mu - 0.5 * sig ** 2) * years + sig * np.sqrt(years) * self._rng.standard_normal(len(self.symbols)))
+        np.maximum(self.high_24h, self.prices, out=self.high_24h)
+        np.minimum(self.low_24h, self.prices, out=self.low_24h)
+        return dt
+
+    def _generate(self, symbol: str, seconds: int, bucket: int) -> Dict[str, Any]:
+        """Canlı fiyatta biten MAX_CANDLE_LIMIT mumluk geçmiş"""
+        i = self._index[symbol]
+        rng = self._symbol_rng(symbol, seconds)
+        returns = self._returns(rng, MAX_CANDLE_LIMIT + 1, seconds, self.sigmas[i], int(self.regimes[i]))
+        path = self.prices[i] * np.exp(np.cumsum(returns) - returns.sum())
+        rows = self._rows(rng, path[:-1], path[1:], seconds, self.sigmas[i], self.base_volume[i])
+        times = (np.arange(bucket - MAX_CANDLE_LIMIT + 1, bucket + 1, dtype=np.int64) * seconds * 1000)
+        return {"times": times, "rows": rows, "bucket": bucket, "rng": rng}
+
+    @staticmethod
+    def _rows(rng: np.random.Generator, opens: np.ndarray, closes: np.ndarray, seconds: int, sigma: float,
+              daily_volume: float) -> np.ndarray:
+        """(mum, [open, high, low, close, volume, quote_volume]) tablosu"""
+        n = len(closes)
+        bar_sigma = sigma * np.sqrt(seconds / YEAR_SECONDS)
+        wick = np.abs(rng.standard_normal((2, n))) * bar_sigma * 0.5
+        high = np.maximum(opens, closes) * np.exp(wick[0])
+        low = np.minimum(opens, closes) * np.exp(-wick[1])
+        # Hacim: günlük tutarın mum payı, büyük hareketlerde artar
+        move = np.abs(np.log(closes / opens)) / max(bar_sigma, 1e-12)
+        quote = daily_volume * seconds / 86400 * np.exp(0.5 * rng.standard_normal(n)) * (1 + move)
+        return np.column_stack([opens, high, low, closes, quote / closes, quote])
+
+    def candles(self, symbol: str, granularity: str, limit: int = 100,
+                end_time: Union[int, None] = None) -> List[List[str]]:
+        """Bitget biçiminde mum satırları (eskiden yeniye, metin): ts, open, high, low, close, hacim, tutar, tutar"""
+        seconds = GRANULARITY_SECONDS[granularity]
+        i = self.add([symbol])[0]
+        bucket = int(self.now() // seconds)
+        key = (symbol, seconds)
+        state = self._paths.get(key)
+        if state is None:
+            state = self._paths[key] = self._generate(symbol, seconds, bucket)
+        elif bucket > state["bucket"]:
+            # Eksik mumlar: önceki kapanıştan canlı fiyata köprü (getirilerin toplamı log(canlı / kapanış))
+            steps = bucket - state["bucket"]
+            rng = state["rng"]
+            returns = self._returns(rng, steps, seconds, self.sigmas[i], int(self.regimes[i]))
+            last_close = state["rows"][-1, 3]
+            returns += (np.log(self.prices[i] / last_close) - returns.sum()) / steps
+            closes = last_close * np.exp(np.cumsum(returns))
+            opens = np.concatenate([[last_close], closes[:-1]])
+            rows = self._rows(rng, opens, closes, seconds, self.sigmas[i], self.base_volume[i])
+            times = np.arange(state["bucket"] + 1, bucket + 1, dtype=np.int64) * seconds * 1000
+            state["rows"] = np.concatenate([state["rows"], rows])[-MAX_CANDLE_LIMIT:]
+            state["times"] = np.concatenate([state["times"], times])[-MAX_CANDLE_LIMIT:]
+            state["bucket"] = bucket
+
+        # Açık mum canlı fiyatı izler
+        last = state["rows"][-1]
+        price = self.prices[i]
+        last[3] = price
+        last[1] = max(last[1], price)
+        last[2] = min(last[2], price)
+
+        times, rows = state["times"], state["rows"]
+        if end_time is not None:
+            keep = times <= end_time
+            times, rows = times[keep], rows[keep]
+        times, rows = times[-limit:], rows[-limit:]
+        return [[str(t), *map(_format, row), _format(row[5])] for t, row in zip(times.tolist(), rows.tolist())]
+
+    def ticker(self, symbol: str, now_ms: Union[int, None] = None) -> Dict[str, str]:
+        """Bitget v2 spot ticker alanları"""
+        i = self._index[symbol]
+        price = self.prices[i]
+        spread = price * 0.0001
+        change = price / self.open_24h[i] - 1
+        quote_volume = self.base_volume[i]
+        return {
+            "symbol": symbol,
+            "high24h": _format(self.high_24h[i]),
+            "open": _format(self.open_24h[i]),
+            "lastPr": _format(price),
+            "low24h": _format(self.low_24h[i]),
+            "quoteVolume": _format(quote_volume),
+            "baseVolume": _format(quote_volume / price),
+            "usdtVolume": _format(quote_volume),
+            "bidPr": _format(price - spread),
+            "askPr": _format(price + spread),
+            "bidSz": "1",
+            "askSz": "1",
+            "openUtc": _format(self.open_24h[i]),
+            "ts": str(now_ms if now_ms is not None else int(self.now() * 1000)),
+            "changeUtc24h": _format(change),
+            "change24h": _format(change),
+        }
+
+
+# --------------------------
+# WebSocket çerçeveleri (RFC 6455; parçalı çerçeveler desteklenmez)
+# --------------------------
+
+def _ws_mask(payload: bytes, key: bytes) -> bytes:
+    return (int.from_bytes(payload, "big") ^ int.from_bytes((key * (len(payload) // 4 + 1))[:len(payload)], "big")).to_bytes(len(payload), "big")
+
+
+def _ws_frame(payload: bytes, opcode: int = 0x1, mask: bool = False) -> bytes:
+    header = bytes([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    size = len(payload)
+    if size < 126:
+        header += bytes([mask_bit | size])
+    elif size < 65536:
+        header += bytes([mask_bit | 126]) + struct.pack("!H", size)
+    else:
+        header += bytes([mask_bit | 127]) + struct.pack("!Q", size)
+    if mask:
+        key = os.urandom(4)
+        return header + key + _ws_mask(payload, key)
+    return header + payload
+
+
+async def _ws_read(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    first, second = await reader.readexactly(2)
+    size = second & 0x7F
+    if size == 126:
+        size = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif size == 127:
+        size = struct.unpack("!Q", await reader.readexactly(8))[0]
+    key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(size)
+    return first & 0x0F, _ws_mask(payload, key) if key else payload
+
+
+def _ws_accept(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+
+class FakeExchangeServer:
+    """
+    Yük testi için yerel sentetik borsa: Bitget biçiminde mum (/api/v2/spot/market/candles), ticker
+    (/api/v2/spot/market/tickers) ve WebSocket ticker kanalı (/v2/ws/public) sunar.
+    Fiyatlar SyntheticMarket'tan gelir; gecikme, uç başına hız limiti (429) ve hata enjeksiyonu ayarlanabilir.
+    Bot BITGET_BASE_URLS=<base_url> ile bu sunucuya yönlendirilir.
+
+    Args:
+        symbols: Başlangıçta evrende olan coinler (istenen diğer coinler ilk istekte eklenir)
+        market: Fiyat kaynağı (verilmezse model/seed ile oluşturulur)
+        latency: Her HTTP isteği için temel gecikme (sn)
+        jitter: Gecikmeye eklenen rastgele üst sınır (sn)
+        rate: Uç (mum / ticker) başına saniyede izin verilen istek (aşılırsa 429; Bitget: 20)
+        error_rate: Rastgele 502 döndürme olasılığı
+        tick_interval: Canlı fiyat adımı ve WebSocket itme aralığı (sn)
+        strict: True ise evrende olmayan coinler için 400 (Bitget "40034")
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, symbols: Iterable[str] = (),
+                 market: Union[SyntheticMarket, None] = None, model: str = "gbm", latency: float = 0.02,
+                 jitter: float = 0.01, rate: Union[float, None] = None, error_rate: float = 0.0,
+                 tick_interval: float = 0.5, strict: bool = False, seed: Union[int, None] = None):
+        self.host = host
+        self.port = port
+        self.market = market or SyntheticMarket(model=model, seed=seed)
+        self.market.add(symbols)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate = rate
+        self.error_rate = error_rate
+        self.tick_interval = tick_interval
+        self.strict = strict
+        self.random = random.Random(seed)
+
+        self._server = None
+        self._ticker_task = None
+        self._windows = defaultdict(deque)
+        self._connections: Set[asyncio.StreamWriter] = set()
+        self._subscribers: Dict[asyncio.StreamWriter, Set[str]] = {}
+
+        # İstatistikler
+        self.requests = defaultdict(int)
+        self.rate_limited = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.ws_connections = 0
+        self.ws_messages = 0
+        self.ws_dropped = 0
+
+    # --------------------------
+    # Yaşam döngüsü
+    # --------------------------
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port}{WS_PATH}"
+
+    async def start(self) -> "FakeExchangeServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ticker_task = asyncio.create_task(self._ticker_loop())
+        logging.info(f"🧪 Sentetik borsa çalışıyor: {self.base_url} ({len(self.market.symbols)} coin, {self.market.model})")
+        return self
+
+    async def stop(self):
+        if self._ticker_task is not None:
+            self._ticker_task.cancel()
+            self._ticker_task = None
+        if self._server is not None:
+            self._server.close()
+            # Açık (keep-alive / WebSocket) bağlantılar kapatılır: işleyiciler EOF görüp kendiliğinden biter
+            for writer in list(self._connections):
+                writer.close()
+            while self._connections:
+                await asyncio.sleep(0.01)
+            await self._server.wait_closed()
+            self._server = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": dict(self.requests),
+            "rate_limited": self.rate_limited,
+            "errors": self.errors,
+            "bytes_sent": self.bytes_sent,
+            "symbols": len(self.market.symbols),
+            "ws_connections": self.ws_connections,
+            "ws_messages": self.ws_messages,
+            "ws_dropped": self.ws_dropped,
+        }
+
+    # --------------------------
+    # HTTP
+    # --------------------------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                if "content-length" in headers:
+                    await reader.readexactly(int(headers["content-length"]))
+
+                url = urlsplit(target)
+                if headers.get("upgrade", "").lower() == "websocket":
+                    await self._websocket(reader, writer, url.path, headers)
+                    return
+                status, payload = await self._dispatch(url.path, dict(parse_qsl(url.query)))
+
+                data = json.dumps(payload, separators=(",", ":")).encode()
+                self.bytes_sent += len(data)
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            self._subscribers.pop(writer, None)
+            writer.close()
+
+    def _rate_limited(self, endpoint: str) -> bool:
+        if self.rate is None:
+            return False
+        now = time.monotonic()
+        window = self._windows[endpoint]
+        while window and now - window[0] > 1.0:
+            window.popleft()
+        if len(window) >= self.rate:
+            return True
+        window.append(now)
+        return False
+
+    @staticmethod
+    def _response(data: Any, code: str = "00000", msg: str = "success") -> Dict[str, Any]:
+        return {"code": code, "msg": msg, "requestTime": int(time.time() * 1000), "data": data}
+
+    async def _dispatch(self, path: str, params: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        if path == STATS_PATH:
+            return 200, self.stats()
+        endpoint = path.rstrip("/").rsplit("/", 1)[-1]
+        self.requests[endpoint] += 1
+        await asyncio.sleep(self.latency + self.random.uniform(0, self.jitter))
+
+        if path not in (CANDLES_PATH, TICKERS_PATH):
+            return 404, self._response(None, "40404", "Request URL NOT FOUND")
+        if self._rate_limited(endpoint):
+            self.rate_limited += 1
+            return 429, self._response(None, "429", "Too Many Requests")
+        if self.random.random() < self.error_rate:
+            self.errors += 1
+            return 502, self._response(None, "50000", "Bad Gateway")
+
+        symbol = params.get("symbol")
+        if symbol and self.strict and symbol not in self.market._index:
+            return 400, self._response(None, "40034", f"Parameter {symbol} does not exist")
+
+        if path == TICKERS_PATH:
+            symbols = [symbol] if symbol else self.market.symbols
+            self.market.add(symbols)
+            now_ms = int(self.market.now() * 1000)
+            return 200, self._response([self.market.ticker(s, now_ms) for s in symbols])
+
+        granularity = params.get("granularity", "")
+        if not symbol or granularity not in GRANULARITY_SECONDS:
+            return 400, self._response(None, "40034", "Parameter verification failed")
+        try:
+            limit = min(int(params.get("limit") or 100), MAX_CANDLE_LIMIT)
+            end_time = int(params["endTime"]) if params.get("endTime") else None
+        except ValueError:
+            return 400, self._response(None, "40034", "Parameter verification failed")
+        return 200, self._response(self.market.candles(symbol, granularity, limit, end_time))
+
+    # --------------------------
+    # WebSocket
+    # --------------------------
+
+    async def _websocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str,
+                         headers: Dict[str, str]):
+        if path != WS_PATH or "sec-websocket-key" not in headers:
+            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+            await writer.drain()
+            return
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {_ws_accept(headers['sec-websocket-key'])}\r\n\r\n".encode()
+        )
+        await writer.drain()
+        self.ws_connections += 1
+        self._subscribers[writer] = set()
+        while True:
+            opcode, payload = await _ws_read(reader)
+            if opcode == 0x8:  # close
+                writer.write(_ws_frame(payload[:2], opcode=0x8))
+                await writer.drain()
+                return
+            if opcode == 0x9:  # ping çerçevesi
+                writer.write(_ws_frame(payload, opcode=0xA))
+            elif opcode == 0x1:
+                text = payload.decode(errors="replace")
+                if text == "ping":
+                    # Bitget: istemci 30 sn'de bir "ping" metni gönderir
+                    writer.write(_ws_frame(b"pong"))
+                else:
+                    for reply in self._ws_command(writer, text):
+                        writer.write(_ws_frame(json.dumps(reply, separators=(",", ":")).encode()))
+            await writer.drain()
+
+    def _ws_command(self, writer: asyncio.StreamWriter, text: str) -> List[Dict[str, Any]]:
+        try:
+            message = json.loads(text)
+            op, args = message["op"], message["args"]
+        except (ValueError, KeyError, TypeError):
+            return [{"event": "error", "code": 30001, "msg": "Illegal request"}]
+        replies = []
+        subscribed = self._subscribers[writer]
+        for arg in args:
+            if op not in ("subscribe", "unsubscribe") or arg.get("channel") != "ticker" or not arg.get("instId"):
+                replies.append({"event": "error", "arg": arg, "code": 30001, "msg": "channel doesn't exist"})
+                continue
+            if op == "subscribe":
+                self.market.add([arg["instId"]])
+                subscribed.add(arg["instId"])
+            else:
+                subscribed.discard(arg["instId"])
+            replies.append({"event": op, "arg": arg})
+        return replies
+
+    async def _ticker_loop(self):
+        """Her tick_interval'da fiyatları ilerletir ve abone olunan coinlerin ticker'larını iter"""
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            self.market.tick()
+            if not self._subscribers:
+                continue
+            now_ms = int(time.time() * 1000)
+            for writer, symbols in list(self._subscribers.items()):
+                if not symbols or writer.is_closing():
+                    continue
+                if writer.transport.get_write_buffer_size() > WS_MAX_BUFFER:
+                    self.ws_dropped += len(symbols)
+                    continue
+                frames = []
+                for symbol in symbols:
+                    frames.append(_ws_frame(json.dumps({
+                        "action": "snapshot",
+                        "arg": {"instType": "SPOT", "channel": "ticker", "instId": symbol},
+                        "data": [self.market.ticker(symbol)],
+                        "ts": now_ms,
+                    }, separators=(",", ":")).encode()))
+                data = b"".join(frames)
+                self.bytes_sent += len(data)
+                self.ws_messages += len(frames)
+                writer.write(data)
+
+
+class TickerSubscriber:
+    """
+    WebSocket ticker kanalına abone olan küçük istemci (yük testi için): alınan mesajları ve itme gecikmesini
+    (alış zamanı - mesajdaki ts) sayar.
+    """
+
+    def __init__(self, url: str, symbols: Iterable[str], batch: int = 100):
+        self.url = url
+        self.symbols = list(symbols)
+        self.batch = batch
+        self.messages = 0
+        self.bytes_received = 0
+        self.latencies = deque(maxlen=10000)
+        self._task = None
+        self._writer = None
+
+    async def start(self) -> "TickerSubscriber":
+        url = urlsplit(self.url)
+        reader, writer = await asyncio.open_connection(url.hostname, url.port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write(
+            f"GET {url.path} HTTP/1.1\r\nHost: {url.netloc}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode()
+        )
+        status = await reader.readline()
+        if b" 101 " not in status:
+            writer.close()
+            raise ConnectionError(f"WebSocket el sıkışması başarısız: {status!r}")
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        # Bitget tek istekte en fazla ~100 kanal kabul eder: abonelik parçalar halinde
+        for i in range(0, len(self.symbols), self.batch):
+            args = [{"instType": "SPOT", "channel": "ticker", "instId": s} for s in self.symbols[i:i + self.batch]]
+            writer.write(_ws_frame(json.dumps({"op": "subscribe", "args": args}).encode(), mask=True))
+        await writer.drain()
+        self._writer = writer
+        self._task = asyncio.create_task(self._read(reader))
+        return self
+
+    async def _read(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                opcode, payload = await _ws_read(reader)
+                if opcode == 0x8:
+                    return
+                self.bytes_received += len(payload)
+                if opcode != 0x1 or not payload.startswith(b'{"action"'):
+                    continue
+                self.messages += 1
+                self.latencies.append(time.time() - json.loads(payload)["ts"] / 1000)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+
+    async def stop(self):
+        if self._writer is not None:
+            try:
+                self._writer.write(_ws_frame(struct.pack("!H", 1000), opcode=0x8, mask=True))
+                await self._writer.drain()
+            except ConnectionError:
+                pass
+            self._writer.close()
+            self._writer = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+async def _serve(args):
+    symbols = ["BTCUSDT"] + [f"SYN{i:04d}USDT" for i in range(max(0, args.symbols - 1))]
+    server = await FakeExchangeServer(
+        host=args.host,
+        port=args.port,
+        symbols=symbols,
+        market=SyntheticMarket(model=args.model, seed=args.seed, speed=args.speed),
+        latency=args.latency,
+        jitter=args.jitter,
+        rate=args.rate,
+        error_rate=args.error_rate,
+        tick_interval=args.tick_interval,
+    ).start()
+    print(f"🧪 BITGET_BASE_URLS={server.base_url}")
+    print(f"🧪 WebSocket: {server.ws_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Yerel sentetik borsa (Bitget biçiminde mum, ticker ve WebSocket)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--symbols", type=int, default=100, help="BTCUSDT + SYN0000USDT... coin sayısı")
+    parser.add_argument("--model", choices=["gbm", "regime"], default="gbm")
+    parser.add_argument("--speed", type=float, default=1.0, help="saat hızı (60: dakikada bir saat)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--rate", type=float, default=None, help="uç başına istek/sn (Bitget: 20)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tick-interval", type=float, default=0.5)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,311 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Tuple, Union
+
+import requests
+
+from lib.metrics import circuit_open, http_hedges, http_requests, http_seconds
+
+# 🛰️ Dayanıklı piyasa verisi isteği ayarları
+# Virgülle ayrılmış ayna adresleri (sırayla denenir, sağlıksız olan atlanır)
+BITGET_BASE_URLS = [url.strip().rstrip("/") for url in
+                    (os.getenv("BITGET_BASE_URLS") or "https://api.bitget.com").split(",") if url.strip()]
+FETCH_TIMEOUT = 15.0  # sn: tek istek için üst sınır (döngü süresi kısıtı yoksa)
+FETCH_MIN_BUDGET = 0.5  # sn: döngü süresinden bundan az kaldıysa istek atılmaz
+FETCH_CYCLE_SHARE = 0.5  # stratejiler: mum çekme için periyodun bu oranı kadar süre ayrılır (cycle_deadline)
+FETCH_HEDGE_PERCENTILE = 0.95  # bu gecikme yüzdeliği aşılınca ikinci (yedek) istek gönderilir
+FETCH_HEDGE_MIN_DELAY = 0.25  # sn: yedek istek en erken bu kadar sonra
+FETCH_HEDGE_DEFAULT_DELAY = 2.0  # sn: yeterli gecikme örneği yokken
+FETCH_HEDGE_MIN_SAMPLES = 20
+FETCH_LATENCY_HISTORY = 200
+FETCH_WORKERS = 16  # asıl + yedek istekleri çalıştıran thread sayısı
+CIRCUIT_FAILURES = 5  # art arda bu kadar hatada devre açılır (adrese istek atılmaz)
+CIRCUIT_COOLDOWN = 30.0  # sn: sonra tek deneme isteğine izin verilir (başarılıysa kapanır)
+
+_deadline: "contextvars.ContextVar[Union[float, None]]" = contextvars.ContextVar("fetch_deadline", default=None)
+
+
+@contextmanager
+def cycle_deadline(seconds: float) -> Iterator[float]:
+    """
+    Blok içindeki (ve oradan başlatılan görev / asyncio.to_thread çağrılarındaki) isteklerin bitmesi gereken
+    zaman. Her isteğin zaman aşımı kalan süreyle sınırlanır; süre dolunca istek atılmadan None döner.
+    """
+    deadline = time.monotonic() + seconds
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def request_budget() -> Union[float, None]:
+    """Geçerli döngüde kalan süre (sn); döngü süresi yoksa None"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class CircuitBreaker:
+    """
+    Adres başına devre kesici: art arda CIRCUIT_FAILURES hatada açılır, CIRCUIT_COOLDOWN sonra yarı açık
+    duruma geçip tek deneme isteğine izin verir; deneme başarılıysa kapanır, değilse süre yeniden başlar.
+    Deneme adres hakkında sonuç vermeden biterse (döngü bütçesi dolduğu için zaman aşımı) release() ile
+    bırakılır: devre yarı açık kalır ve sıradaki istek yeniden deneme olur.
+    """
+
+    def __init__(self, name: str, failures: int = CIRCUIT_FAILURES, cooldown: float = CIRCUIT_COOLDOWN):
+        self.name = name
+        self.failures = failures
+        self.cooldown = cooldown
+        self.consecutive = 0
+        self.opened_at: Union[float, None] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logging.info(f"🟢 Devre kapandı: {self.name}")
+            self.consecutive = 0
+            self.opened_at = None
+            self._trial = False
+
+    def release(self):
+        """Sonuçsuz biten denemeyi bırakır (başarı / hata sayılmaz)"""
+        with self._lock:
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.consecutive += 1
+            reopen = self._trial
+            self._trial = False
+            if reopen or (self.opened_at is None and self.consecutive >= self.failures):
+                if not reopen:
+                    logging.warning(f"🔴 Devre açıldı: {self.name} ({self.consecutive} art arda hata), "
+                                    f"{self.cooldown:.0f} sn istek atılmayacak")
+                self.opened_at = time.monotonic()
+
+
+class _Endpoint:
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.breaker = CircuitBreaker(base_url)
+        self.latencies: Deque[float] = deque(maxlen=FETCH_LATENCY_HISTORY)
+
+    def hedge_delay(self) -> float:
+        if len(self.latencies) < FETCH_HEDGE_MIN_SAMPLES:
+            return FETCH_HEDGE_DEFAULT_DELAY
+        ordered = sorted(self.latencies)
+        return max(FETCH_HEDGE_MIN_DELAY, ordered[min(len(ordered) - 1, int(len(ordered) * FETCH_HEDGE_PERCENTILE))])
+
+
+class _Failure(Exception):
+    """Adresin sağlıksız olduğunu gösteren hata (ağ hatası, zaman aşımı, 429/5xx, bozuk yanıt)"""
+
+    def __init__(self, result: str, message: str, limited: bool = False):
+        super().__init__(message)
+        self.result = result
+        self.limited = limited  # zaman aşımı döngü bütçesinden kaynaklandı: adres sağlıksız sayılmaz
+
+
+class MarketDataClient:
+    """
+    Piyasa verisi GET istekleri: ayna adresleri, adres başına devre kesici, gecikme yüzdeliğine göre yedek
+    (hedged) istek ve döngü süresinden türetilen istek bütçesi.
+    - Asıl istek en sağlıklı adrese gider; adresin son FETCH_HEDGE_PERCENTILE gecikmesi aşılırsa ikinci istek
+      sıradaki aynaya (tek adres varsa aynı adrese, yeni bağlantıyla) gönderilir, ilk başarılı yanıt kullanılır.
+    - Hatalar yutulmaz: sonuçlar bot_http_requests_total'a, devre durumu bot_circuit_open'a yazılır,
+      devre açılıp kapanırken uyarı loglanır.
+    Senkron çalışır (CandleCache isteği asyncio.to_thread ile çağırır; cycle_deadline bu thread'e taşınır).
+    """
+
+    def __init__(self, base_urls: Union[List[str], None] = None, target: str = "bitget", timeout: float = FETCH_TIMEOUT,
+                 hedge: bool = True):
+        self.target = target
+        self.timeout = timeout
+        self.hedge = hedge
+        self.endpoints = [_Endpoint(url) for url in (base_urls or BITGET_BASE_URLS)]
+        self._executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix=f"{target}-fetch")
+        self._local = threading.local()
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def _session(self) -> requests.Session:
+        # Thread başına oturum: bağlantılar (keep-alive) yeniden kullanılır
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _candidates(self) -> List[_Endpoint]:
+        healthy = [endpoint for endpoint in self.endpoints if endpoint.breaker.state == "closed"]
+        others = [endpoint for endpoint in self.endpoints if endpoint.breaker.state != "closed"]
+        return healthy + others
+
+    def _attempt(self, endpoint: _Endpoint, path: str, params: Dict[str, Any], timeout: float, name: str,
+                 limited: bool) -> Any:
+        started = time.perf_counter()
+        try:
+            resp = self._session().get(endpoint.base_url + path, params=params, timeout=timeout)
+        except requests.Timeout as e:
+            raise _Failure("timeout", f"{timeout:.1f} sn zaman aşımı", limited=limited) from e
+        except requests.RequestException as e:
+            raise _Failure("error", str(e)) from e
+        elapsed = time.perf_counter() - started
+        http_seconds.observe(elapsed, self.target, name)
+        if resp.status_code == 429 or resp.status_code >= 500:
+            raise _Failure(f"http_{resp.status_code}", f"HTTP {resp.status_code}")
+        endpoint.latencies.append(elapsed)
+        try:
+            data = resp.json()
+        except ValueError as e:
+            raise _Failure("bad_response", "JSON olmayan yanıt") from e
+        # 4xx (ör. bilinmeyen coin) adres sağlığını etkilemez
+        return resp.status_code, data
+
+    def get(self, path: str, params: Dict[str, Any], name: str = "candles") -> Union[dict, None]:
+        """JSON yanıtı döndürür; hata, açık devre veya dolan döngü süresinde None (sonuç metriklere yazılır)"""
+        budget = request_budget()
+        if budget is not None and budget < FETCH_MIN_BUDGET:
+            http_requests.inc(self.target, name, "deadline")
+            return None
+        timeout = self.timeout if budget is None else min(self.timeout, budget)
+        limited = timeout < self.timeout
+        deadline = time.monotonic() + timeout
+        candidates = self._candidates()
+        pending: Dict[Future, _Endpoint] = {}
+        primary: Union[Future, None] = None
+        primary_started = 0.0
+        hedge_sent = False
+
+        def launch(endpoint: _Endpoint) -> Union[Future, None]:
+            remaining = deadline - time.monotonic()
+            if remaining < FETCH_MIN_BUDGET / 2 or not endpoint.breaker.allow():
+                return None
+            future = self._executor.submit(self._attempt, endpoint, path, params, remaining, name, limited)
+            pending[future] = endpoint
+            return future
+
+        def launch_next() -> Union[Future, None]:
+            while candidates:
+                future = launch(candidates.pop(0))
+                if future is not None:
+                    return future
+            return None
+
+        primary, primary_started = launch_next(), time.monotonic()
+        if primary is None:
+            http_requests.inc(self.target, name, "circuit_open")
+            return None
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            wait_for = remaining
+            if self.hedge and not hedge_sent and primary in pending:
+                # Yedek istek: asıl isteğin adresinin gecikme yüzdeliği dolunca
+                hedge_at = primary_started + pending[primary].hedge_delay()
+                wait_for = min(remaining, max(0.0, hedge_at - time.monotonic()))
+            done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+            if not done:
+                if wait_for < remaining and not hedge_sent:
+                    hedge_sent = True
+                    endpoint = pending[primary]
+                    # Sağlıklı bir ayna varsa oraya, yoksa aynı adrese (yeni bağlantıyla)
+                    target = next((e for e in candidates if e.breaker.state == "closed"), endpoint)
+                    if target in candidates:
+                        candidates.remove(target)
+                    if launch(target) is not None:
+                        self.hedged += 1
+                        http_hedges.inc(self.target, "sent")
+                continue
+            for future in done:
+                endpoint = pending.pop(future)
+                try:
+                    status, data = future.result()
+                except Exception as e:
+                    http_requests.inc(self.target, name, self._record_failure(endpoint, e))
+                    logging.debug(f"⚠️ {endpoint.base_url}{path} {params}: {e}")
+                    if not pending:
+                        # Hızlı hata: sıradaki adresi dene (yeni asıl istek)
+                        primary, primary_started = launch_next(), time.monotonic()
+                    continue
+                endpoint.breaker.success()
+                http_requests.inc(self.target, name, "ok" if status < 400 else f"http_{status}")
+                if future is not primary:
+                    self.hedge_wins += 1
+                    http_hedges.inc(self.target, "won")
+                self._abandon(pending)
+                return data if status < 400 else None
+
+        self._abandon(pending)
+        http_requests.inc(self.target, name, "timeout" if pending else "failed")
+        return None
+
+    def _abandon(self, pending: Dict[Future, _Endpoint]):
+        # Kaybeden / süresi dolan istekler arka planda biter; sonuçları sadece devre kesiciye yazılır
+        for future, endpoint in pending.items():
+            future.add_done_callback(lambda f, endpoint=endpoint: self._late_result(f, endpoint))
+
+    def _late_result(self, future: Future, endpoint: _Endpoint):
+        try:
+            future.result()
+        except Exception as e:
+            self._record_failure(endpoint, e)
+            return
+        endpoint.breaker.success()
+
+    @staticmethod
+    def _record_failure(endpoint: _Endpoint, error: Exception) -> str:
+        """Hatayı devre kesiciye yazar, metrik sonucunu döndürür; yarı açık deneme her durumda bırakılır"""
+        if isinstance(error, _Failure) and error.limited:
+            endpoint.breaker.release()
+            return error.result
+        if not isinstance(error, _Failure):
+            logging.warning(f"⚠️ {endpoint.base_url} isteğinde beklenmeyen hata: {error!r}")
+        endpoint.breaker.failure()
+        return error.result if isinstance(error, _Failure) else "error"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "endpoints": {endpoint.base_url: {"state": endpoint.breaker.state,
+                                              "hedge_delay": round(endpoint.hedge_delay(), 3)}
+                          for endpoint in self.endpoints},
+        }
+
+
+# Süreç genelinde paylaşılan Bitget istemcisi
+bitget = MarketDataClient()
+
+
+def _circuit_values() -> Dict[Tuple[str, str], float]:
+    return {(bitget.target, endpoint.base_url): float(endpoint.breaker.state != "closed") for endpoint in bitget.endpoints}
+
+
+circuit_open.callback = _circuit_values
@@ -0,0 +1,295 @@
+import argparse
+import atexit
+import json
+import logging
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Union
+
+# 🗄️ Sinyal geçmişi veritabanı ayarları
+HISTORY_PATH = os.getenv("SIGNAL_HISTORY_PATH") or "temp/signal_history.db"
+HISTORY_BATCH_SIZE = 500  # tek işlemde (transaction) en fazla bu kadar kayıt yazılır
+HISTORY_FLUSH_INTERVAL = 1.0  # sn: kuyruktaki kayıtlar en geç bu aralıkla yazılır
+HISTORY_BUSY_TIMEOUT = 5.0  # sn: başka süreç yazarken (ör. shard worker'ları) bekleme
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    strategy TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    side TEXT NOT NULL,
+    price REAL,
+    tp REAL,
+    sl REAL,
+    bar_time TEXT,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS signals_strategy_symbol_ts ON signals (strategy, symbol, ts);
+CREATE INDEX IF NOT EXISTS signals_symbol_ts ON signals (symbol, ts);
+CREATE INDEX IF NOT EXISTS signals_ts ON signals (ts);
+"""
+
+_INSERT = ("INSERT INTO signals (ts, strategy, symbol, side, price, tp, sl, bar_time, details) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+_STOP = object()
+
+
+def _float(value: Any) -> Union[float, None]:
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _clean(details: Dict[str, Any]) -> Dict[str, Any]:
+    # NaN/inf geçerli JSON değil (SQLite json_extract okuyamaz)
+    return {key: None if isinstance(value, float) and not math.isfinite(value) else value for key, value in details.items()}
+
+
+class SignalHistory:
+    """
+    Gönderilen sinyallerin (detaylar, TP/SL dahil) SQLite geçmişi.
+    record() kaydı sadece kuyruğa bırakır (event loop'u bekletmez); "history-writer" thread'i kuyruğu
+    HISTORY_BATCH_SIZE'lık tek işlemlerle yazar. Veritabanı WAL modunda: okumalar yazmayı beklemez,
+    aynı dosyaya birden fazla süreç (shard worker'ları) yazabilir.
+    Sorgular (recent, frequency, coin_stats) thread başına ayrı okuma bağlantısı kullanır.
+    """
+
+    def __init__(self, path: Union[str, None] = HISTORY_PATH, batch_size: int = HISTORY_BATCH_SIZE,
+                 flush_interval: float = HISTORY_FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: Union[threading.Thread, None] = None
+        self._pid = 0  # fork ile oluşan alt süreçte yazıcı thread'i yoktur, yeniden başlatılır
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pending = 0
+        self._idle = threading.Condition(self._lock)
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+
+    # --------------------------
+    # Bağlantı
+    # --------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=HISTORY_BUSY_TIMEOUT, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # WAL ile NORMAL: işlem başına fsync yok, çökmede sadece son işlemler kaybolabilir (veritabanı bozulmaz)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(_SCHEMA)
+        return connection
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None or getattr(self._local, "pid", None) != os.getpid():
+            connection = self._local.connection = self._connect()
+            self._local.pid = os.getpid()
+        return connection
+
+    # --------------------------
+    # Yazma
+    # --------------------------
+
+    def record(self, strategy: str, symbol: str, side: str, price: Any = None, tp: Any = None, sl: Any = None,
+               bar_time: Any = None, details: Union[Dict[str, Any], None] = None, ts: Union[float, None] = None):
+        """Sinyali yazma kuyruğuna ekler (O(1), disk erişimi yok)"""
+        if not self.path:
+            return
+        if hasattr(bar_time, "isoformat"):
+            bar_time = bar_time.isoformat()
+        row = (ts or time.time(), strategy, symbol, side, _float(price), _float(tp), _float(sl),
+               None if bar_time is None else str(bar_time),
+               json.dumps(_clean(details), default=str) if details else None)
+        self._ensure_writer()
+        with self._lock:
+            self._pending += 1
+        self._queue.put(row)
+
+    def _ensure_writer(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                # Fork öncesi kuyrukta kalanlar üst sürece aittir
+                self._queue = queue.SimpleQueue()
+                self._pending = 0
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        connection = self._connect()
+        rows: List[tuple] = []
+        stop = False
+        while not stop:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            # Kuyrukta biriken her şeyi (en fazla batch_size) tek işlemde yaz
+            while True:
+                if item is _STOP:
+                    stop = True
+                else:
+                    rows.append(item)
+                if stop or len(rows) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if rows:
+                self._write(connection, rows)
+                rows = []
+        connection.close()
+
+    def _write(self, connection: sqlite3.Connection, rows: List[tuple]):
+        try:
+            with connection:
+                connection.execute("BEGIN")
+                connection.executemany(_INSERT, rows)
+            self.written += len(rows)
+            self.batches += 1
+        except sqlite3.Error as e:
+            self.errors += 1
+            logging.warning(f"⚠️ Sinyal geçmişi yazılamadı ({len(rows)} kayıt): {e}")
+        with self._lock:
+            self._pending -= len(rows)
+            if self._pending <= 0:
+                self._idle.notify_all()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Kuyruktaki kayıtlar yazılana kadar bekler (testler ve kapanış için)"""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._pending > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def close(self):
+        """Kalan kayıtları yazar ve yazıcı thread'ini durdurur"""
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout=10)
+        self._thread = None
+
+    # --------------------------
+    # Sorgular
+    # --------------------------
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        cursor = self._reader().execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _where(strategy: Union[str, None], symbol: Union[str, None], since: Union[float, None]) -> tuple:
+        clauses, params = [], []
+        for column, value in (("strategy", strategy), ("symbol", symbol)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", tuple(params)
+
+    def recent(self, limit: int = 20, strategy: Union[str, None] = None, symbol: Union[str, None] = None,
+               since: Union[float, None] = None) -> List[Dict[str, Any]]:
+        """Son sinyaller (yeniden eskiye); details dict olarak döner"""
+        where, params = self._where(strategy, symbol, since)
+        rows = self._query(f"SELECT * FROM signals{where} ORDER BY ts DESC LIMIT ?", params + (limit,))
+        for row in rows:
+            row["details"] = json.loads(row["details"]) if row["details"] else {}
+        return rows
+
+    def frequency(self, bucket: float = 3600, strategy: Union[str, None] = None, symbol: Union[str, None] = None,
+                  since: Union[float, None] = None) -> List[Dict[str, Any]]:
+        """Zaman dilimi (bucket sn) ve strateji başına sinyal sayısı: [{"bucket": başlangıç ts, "strategy", "count"}]"""
+        where, params = self._where(strategy, symbol, since)
+        return self._query(
+            f"SELECT CAST(ts / ? AS INTEGER) * ? AS bucket, strategy, COUNT(*) AS count FROM signals{where} "
+            f"GROUP BY bucket, strategy ORDER BY bucket, strategy", (bucket, bucket) + params)
+
+    def coin_stats(self, strategy: Union[str, None] = None, since: Union[float, None] = None,
+                   limit: int = 50) -> List[Dict[str, Any]]:
+        """Coin başına sinyal sayısı, LONG/SHORT dağılımı, son sinyal ve ortalama RSI/ADX/hacim artışı"""
+        where, params = self._where(strategy, None, since)
+        return self._query(
+            "SELECT symbol, COUNT(*) AS count, SUM(side = 'LONG') AS longs, SUM(side = 'SHORT') AS shorts, "
+            "MAX(ts) AS last_ts, AVG(json_extract(details, '$.rsi')) AS avg_rsi, "
+            "AVG(json_extract(details, '$.adx')) AS avg_adx, AVG(json_extract(details, '$.vol_pct')) AS avg_vol_pct "
+            f"FROM signals{where} GROUP BY symbol ORDER BY count DESC, symbol LIMIT ?", params + (limit,))
+
+    def stats(self) -> Dict[str, int]:
+        return {"written": self.written, "batches": self.batches, "pending": self._pending, "errors": self.errors}
+
+
+# Süreç genelinde paylaşılan geçmiş
+signal_history = SignalHistory()
+
+
+def _format_time(ts: Union[float, None]) -> str:
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(ts)) if ts else "-"
+
+
+def main():
+    """
+    python -m lib.history recent --strategy no-risk --limit 20
+    python -m lib.history stats --days 7
+    python -m lib.history frequency --bucket 86400
+    """
+    parser = argparse.ArgumentParser(description="Sinyal geçmişi sorguları")
+    parser.add_argument("query", choices=["recent", "stats", "frequency"])
+    parser.add_argument("--strategy", default=None)
+    parser.add_argument("--symbol", default=None)
+    parser.add_argument("--days", type=float, default=None, help="sadece son N gün")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--bucket", type=float, default=3600, help="frequency: zaman dilimi (sn)")
+    parser.add_argument("--path", default=HISTORY_PATH)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"❌ Sinyal geçmişi bulunamadı: {args.path}")
+        return
+    history = SignalHistory(args.path)
+    since = time.time() - args.days * 86400 if args.days else None
+
+    if args.query == "recent":
+        for row in history.recent(args.limit, args.strategy, args.symbol, since):
+            details = row["details"]
+            print(f"{_format_time(row['ts'])} {row['strategy']:<32} {row['symbol']:<12} {row['side']:<5} "
+                  f"fiyat {row['price']} TP {row['tp']} SL {row['sl']} | RSI {details.get('rsi')} "
+                  f"ADX {details.get('adx')} MACD {details.get('macd_cross')} Hacim {details.get('vol_pct')}")
+    elif args.query == "stats":
+        for row in history.coin_stats(args.strategy, since, args.limit):
+            averages = " ".join(f"{name} {row[key]:.1f}" for name, key in
+                                (("RSI", "avg_rsi"), ("ADX", "avg_adx"), ("Hacim", "avg_vol_pct")) if row[key] is not None)
+            print(f"{row['symbol']:<12} {row['count']:>5} sinyal ({row['longs']} LONG / {row['shorts']} SHORT) | "
+                  f"son {_format_time(row['last_ts'])} | {averages}")
+    else:
+        for row in history.frequency(args.bucket, args.strategy, args.symbol, since):
+            print(f"{_format_time(row['bucket'])} {row['strategy']:<32} {row['count']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime
+from typing import Any, Union
+
+# 📝 Log ayarları (ortam değişkenleri setup_logging() çağrıldığında okunur: .env önce yüklenmiş olmalı)
+LOG_TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Yapılandırılmış olaylar (coin, aşama, süre, indikatör değerleri) bu logger'a yazılır.
+# JSON formatında varsayılan olarak açık, metin formatında LOG_EVENTS=1 ile açılır.
+events = logging.getLogger("bot.events")
+
+# LogRecord'un kendi alanları: JSON çıktısında bunların dışındaki extra alanlar yazılır
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener: Union[logging.handlers.QueueListener, None] = None
+_listener_pid = 0  # fork ile oluşan alt süreçte yazıcı thread'i yoktur, yeniden kurulur
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Kaydı biçimlendirmeden kuyruğa bırakır: mesaj birleştirme ve yazma arka plan thread'inde yapılır.
+    Kuyruk süreç içi olduğundan kaydın kopyalanması / pickle edilmesi gerekmez.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Satır başına bir JSON nesnesi: ts, level, logger, msg ve extra ile verilen alanlar"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage().strip(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Mevcut metin formatı; yapılandırılmış olaylarda alanlar mesajın sonuna eklenir"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        if record.name == events.name:
+            fields = " ".join(f"{key}={value}" for key, value in vars(record).items()
+                              if key not in _RECORD_FIELDS and not key.startswith("_"))
+            text = f"{text} {fields}"
+        return text
+
+
+def _flag(name: str) -> Union[bool, None]:
+    value = os.getenv(name, "").strip().lower()
+    if not value:
+        return None
+    return value in ("1", "true", "yes")
+
+
+def setup_logging(level: Union[int, str, None] = None, fmt: Union[str, None] = None, path: Union[str, None] = None,
+                  prefix: str = "") -> bool:
+    """
+    Kök logger'ı kuyruk üzerinden arka plan yazıcısına bağlar (logging.basicConfig yerine).
+    Event loop thread'inde sadece kayıt oluşturulup kuyruğa konur; biçimlendirme ve stdout/dosya
+    yazımı "log-writer" thread'inde yapılır.
+
+    level: LOG_LEVEL (varsayılan INFO), fmt: LOG_FORMAT ("text" veya "json"), path: LOG_PATH (ek olarak dosyaya yaz),
+    prefix: metin formatında mesajın önüne eklenir (ör. shard worker kimliği).
+    Süreçte bir kez kurulur; sonraki çağrılar (ör. runner'ın yüklediği stratejiler) bir şey yapmaz.
+    """
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        return False
+    level = level or os.getenv("LOG_LEVEL") or "INFO"
+    fmt = (fmt or os.getenv("LOG_FORMAT") or "text").strip().lower()
+    path = path or os.getenv("LOG_PATH") or None
+
+    if fmt == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = TextFormatter(LOG_TEXT_FORMAT.replace("%(message)s", f"{prefix}%(message)s"), LOG_DATE_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if path:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handlers.append(logging.FileHandler(path, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # Formatlarda kullanılmayan alanlar: çağıran fonksiyon/satır araması (findCaller) kayıt başına en pahalı adım
+    logging._srcfile = None
+    logging.logThreads = logging.logProcesses = logging.logMultiprocessing = False
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(records))
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    enabled = _flag("LOG_EVENTS")
+    events.setLevel(logging.INFO if (enabled if enabled is not None else fmt == "json") else logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener_pid = os.getpid()
+    _listener.start()
+    _listener._thread.name = "log-writer"
+    atexit.register(stop_logging)
+    return True
+
+
+def stop_logging():
+    """Kuyrukta kalan kayıtları yazar ve arka plan thread'ini durdurur"""
+    global _listener
+    if _listener is None or _listener_pid != os.getpid():
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, _DeferredQueueHandler):
+            root.removeHandler(handler)
+    for handler in listener.handlers:
+        root.addHandler(handler)
+        handler.flush()
+
+
+def log_event(event: str, **fields: Any):
+    """
+    Yapılandırılmış olay kaydı: log_event("analyze", symbol="BTCUSDT", duration=0.012, rsi=41.2).
+    Olaylar kapalıysa kayıt oluşturulmaz (tek seviye kontrolü).
+    """
+    if events.isEnabledFor(logging.INFO):
+        events.info(event, extra={"event": event, **fields})
+
@@ -0,0 +1,262 @@
+import atexit
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+# 📈 Metrik ayarları
+METRICS_HOST = os.getenv("METRICS_HOST") or "127.0.0.1"
+METRICS_PORT = int(os.getenv("METRICS_PORT") or 0)  # 0: HTTP endpoint kapalı
+METRICS_PATH = os.getenv("METRICS_PATH") or ""  # boş: dosyaya yazma kapalı
+METRICS_DUMP_INTERVAL = 15.0  # sn
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CYCLE_BUCKETS = (1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Sadece artan sayaç. Etiket değerleri sırayla verilir: requests.inc("bitget", "ok")"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in items]
+
+
+class Gauge(Counter):
+    """Anlık değer. callback verilirse değerler her okumada ondan alınır ({etiketler: değer})"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 callback: Union[Callable[[], Dict[LabelValues, float]], None] = None):
+        super().__init__(name, help, labelnames)
+        self.callback = callback
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+    def collect(self) -> List[str]:
+        if self.callback is not None:
+            try:
+                values = self.callback()
+            except Exception as e:
+                logging.debug(f"⚠️ {self.name} okunamadı: {e}")
+                return []
+            with self._lock:
+                self._values = dict(values)
+        return super().collect()
+
+
+class Histogram:
+    """Gecikme histogramı: kova sayıları, toplam ve adet (Prometheus formatında kümülatif yazılır)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # etiketler -> [kova sayıları (+Inf dahil), toplam, adet]
+        self._values: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, *labels: str):
+        """with histogram.time("no-risk"): ... bloğun süresini kaydeder"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def count(self, *labels: str) -> int:
+        entry = self._values.get(labels)
+        return entry[2] if entry else 0
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(entry[0]), entry[1], entry[2]) for labels, entry in self._values.items()]
+        lines = []
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    """Metrikleri toplar ve Prometheus metin formatında yazar"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Union[Counter, Gauge, Histogram]] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = (), callback=None) -> Gauge:
+        return self.register(Gauge(name, help, labelnames, callback))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Strateji işlem hattı (lib/pipeline.py): fetch (get_candles), analyze (calculate_signal), render (get_chart), send
+stage_seconds = registry.histogram("bot_stage_seconds", "Aşama süresi (sn)", ("strategy", "stage", "symbol"))
+stage_items = registry.counter("bot_stage_items_total", "Aşamadan geçen öğe sayısı", ("strategy", "stage", "result"))
+cycle_seconds = registry.histogram("bot_cycle_seconds", "Kontrol döngüsü süresi (sn)", ("strategy",), buckets=CYCLE_BUCKETS)
+cycle_symbols = registry.counter("bot_cycle_symbols_total", "Döngülerde kontrol edilen coin sayısı", ("strategy",))
+
+# Döngü bekçisi (lib/watchdog.py): periyot bütçesi, başlangıç kayması, uyarılar
+cycle_budget = registry.gauge("bot_cycle_budget_ratio", "Son döngünün iş süresi / periyot", ("strategy",))
+cycle_late_seconds = registry.gauge("bot_cycle_late_seconds", "Son döngünün planlanandan gecikmesi (sn)", ("strategy",))
+watchdog_alerts = registry.counter("bot_watchdog_alerts_total", "Döngü bekçisi uyarıları", ("strategy", "kind"))
+
+# Dış HTTP istekleri (Bitget mum verisi, Telegram gönderimi)
+http_seconds = registry.histogram("bot_http_request_seconds", "HTTP istek süresi (sn)", ("target", "endpoint"))
+http_requests = registry.counter("bot_http_requests_total", "HTTP istek sonuçları", ("target", "endpoint", "result"))
+http_retries = registry.counter("bot_http_retries_total", "Tekrar denenen HTTP istekleri", ("target", "reason"))
+http_hedges = registry.counter("bot_http_hedged_total", "Gecikme yüzdeliği aşılınca gönderilen yedek istekler (sent / won)",
+                               ("target", "result"))
+circuit_open = registry.gauge("bot_circuit_open", "Devre kesici açık mı (1: adrese istek atılmıyor)", ("target", "endpoint"))
+
+
+# --------------------------
+# Dışa aktarma
+# --------------------------
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def dump(path: Union[str, None] = None):
+    """Metrikleri dosyaya atomik olarak yazar (ör. node_exporter textfile collector için)"""
+    path = path or METRICS_PATH
+    if not path:
+        return
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(registry.render())
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logging.warning(f"⚠️ Metrikler dosyaya yazılamadı: {e}")
+
+
+_exporter_started = False
+
+
+def start_exporter(port: int = METRICS_PORT, host: str = METRICS_HOST, path: str = METRICS_PATH,
+                   interval: float = METRICS_DUMP_INTERVAL):
+    """
+    METRICS_PORT verildiyse /metrics endpoint'ini, METRICS_PATH verildiyse periyodik dosya yazımını başlatır.
+    İkisi de arka plan thread'inde çalışır; birden fazla çağrılması sorun değildir.
+    """
+    global _exporter_started
+    if _exporter_started:
+        return
+    _exporter_started = True
+
+    if port:
+        try:
+            server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+            logging.info(f"📈 Metrikler: http://{host}:{port}/metrics")
+        except OSError as e:
+            logging.error(f"❌ Metrik endpoint'i başlatılamadı ({host}:{port}): {e}")
+
+    if path:
+        def loop():
+            while True:
+                time.sleep(interval)
+                dump(path)
+
+        threading.Thread(target=loop, name="metrics-dump", daemon=True).start()
+        atexit.register(dump, path)
+        logging.info(f"📈 Metrikler {interval:.0f} sn'de bir dosyaya yazılıyor: {path}")
+
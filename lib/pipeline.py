@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Union
+
+from lib.log import log_event
+from lib.metrics import cycle_seconds, cycle_symbols, stage_items, stage_seconds
+
+# 🏭 Aşamalı işlem hattı ayarları
+QUEUE_SIZE = 8  # aşamalar arası kuyruk kapasitesi (dolunca önceki aşama bekler: backpressure)
+LATENCY_HISTORY = 500
+
+_DONE = object()  # kuyruğu kapatan işaret
+
+
+@dataclass(eq=False)
+class Stage:
+    """
+    İşlem hattının bir aşaması.
+    func(item) bir sonraki aşamaya gidecek öğeyi döndürür; None dönerse öğe hattan çıkar.
+    func async olabilir; threaded=True ise senkron func thread'de çalıştırılır (event loop bloklanmaz).
+    """
+    name: str
+    func: Callable[[Any], Any]
+    concurrency: int = 1
+    threaded: bool = False
+
+    # Metrikler
+    processed: int = 0
+    dropped: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    wait_seconds: float = 0.0  # çıktıyı bir sonraki kuyruğa koymak için beklenen süre (backpressure)
+    max_queue: int = 0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_HISTORY))
+
+    async def call(self, item: Any) -> Any:
+        if asyncio.iscoroutinefunction(self.func):
+            return await self.func(item)
+        if self.threaded:
+            return await asyncio.to_thread(self.func, item)
+        return self.func(item)
+
+    def reset(self):
+        self.processed = self.dropped = self.failed = self.max_queue = 0
+        self.busy_seconds = self.wait_seconds = 0.0
+        self.latencies.clear()
+
+    def metrics(self, elapsed: float) -> Dict[str, Any]:
+        values = sorted(self.latencies)
+        return {
+            "concurrency": self.concurrency,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "busy_seconds": self.busy_seconds,
+            "wait_seconds": self.wait_seconds,
+            # Worker başına doluluk: 1'e yakın olan aşama darboğazdır
+            "utilization": self.busy_seconds / (elapsed * self.concurrency) if elapsed else 0.0,
+            "max_queue": self.max_queue,
+            "latency_p50": values[len(values) // 2] if values else None,
+            "latency_p95": values[min(len(values) - 1, int(len(values) * 0.95))] if values else None,
+        }
+
+
+def _label(item: Any) -> str:
+    if isinstance(item, dict):
+        return str(item.get("coin", "?"))
+    return str(item)
+
+
+class Pipeline:
+    """
+    Sınırlı asyncio kuyruklarıyla bağlanmış eşzamanlı aşamalar (ör. fetch → compute → render → send).
+    Her aşamanın kendi eşzamanlılık limiti vardır; toplam süre aşamaların toplamına değil
+    en yavaş aşamaya yaklaşır. Bir öğedeki hata sadece o öğeyi düşürür.
+    name verilirse aşama/döngü süreleri bu adla lib.metrics'e kaydedilir (strateji adı).
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = QUEUE_SIZE, name: str = ""):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.name = name
+        self.elapsed = 0.0
+        # Son çalıştırmada öğe (coin) -> aşama -> harcanan süre (sn); döngü bekçisi kullanır
+        self.item_seconds: Dict[str, Dict[str, float]] = {}
+
+    async def run(self, items: Iterable[Any]) -> float:
+        """Tüm öğeleri hattan geçirir, bitince toplam süreyi (sn) döndürür"""
+        for stage in self.stages:
+            stage.reset()
+        self.item_seconds = {}
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        start = time.perf_counter()
+
+        workers = []
+        for index, stage in enumerate(self.stages):
+            next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            output = queues[index + 1] if next_stage is not None else None
+            workers.append([asyncio.create_task(self._worker(stage, queues[index], output, next_stage))
+                            for _ in range(stage.concurrency)])
+        count = 0
+        try:
+            for item in items:
+                count += 1
+                await queues[0].put(item)
+                self.stages[0].max_queue = max(self.stages[0].max_queue, queues[0].qsize())
+            # Aşamaları sırayla kapat: önceki aşamanın tüm worker'ları bitince bir sonrakine işaret gönder
+            for index, stage in enumerate(self.stages):
+                for _ in range(stage.concurrency):
+                    await queues[index].put(_DONE)
+                await asyncio.gather(*workers[index])
+        finally:
+            for task in (task for group in workers for task in group):
+                task.cancel()
+        self.elapsed = time.perf_counter() - start
+        if self.name:
+            cycle_seconds.observe(self.elapsed, self.name)
+            cycle_symbols.inc(self.name, amount=count)
+        return self.elapsed
+
+    async def _worker(self, stage: Stage, source: asyncio.Queue, output: Union[asyncio.Queue, None],
+                      next_stage: Union[Stage, None]):
+        while True:
+            item = await source.get()
+            if item is _DONE:
+                return
+            started = time.perf_counter()
+            try:
+                result = await stage.call(item)
+            except Exception as e:
+                stage.failed += 1
+                stage_items.inc(self.name, stage.name, "error")
+                logging.error(f"❌ {_label(item)} {stage.name} hatası: {e}")
+                continue
+            finally:
+                duration = time.perf_counter() - started
+                stage.busy_seconds += duration
+                stage.latencies.append(duration)
+                label = _label(item)
+                stage_seconds.observe(duration, self.name, stage.name, label)
+                spent = self.item_seconds.setdefault(label, {})
+                spent[stage.name] = spent.get(stage.name, 0.0) + duration
+                log_event("stage", strategy=self.name, stage=stage.name, symbol=label, duration=round(duration, 6))
+            if result is None:
+                stage.dropped += 1
+                stage_items.inc(self.name, stage.name, "dropped")
+                continue
+            stage.processed += 1
+            stage_items.inc(self.name, stage.name, "ok")
+            if output is not None:
+                waited = time.perf_counter()
+                await output.put(result)
+                stage.wait_seconds += time.perf_counter() - waited
+                next_stage.max_queue = max(next_stage.max_queue, output.qsize())
+
+    def metrics(self) -> Dict[str, Any]:
+        """Son çalıştırmanın aşama bazında metrikleri"""
+        return {
+            "elapsed": self.elapsed,
+            "stages": {stage.name: stage.metrics(self.elapsed) for stage in self.stages},
+        }
+
+    def log_metrics(self):
+        parts = []
+        for name, values in self.metrics()["stages"].items():
+            parts.append(f"{name} {values['processed']}/{values['processed'] + values['dropped'] + values['failed']} "
+                         f"doluluk %{values['utilization'] * 100:.0f}")
+        logging.info(f"🏭 İşlem hattı {self.elapsed:.1f} sn | " + " | ".join(parts))
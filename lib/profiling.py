@@ -0,0 +1,291 @@
+import asyncio
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Dict, List, Union
+
+# 🔬 Canlı profil alma ayarları
+PROFILE_DIR = os.getenv("PROFILE_DIR") or "temp/profiles"
+PROFILE_CYCLES = int(os.getenv("PROFILE_CYCLES") or 0)  # başlangıçta bu kadar döngü profillenir (0: kapalı)
+PROFILE_MODE = os.getenv("PROFILE_MODE") or "cprofile,tracemalloc"  # cprofile, sample, tracemalloc (virgülle)
+PROFILE_SIGNAL_CYCLES = 3  # SIGUSR1 ile profillenecek döngü sayısı
+PROFILE_SAMPLE_INTERVAL = 0.005  # sn: örnekleyici aralığı
+PROFILE_TOP = 10  # özette gösterilen fonksiyon sayısı
+PROFILE_COMMANDS = os.getenv("TELEGRAM_COMMANDS", "").strip().lower() in ("1", "true", "yes")
+MODES = ("cprofile", "sample", "tracemalloc")
+
+
+def parse_modes(value: str) -> List[str]:
+    modes = [mode.strip().lower() for mode in value.split(",") if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown or not modes:
+        raise ValueError(f"Geçersiz profil modu: {value} (seçenekler: {', '.join(MODES)})")
+    return modes
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _Sampler:
+    """
+    Tüm thread'lerin yığınlarını aralıklarla örnekleyen basit profilleyici.
+    cProfile'dan farklı olarak asyncio.to_thread ile çalışan işler (mum çekme, grafik çizimi) de görünür.
+    """
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """flamegraph.pl / speedscope ile açılabilen 'yığın adet' satırları"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+    def top(self, limit: int) -> List[str]:
+        # Bekleyen (boşta) thread'ler hariç, en çok yığının tepesinde görülen fonksiyonlar
+        idle = ("wait (threading.py", "select (selectors.py", "_worker (thread.py", "get (queue.py")
+        own = Counter()
+        for stack, count in self.stacks.items():
+            leaf = stack.rsplit(";", 1)[-1]
+            if not leaf.startswith(idle):
+                own[leaf] += count
+        total = sum(own.values()) or 1
+        return [f"{count / total * 100:5.1f}% {label}" for label, count in own.most_common(limit)]
+
+
+class _Session:
+    """Tek bir döngünün profil kaydı"""
+
+    def __init__(self, modes: List[str]):
+        self.modes = modes
+        self.profile = cProfile.Profile() if "cprofile" in modes else None
+        self.sampler = _Sampler() if "sample" in modes else None
+        self.snapshot = None
+        self._started_tracemalloc = False
+        self.started = 0.0
+        self.elapsed = 0.0
+
+    def start(self):
+        if "tracemalloc" in self.modes and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracemalloc = True
+        if self.sampler is not None:
+            self.sampler.start()
+        self.started = time.perf_counter()
+        if self.profile is not None:
+            self.profile.enable()
+
+    def stop(self):
+        if self.profile is not None:
+            self.profile.disable()
+        self.elapsed = time.perf_counter() - self.started
+        if self.sampler is not None:
+            self.sampler.stop()
+        if "tracemalloc" in self.modes and tracemalloc.is_tracing():
+            self.snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+    def write(self, prefix: str, top: int) -> Dict[str, Union[str, List[str]]]:
+        """Dosyaları yazar; özet satırlarını ve dosya yollarını döndürür"""
+        files = []
+        summary = []
+        if self.profile is not None:
+            self.profile.dump_stats(f"{prefix}.prof")
+            files.append(f"{prefix}.prof")
+            stream = io.StringIO()
+            stats = pstats.Stats(self.profile, stream=stream).sort_stats("cumulative")
+            stats.print_stats(top * 3)
+            with open(f"{prefix}.prof.txt", "w", encoding="utf-8") as f:
+                f.write(stream.getvalue())
+            files.append(f"{prefix}.prof.txt")
+            # Özet: kendi süresi en yüksek fonksiyonlar (await'ler cumulative'i şişirir)
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+            summary.append("⏱️ cProfile (kendi süresi, event loop thread'i):")
+            for (filename, line, name), (_, calls, own, cumulative, _) in rows:
+                summary.append(f"  {own * 1000:7.0f} ms | {calls:>6}x | {name} ({os.path.basename(filename)}:{line})")
+        if self.sampler is not None:
+            with open(f"{prefix}.samples.txt", "w", encoding="utf-8") as f:
+                f.write(self.sampler.collapsed())
+            files.append(f"{prefix}.samples.txt")
+            summary.append(f"🧵 Örnekleme ({self.sampler.samples} örnek, tüm thread'ler):")
+            summary.extend(f"  {line}" for line in self.sampler.top(top))
+        if self.snapshot is not None:
+            self.snapshot.dump(f"{prefix}.tracemalloc")
+            files.append(f"{prefix}.tracemalloc")
+            stats = self.snapshot.statistics("lineno")
+            with open(f"{prefix}.tracemalloc.txt", "w", encoding="utf-8") as f:
+                f.write("\n".join(str(stat) for stat in stats[:top * 5]) + "\n")
+            files.append(f"{prefix}.tracemalloc.txt")
+            total = sum(stat.size for stat in stats)
+            summary.append(f"🧠 tracemalloc (döngü sonunda ayrılmış {total / 1024 / 1024:.1f} MB):")
+            for stat in stats[:max(3, top // 2)]:
+                frame = stat.traceback[0]
+                summary.append(f"  {stat.size / 1024:7.0f} KB | {os.path.basename(frame.filename)}:{frame.lineno}")
+        return {"files": files, "summary": summary}
+
+
+class CycleProfiler:
+    """
+    Çalışan stratejinin sonraki N döngüsünü profiller (cProfile, örnekleme, tracemalloc).
+    Açma yolları: PROFILE_CYCLES ortam değişkeni, SIGUSR1 sinyali veya /profile bot komutu.
+    Her döngü için temp/profiles altına zaman damgalı dosyalar yazılır ve log chat'e kısa özet gönderilir.
+    Kapalıyken döngü başına maliyeti tek bir sayı kontrolüdür.
+    """
+
+    def __init__(self, directory: str = PROFILE_DIR, top: int = PROFILE_TOP):
+        self.directory = directory
+        self.top = top
+        self.remaining = 0
+        self.modes: List[str] = parse_modes(PROFILE_MODE)
+        self.strategy: Union[str, None] = None  # sadece bu strateji (None: ilk döngüsü başlayan)
+        self.active: Union[str, None] = None
+        self._installed = False
+        self._profiled = 0  # dosya adlarında döngü sırası
+
+    def request(self, cycles: int = PROFILE_SIGNAL_CYCLES, modes: Union[str, None] = None,
+                strategy: Union[str, None] = None) -> str:
+        """Sonraki `cycles` döngüyü profillemeyi başlatır; durum mesajı döndürür"""
+        if modes:
+            self.modes = parse_modes(modes)
+        self.remaining = max(0, cycles)
+        self.strategy = strategy
+        message = (f"🔬 Profil alma açıldı: sonraki {self.remaining} döngü ({', '.join(self.modes)})"
+                   + (f", strateji: {strategy}" if strategy else ""))
+        logging.info(message)
+        return message
+
+    @asynccontextmanager
+    async def cycle(self, strategy: str):
+        """Döngüyü saran bağlam: profil istenmişse kaydı başlatır, bitince dosyaları yazar"""
+        if not self.remaining or self.active is not None or (self.strategy and self.strategy != strategy):
+            yield
+            return
+        self.active = strategy
+        session = _Session(self.modes)
+        session.start()
+        try:
+            yield
+        finally:
+            session.stop()
+            self.remaining -= 1
+            self.active = None
+            self._report(strategy, session)
+
+    def profiled(self, strategy: str):
+        """run_cycle dekoratörü: @profiler.profiled(strategy_name)"""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                async with self.cycle(strategy):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _report(self, strategy: str, session: _Session):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            self._profiled += 1
+            prefix = os.path.join(self.directory, f"{stamp}_{strategy.replace(' ', '-')}_{self._profiled}")
+            result = session.write(prefix, self.top)
+        except Exception as e:
+            logging.error(f"❌ Profil dosyaları yazılamadı: {e}")
+            return
+        text = "\n".join([
+            f"🔬 {strategy} döngü profili ({session.elapsed:.1f} sn, kalan {self.remaining} döngü)",
+            "━━━━━━━━━━━━━━━━━",
+            *result["summary"],
+            "",
+            f"📁 {', '.join(os.path.basename(path) for path in result['files'])} ({self.directory})",
+        ])
+        logging.info(text)
+        try:
+            from lib.sms.sms import enqueue_message
+            enqueue_message(text=text[:4000], chat_types=["log"], priority="status")
+        except Exception as e:
+            logging.warning(f"⚠️ Profil özeti gönderilemedi: {e}")
+
+    def command(self, args: List[str]) -> str:
+        """/profile [döngü] [mod] [strateji] | /profile off"""
+        if args and args[0].lower() in ("off", "stop", "kapat"):
+            self.remaining = 0
+            return "🔬 Profil alma kapatıldı"
+        cycles = int(args[0]) if args else PROFILE_SIGNAL_CYCLES
+        modes = args[1] if len(args) > 1 else None
+        strategy = " ".join(args[2:]) or None
+        return self.request(cycles, modes, strategy)
+
+    def install(self):
+        """
+        Çalışan event loop içinden bir kez çağrılır: PROFILE_CYCLES'ı uygular, SIGUSR1'i dinler ve
+        TELEGRAM_COMMANDS=1 ise /profile komutunu açar.
+        """
+        if self._installed:
+            return
+        self._installed = True
+        if PROFILE_CYCLES:
+            self.request(PROFILE_CYCLES)
+
+        if hasattr(signal, "SIGUSR1"):
+            def on_signal(*_):
+                self.request(PROFILE_SIGNAL_CYCLES)
+            try:
+                asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, on_signal)
+            except (NotImplementedError, RuntimeError):
+                try:
+                    signal.signal(signal.SIGUSR1, on_signal)
+                except ValueError:
+                    pass
+
+        if PROFILE_COMMANDS and os.getenv("TELEGRAM_FORWARD_ONLY", "").strip().lower() not in ("1", "true", "yes"):
+            from lib.sms.commands import register_command, start_command_listener
+            register_command("profile", self.command)
+            start_command_listener()
+
+
+# Süreç genelinde paylaşılan profilleyici
+profiler = CycleProfiler()
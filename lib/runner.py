@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import importlib.util
+import logging
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import List, Union
+
+from dotenv import load_dotenv
+
+from lib.log import setup_logging
+
+STRATEGIES_DIR = Path(__file__).parent.parent / "strategies"
+
+# 🔁 Strateji görevi çökerse yeniden başlatma ayarları
+RESTART_DELAY = 5.0  # sn, her ardışık çökmede iki katına çıkar
+MAX_RESTART_DELAY = 300.0
+STABLE_SECONDS = 600.0  # bu kadar sorunsuz çalışan görevin bekleme süresi sıfırlanır
+
+
+def available_strategies() -> List[str]:
+    """strategies klasöründeki strateji adları"""
+    return sorted(file.stem for file in STRATEGIES_DIR.glob("*.py") if file.name != "__init__.py")
+
+
+def load_strategy(name: str) -> ModuleType:
+    """Strateji modülünü dosyadan yükler (main.py run_strategy ile aynı yöntem)"""
+    path = STRATEGIES_DIR / f"{name}.py"
+    if not path.exists():
+        raise ValueError(f"Strateji bulunamadı: {name} (seçenekler: {', '.join(available_strategies())})")
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not hasattr(module, "main"):
+        raise ValueError(f"{name} modülünde 'main()' fonksiyonu bulunamadı")
+    return module
+
+
+async def run_strategy_main(strategy_main):
+    """
+    Tek stratejiyi çalıştırır (python strategies/<ad>.py ve main.py menüsü). Kapanışın tek sahibi burasıdır
+    (runner'da run_strategies): strateji bitince veya iptal edilince (Ctrl+C / SIGTERM) Telegram kuyruğu
+    worker'lar durmadan boşaltılır, bağlantı kapatılır ve durum kaydedilir. Stratejiler iptali sadece yükseltir.
+    """
+    from lib.checkpoint import save_all
+    from lib.sms.sms import shutdown_bot
+    try:
+        await strategy_main()
+    finally:
+        await shutdown_bot()
+        save_all()
+
+
+async def supervise(name: str, module: ModuleType, max_restarts: Union[int, None] = None):
+    """
+    Stratejinin main() fonksiyonunu çalıştırır; hata ile biterse artan beklemeyle yeniden başlatır.
+    Normal biten (döngüsü olmayan) stratejiler yeniden başlatılmaz.
+    """
+    delay = RESTART_DELAY
+    restarts = 0
+    while True:
+        started = time.monotonic()
+        try:
+            if asyncio.iscoroutinefunction(module.main):
+                await module.main()
+            else:
+                await asyncio.to_thread(module.main)
+            logging.info(f"🏁 {name} tamamlandı")
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if time.monotonic() - started > STABLE_SECONDS:
+                delay = RESTART_DELAY
+            restarts += 1
+            if max_restarts is not None and restarts > max_restarts:
+                logging.error(f"❌ {name} {max_restarts} kez yeniden başlatıldı, durduruluyor: {e}")
+                return
+            logging.exception(f"❌ {name} çöktü: {e} - {delay:.0f} sn sonra yeniden başlatılacak ({restarts}. kez)")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RESTART_DELAY)
+
+
+async def run_strategies(names: List[str], max_restarts: Union[int, None] = None):
+    """
+    Stratejileri tek event loop'ta birlikte çalıştırır. Mum/indikatör önbelleği (lib.cache),
+    Telegram istemcisi ve gönderim kuyruğu (lib.sms.sms), sinyal deposu (lib.dedup) ve durum kaydı
+    (lib.checkpoint) ortaktır.
+    """
+    # lib.sms.sms import edilirken .env okunur ve bot yapılandırılır
+    from lib.cache import log_cache_stats
+    from lib.checkpoint import checkpointer, install_shutdown_handler, save_all
+    from lib.metrics import start_exporter
+    from lib.profiling import profiler
+    from lib.sms.sms import shutdown_bot, start_bot
+
+    modules = {name: load_strategy(name) for name in names}
+    logging.info(f"🚀 Birlikte çalışan stratejiler: {', '.join(modules)}")
+    install_shutdown_handler()
+    checkpointer.restore()
+    start_exporter()
+    profiler.install()
+    try:
+        await start_bot()
+    except Exception as e:
+        logging.error(f"❌ Telegram bağlantısı kurulamadı, gönderimde tekrar denenecek: {e}")
+
+    tasks = [asyncio.create_task(supervise(name, module, max_restarts), name=f"strategy-{name}")
+             for name, module in modules.items()]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        log_cache_stats()
+        await shutdown_bot()
+        save_all()
+
+
+def main():
+    """Menüsüz çalıştırıcı: `run no-risk no-risk-without-volume` veya `run --all`"""
+    parser = argparse.ArgumentParser(description="Birden fazla stratejiyi tek süreçte çalıştırır")
+    parser.add_argument("strategies", nargs="*", help=f"strateji adları ({', '.join(available_strategies())})")
+    parser.add_argument("--all", action="store_true", help="test hariç tüm stratejileri çalıştır")
+    parser.add_argument("--max-restarts", type=int, default=None, help="strateji başına en fazla yeniden başlatma")
+    args = parser.parse_args()
+
+    names = [name for name in available_strategies() if name != "test"] if args.all else args.strategies
+    if not names:
+        parser.error("en az bir strateji adı veya --all verin")
+
+    load_dotenv()
+    setup_logging()
+    try:
+        asyncio.run(run_strategies(names, max_restarts=args.max_restarts))
+    except KeyboardInterrupt:
+        logging.info("👋 Çıkılıyor...")
+
+
+if __name__ == "__main__":
+    main()
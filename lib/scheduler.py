@@ -0,0 +1,95 @@
+import time
+from typing import Dict, List, Union
+
+# ⏱️ Uyarlanabilir tarama ayarları
+MIN_POLL_SECONDS = 60  # sinyale çok yakın coinler en sık bu aralıkla kontrol edilir
+MAX_POLL_FACTOR = 2.0  # sinyalden uzak coinler en seyrek PERIOD_SECONDS * bu katsayı ile
+
+
+def threshold_distance(value: Union[float, None], threshold: float, below: bool, scale: float) -> float:
+    """
+    Değerin eşiğe uzaklığı, 0 (koşul sağlanıyor) ile 1 (scale kadar veya daha uzak) arasında.
+    below=True: koşul value < threshold, below=False: koşul value > threshold. Değer yoksa 1.
+    """
+    if value is None:
+        return 1.0
+    gap = value - threshold if below else threshold - value
+    return min(1.0, max(0.0, gap / scale))
+
+
+class AdaptiveScheduler:
+    """
+    Coin bazlı uyarlanabilir tarama: her coinin sinyale uzaklık puanına (0 = tetiklenmek üzere,
+    1 = çok uzak) göre bir sonraki kontrol zamanı belirlenir. Yakın coinler MIN_POLL_SECONDS'a kadar
+    sık, uzak coinler daha seyrek kontrol edilir. Toplam istek hızı sabit periyottaki bütçeyi
+    (len(symbols) / base_period) aşarsa tüm aralıklar orantılı olarak uzatılır.
+
+    symbols listesi referans olarak tutulur; yerinde değiştirilirse (ör. shard ataması) takip edilir.
+    """
+
+    def __init__(self, symbols: List[str], base_period: float, min_period: float = MIN_POLL_SECONDS,
+                 max_period: Union[float, None] = None, budget_per_period: Union[int, None] = None):
+        self.symbols = symbols
+        self.base_period = base_period
+        self.min_period = min(min_period, base_period)
+        self.max_period = max_period or base_period * MAX_POLL_FACTOR
+        self.budget_per_period = budget_per_period
+        self.scores: Dict[str, float] = {}
+        self.next_due: Dict[str, float] = {}
+        self._scale = 1.0  # bütçe ölçeği, due() her çağrıldığında yeniden hesaplanır
+
+    @property
+    def budget_rate(self) -> float:
+        """İzin verilen ortalama istek hızı (istek / sn)"""
+        return (self.budget_per_period or len(self.symbols)) / self.base_period
+
+    def _raw_interval(self, score: float) -> float:
+        # Geometrik ölçek: puandaki küçük düşüşler yakın bölgede daha çok fark yaratır
+        return self.min_period * (self.max_period / self.min_period) ** score
+
+    def _budget_scale(self) -> float:
+        # Puanı olmayan coin uzak sayılır
+        rate = sum(1 / self._raw_interval(self.scores.get(symbol, 1.0)) for symbol in self.symbols)
+        return max(1.0, rate / self.budget_rate) if rate else 1.0
+
+    def intervals(self) -> Dict[str, float]:
+        """Coin -> bütçeye göre ölçeklenmiş kontrol aralığı (sn)"""
+        scale = self._budget_scale()
+        return {symbol: self._raw_interval(self.scores.get(symbol, 1.0)) * scale for symbol in self.symbols}
+
+    def update(self, symbol: str, score: float, now: Union[float, None] = None):
+        """Coin kontrol edildikten sonra puanını kaydeder ve bir sonraki kontrolü planlar"""
+        now = time.monotonic() if now is None else now
+        self.scores[symbol] = min(1.0, max(0.0, score))
+        self.next_due[symbol] = now + self._raw_interval(self.scores[symbol]) * self._scale
+
+    def due(self, now: Union[float, None] = None) -> List[str]:
+        """Kontrol zamanı gelen coinler, sinyale en yakından başlayarak"""
+        now = time.monotonic() if now is None else now
+        self._scale = self._budget_scale()
+        ready = [symbol for symbol in self.symbols if self.next_due.get(symbol, 0.0) <= now]
+        return sorted(ready, key=lambda symbol: self.scores.get(symbol, 1.0))
+
+    def lateness(self, symbols: List[str], now: Union[float, None] = None) -> float:
+        """Verilen coinlerin planlanan kontrol zamanından en fazla gecikmesi (sn)"""
+        now = time.monotonic() if now is None else now
+        planned = [self.next_due[symbol] for symbol in symbols if symbol in self.next_due]
+        return max(0.0, now - min(planned)) if planned else 0.0
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Durum kaydı için puanlar ve planlanan kontrol zamanları (duvar saati)"""
+        offset = time.time() - time.monotonic()
+        return {"scores": dict(self.scores), "next_due": {symbol: due + offset for symbol, due in self.next_due.items()}}
+
+    def restore(self, state: Dict[str, Dict[str, float]]):
+        offset = time.time() - time.monotonic()
+        self.scores.update(state.get("scores", {}))
+        self.next_due.update({symbol: due - offset for symbol, due in state.get("next_due", {}).items()})
+
+    def seconds_until_next(self, now: Union[float, None] = None) -> float:
+        """Bir sonraki coin kontrolüne kalan süre (en az 1 sn)"""
+        now = time.monotonic() if now is None else now
+        upcoming = [self.next_due.get(symbol, 0.0) for symbol in self.symbols]
+        if not upcoming:
+            return self.base_period
+        return max(1.0, min(upcoming) - now)
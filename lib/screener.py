@@ -0,0 +1,434 @@
+import argparse
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+
+# 🔎 Tarayıcı ayarları
+SCREENER_BARS = 300  # stratejilerin analiz ettiği pencere (EMA başlangıçları aynı olsun)
+SCREENER_MIN_BARS = 60  # stratejilerin MIN_DATA_LEN'i: daha kısa seriler taranmaz
+SCREENER_TOP_N = 10
+SCREENER_GRANULARITY = "15min"
+MACD_GAP_BARS = 50  # MACD farkı histogramın son bu kadar mumunun ortalamasına göre normalize edilir
+
+
+@dataclass(frozen=True)
+class ScreenerRules:
+    """
+    Stratejinin koşulları (calculate_signal ile aynı eşikler).
+    volume_pct=None: hacim koşulu yok, trend=False: EMA50/EMA200 koşulu yok.
+    """
+    rsi_long: float = 40
+    rsi_short: float = 60
+    adx_min: float = 20
+    volume_pct: Union[float, None] = 15
+    volume_window: int = 10
+    trend: bool = True
+
+
+# --------------------------
+# İndikatörler: (mum, coin) matrislerinde zaman ekseni (0) boyunca, tüm coinler birlikte.
+# Zaman ekseni önde: her adım bitişik bir coin satırını okur/yazar.
+# Tanımlar pandas_ta ile aynıdır (ema: ilk değer SMA, rma: ewm(alpha=1/length, adjust=True))
+# --------------------------
+
+def _ewm(values: np.ndarray, alpha: float, start: int = 0, min_periods: int = 1, adjust: bool = False,
+         full: bool = True) -> np.ndarray:
+    """
+    pandas ewm(alpha, adjust).mean(), values[start:] üzerinde; öncesi ve ilk min_periods - 1 değer NaN.
+    full=False: sadece son satır (ara sonuçlar saklanmaz).
+    """
+    decay = 1.0 - alpha
+    num = values[start].astype(np.float64)
+    den = np.ones(num.shape)
+    out = None
+    if full:
+        out = np.empty(values.shape)
+        out[:start + min_periods - 1] = np.nan
+        out[start] = num
+    for i in range(start + 1, len(values)):
+        num *= decay
+        if adjust:
+            num += values[i]
+            den *= decay
+            den += 1.0
+            if full:
+                np.divide(num, den, out=out[i])
+        else:
+            num += alpha * values[i]
+            if full:
+                out[i] = num
+    if full:
+        if start + min_periods - 1 >= start:
+            out[start:start + min_periods - 1] = np.nan
+        return out
+    if len(values) < start + min_periods:
+        return np.full(num.shape, np.nan)
+    return num / den if adjust else num
+
+
+def _ema(values: np.ndarray, length: int, start: int = 0, full: bool = True) -> np.ndarray:
+    """ta.ema: ilk `length` değerin ortalamasıyla başlayan EMA (adjust=False)"""
+    seed = start + length - 1
+    if seed >= len(values):
+        return np.full(values.shape if full else values.shape[1:], np.nan)
+    seeded = values[seed:].astype(np.float64)
+    seeded[0] = values[start:seed + 1].mean(axis=0)
+    result = _ewm(seeded, 2.0 / (length + 1), full=full)
+    if not full:
+        return result
+    out = np.full(values.shape, np.nan)
+    out[seed:] = result
+    return out
+
+
+def _rma(values: np.ndarray, length: int, start: int = 0, full: bool = True) -> np.ndarray:
+    """Wilder ortalaması (ta.rma)"""
+    return _ewm(values, 1.0 / length, start=start, min_periods=length, adjust=True, full=full)
+
+
+def _shift(values: np.ndarray) -> np.ndarray:
+    shifted = np.empty_like(values)
+    shifted[0] = np.nan
+    shifted[1:] = values[:-1]
+    return shifted
+
+
+def compute_indicators(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+                       volume_window: int = 10) -> Dict[str, np.ndarray]:
+    """
+    (mum, coin) matrislerinden calculate_signal'ın kullandığı son değerler (coin başına, NaN = yok):
+    rsi, ema50, ema200, macd_cross (1 bull, -1 bear, 0), macd_gap, adx, vol_last, vol_avg, vol_pct.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # RSI 14 (sadece son değer)
+        change = close - _shift(close)
+        gains = np.stack([np.where(change > 0, change, 0.0), np.where(change < 0, -change, 0.0)], axis=1)
+        gain, loss = _rma(gains, 14, start=1, full=False)
+        rsi = 100 * gain / (gain + loss)
+
+        # MACD 12/26/9
+        macd = _ema(close, 12) - _ema(close, 26)
+        signal = _ema(macd, 9, start=25)
+        hist = macd - signal
+        scale = np.nanmean(np.abs(hist[-MACD_GAP_BARS:]), axis=0)
+        cross = np.zeros(close.shape[1], dtype=np.int8)
+        cross[(macd[-2] <= signal[-2]) & (macd[-1] > signal[-1])] = 1
+        cross[(macd[-2] >= signal[-2]) & (macd[-1] < signal[-1])] = -1
+
+        # ADX 14
+        prev_close = _shift(close)
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(prev_close - low)))
+        up = high - _shift(high)
+        down = _shift(low) - low
+        plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+        minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+        smoothed = _rma(np.stack([true_range, plus_dm, minus_dm], axis=1), 14, start=1)
+        atr, plus_dm, minus_dm = smoothed[:, 0], smoothed[:, 1], smoothed[:, 2]
+        plus, minus = 100 * plus_dm / atr, 100 * minus_dm / atr
+        dx = 100 * np.abs(plus - minus) / (plus + minus)
+        adx = _rma(dx, 14, start=14, full=False)
+
+        # Hacim: son mum, önceki volume_window mumun ortalamasına göre
+        vol_last = volume[-1]
+        vol_avg = volume[-volume_window - 1:-1].mean(axis=0)
+        vol_pct = np.where((vol_avg != 0) & (vol_last != 0), (vol_last - vol_avg) / vol_avg * 100.0, np.nan)
+
+    return {
+        "rsi": rsi,
+        "ema50": _ema(close, 50, full=False),
+        "ema200": _ema(close, 200, full=False),
+        "macd_cross": cross,
+        "macd_gap": np.where(scale > 0, hist[-1] / scale, np.nan),
+        "adx": adx,
+        "vol_last": vol_last,
+        "vol_avg": vol_avg,
+        "vol_pct": vol_pct,
+    }
+
+
+def _threshold_distance(values: np.ndarray, threshold: float, below: bool, scale: float) -> np.ndarray:
+    """lib.scheduler.threshold_distance'ın dizi hali (NaN -> 1)"""
+    gap = values - threshold if below else threshold - values
+    return np.where(np.isnan(values), 1.0, np.clip(gap / scale, 0.0, 1.0))
+
+
+def _side_parts(indicators: Dict[str, np.ndarray], rules: ScreenerRules, long: bool) -> Dict[str, np.ndarray]:
+    """Koşul başına 0 (sağlanıyor) - 1 (uzak) uzaklıklar; stratejilerin signal_distance'ı ile aynı"""
+    gap = indicators["macd_gap"]
+    wrong_side = np.isnan(gap) | ((gap > 0) == long)
+    macd = np.where(indicators["macd_cross"] == (1 if long else -1), 0.0,
+                    np.where(wrong_side, 1.0, np.minimum(1.0, np.abs(gap))))
+    parts = {
+        "rsi": _threshold_distance(indicators["rsi"], rules.rsi_long if long else rules.rsi_short, below=long, scale=20),
+        "macd": macd,
+        "adx": _threshold_distance(indicators["adx"], rules.adx_min, below=False, scale=rules.adx_min / 2),
+    }
+    if rules.volume_pct is not None:
+        parts["volume"] = _threshold_distance(indicators["vol_pct"], rules.volume_pct, below=False, scale=100)
+    return parts
+
+
+def _side_ok(indicators: Dict[str, np.ndarray], rules: ScreenerRules, long: bool) -> np.ndarray:
+    """calculate_signal'ın LONG/SHORT koşulları (NaN olan koşul sağlanmamış sayılır)"""
+    with np.errstate(invalid="ignore"):
+        ok = (indicators["rsi"] < rules.rsi_long) if long else (indicators["rsi"] > rules.rsi_short)
+        ok &= indicators["macd_cross"] == (1 if long else -1)
+        ok &= indicators["adx"] > rules.adx_min
+        if rules.trend:
+            ema50, ema200 = indicators["ema50"], indicators["ema200"]
+            ok &= (ema50 > ema200) if long else (ema50 < ema200)
+        if rules.volume_pct is not None:
+            ok &= indicators["vol_pct"] >= rules.volume_pct
+    return ok
+
+
+@dataclass
+class ScreenResult:
+    """Tek taramanın coin başına sonuçları (dizi sırası symbols ile aynı)"""
+    symbols: Tuple[str, ...]
+    side: np.ndarray  # puanlanan yön: 1 LONG, -1 SHORT
+    triggered: np.ndarray  # tüm koşullar sağlanıyor (calculate_signal sinyal verirdi)
+    distance: np.ndarray  # 0 = tetiklenmek üzere, 1 = çok uzak
+    parts: Dict[str, np.ndarray]  # koşul başına uzaklık (puanlanan yön için)
+    indicators: Dict[str, np.ndarray]
+    skipped: List[str] = field(default_factory=list)  # verisi yetersiz coinler
+    elapsed: float = 0.0  # sn
+
+    def ranking(self) -> np.ndarray:
+        """Sinyal verenler önce, sonra uzaklığa göre artan sıra"""
+        return np.lexsort((np.asarray(self.symbols), self.distance, ~self.triggered))
+
+    def top(self, n: int) -> List[Dict[str, object]]:
+        rows = []
+        for i in self.ranking()[:n]:
+            rows.append({
+                "symbol": self.symbols[i],
+                "side": "LONG" if self.side[i] > 0 else "SHORT",
+                "triggered": bool(self.triggered[i]),
+                "distance": float(self.distance[i]),
+                **{name: float(values[i]) for name, values in self.parts.items()},
+            })
+        return rows
+
+    def render(self, title: str, n: int) -> str:
+        lines = [f"{title} (ilk {min(n, len(self.symbols))} / {len(self.symbols)} coin)", "━━━━━━━━━━━━━━━━━"]
+        names = {"rsi": "RSI", "macd": "MACD", "adx": "ADX", "volume": "Hacim"}
+        for rank, row in enumerate(self.top(n), 1):
+            icon = ("🟢" if row["side"] == "LONG" else "🔴") if row["triggered"] else "⚪"
+            parts = " ".join(f"{names[name]} {row[name]:.2f}" for name in self.parts)
+            lines.append(f"{rank:>2}. {row['symbol']:<12} {icon} {row['side']:<5} {row['distance']:.2f} | {parts}")
+        if self.skipped:
+            lines.append(f"\nℹ️ Verisi yetersiz {len(self.skipped)} coin atlandı")
+        lines.append(f"\n⏱️ {len(self.symbols)} coin {self.elapsed * 1000:.0f} ms | "
+                     f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        return "\n".join(lines)
+
+
+def screen(windows: Dict[str, Dict[str, np.ndarray]], rules: ScreenerRules = ScreenerRules()) -> ScreenResult:
+    """
+    windows: coin -> {"high", "low", "close", "volume"} dizileri (eskiden yeniye).
+    Aynı uzunluktaki seriler tek (mum, coin) matrisinde, tek geçişte değerlendirilir (genelde tek grup: SCREENER_BARS).
+    """
+    started = time.perf_counter()
+    groups: Dict[int, List[str]] = {}
+    skipped = []
+    for symbol, arrays in windows.items():
+        length = len(arrays["close"])
+        if length < SCREENER_MIN_BARS:
+            skipped.append(symbol)
+        else:
+            groups.setdefault(length, []).append(symbol)
+
+    symbols: List[str] = []
+    indicators: Dict[str, List[np.ndarray]] = {}
+    for length, members in groups.items():
+        matrices = {name: np.stack([windows[s][name] for s in members], axis=1).astype(np.float64, copy=False)
+                    for name in ("high", "low", "close", "volume")}
+        valid = np.all(np.isfinite(matrices["close"]) & (matrices["close"] > 0), axis=0)
+        skipped.extend(s for s, ok in zip(members, valid) if not ok)
+        if not valid.any():
+            continue
+        if not valid.all():
+            matrices = {name: matrix[:, valid] for name, matrix in matrices.items()}
+        values = compute_indicators(matrices["high"], matrices["low"], matrices["close"], matrices["volume"],
+                                    volume_window=rules.volume_window)
+        symbols.extend(s for s, ok in zip(members, valid) if ok)
+        for name, array in values.items():
+            indicators.setdefault(name, []).append(array)
+    indicators = {name: np.concatenate(arrays) for name, arrays in indicators.items()}
+    if not symbols:
+        return ScreenResult((), np.empty(0, np.int8), np.empty(0, bool), np.empty(0), {}, {}, skipped,
+                            time.perf_counter() - started)
+
+    long_parts, short_parts = _side_parts(indicators, rules, True), _side_parts(indicators, rules, False)
+    long_distance = np.mean(list(long_parts.values()), axis=0)
+    short_distance = np.mean(list(short_parts.values()), axis=0)
+    with np.errstate(invalid="ignore"):
+        # Trend biliniyorsa o yön, bilinmiyorsa (veya trend koşulu yoksa) sinyale daha yakın yön
+        trend_known = ~np.isnan(indicators["ema50"]) & ~np.isnan(indicators["ema200"])
+        trend_long = indicators["ema50"] > indicators["ema200"]
+    if rules.trend:
+        is_long = np.where(trend_known, trend_long, long_distance <= short_distance)
+    else:
+        is_long = long_distance <= short_distance
+    long_ok, short_ok = _side_ok(indicators, rules, True), _side_ok(indicators, rules, False)
+    is_long = np.where(long_ok, True, np.where(short_ok, False, is_long))
+    parts = {name: np.where(is_long, long_parts[name], short_parts[name]) for name in long_parts}
+    return ScreenResult(
+        symbols=tuple(symbols),
+        side=np.where(is_long, 1, -1).astype(np.int8),
+        triggered=long_ok | short_ok,
+        distance=np.where(is_long, long_distance, short_distance),
+        parts=parts,
+        indicators=indicators,
+        skipped=skipped,
+        elapsed=time.perf_counter() - started,
+    )
+
+
+class Screener:
+    """
+    Sıralı aday tarayıcı: takip listesindeki tüm coinler için stratejinin koşullarını tek numpy geçişinde
+    değerlendirir, sinyale yakınlığa göre sıralar ve ilk top_n coini log chat'e ("log") veya dosyaya ("file")
+    yazar. Mumlar paylaşılan önbellekten okunur (ek istek yok; uyarlanabilir taramada pencere en fazla bir
+    periyot eskidir), yoksa paylaşılan bellekteki pencereye bakılır.
+    """
+
+    def __init__(self, rules: ScreenerRules = ScreenerRules(), title: str = "🔎 Tarayıcı", top_n: int = SCREENER_TOP_N,
+                 output: Union[str, None] = None, path: Union[str, None] = None,
+                 granularity: str = SCREENER_GRANULARITY, bars: int = SCREENER_BARS):
+        if output not in (None, "log", "file"):
+            raise ValueError(f"Bilinmeyen tarayıcı çıktısı: {output}")
+        self.rules = rules
+        self.title = title
+        self.top_n = top_n
+        self.output = output
+        self.path = path or "temp/screener.txt"
+        self.granularity = granularity
+        self.bars = bars
+        self.last: Union[ScreenResult, None] = None
+
+    def windows(self, coins: Iterable[str]) -> Dict[str, Dict[str, np.ndarray]]:
+        from lib.cache import candle_cache
+        windows = {}
+        for coin in coins:
+            series = candle_cache.series(coin, self.granularity)
+            if series is not None and len(series):
+                arrays = series.arrays()
+                windows[coin] = {name: arrays[name][-self.bars:] for name in ("high", "low", "close", "volume")}
+            elif candle_cache.shared is not None:
+                view = candle_cache.shared.view(coin, self.granularity, self.bars)
+                if view is not None:
+                    windows[coin] = {name: view.frame[name].to_numpy() for name in ("high", "low", "close", "volume")}
+        return windows
+
+    def scan(self, coins: Iterable[str]) -> ScreenResult:
+        coins = list(coins)
+        windows = self.windows(coins)
+        result = screen(windows, self.rules)
+        result.skipped.extend(coin for coin in coins if coin not in windows)
+        self.last = result
+        logging.info(f"🔎 Tarayıcı: {len(result.symbols)} coin {result.elapsed * 1000:.1f} ms, "
+                     f"{int(result.triggered.sum())} sinyal, {len(result.skipped)} atlandı")
+        return result
+
+    def publish(self, result: ScreenResult) -> int:
+        """Tabloyu çıktıya yazar; gönderilen mesaj sayısını döndürür (dosyada 1)"""
+        if self.output is None or not result.symbols:
+            return 0
+        text = result.render(self.title, self.top_n)
+        if self.output == "file":
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+            os.replace(tmp, self.path)
+            return 1
+        from lib.sms.digest import split_message
+        from lib.sms.sms import enqueue_message
+        chunks = split_message(text)
+        for chunk in chunks:
+            enqueue_message(text=chunk, chat_types=["log"], priority="diagnostic")
+        return len(chunks)
+
+    def run(self, coins: Iterable[str]) -> Union[ScreenResult, None]:
+        """Tarar ve yayınlar; hata döngüyü durdurmaz"""
+        try:
+            result = self.scan(coins)
+            self.publish(result)
+            return result
+        except Exception as e:
+            logging.error(f"❌ Tarayıcı çalışamadı: {e}")
+            return None
+
+
+async def _universe(limit: Union[int, None]) -> List[str]:
+    """Borsadaki USDT çiftleri, 24 saatlik işlem hacmine göre"""
+    from lib.fetch import bitget
+    data = await asyncio.to_thread(bitget.get, "/api/v2/spot/market/tickers", {}, "tickers")
+    if not data or not isinstance(data.get("data"), list):
+        raise RuntimeError("Ticker listesi alınamadı")
+    tickers = [t for t in data["data"] if str(t.get("symbol", "")).endswith("USDT")]
+    tickers.sort(key=lambda t: float(t.get("usdtVolume") or 0), reverse=True)
+    return [t["symbol"] for t in tickers[:limit]]
+
+
+async def _scan_universe(args):
+    from lib.cache import candle_cache
+    symbols = args.symbols or await _universe(args.limit)
+    print(f"📥 {len(symbols)} coin için mumlar çekiliyor...")
+    semaphore = asyncio.Semaphore(args.concurrency)
+    started = time.perf_counter()
+
+    async def fetch(symbol):
+        async with semaphore:
+            await candle_cache.get(symbol=symbol, granularity=args.granularity, limit=args.bars)
+    await asyncio.gather(*(fetch(symbol) for symbol in symbols))
+    print(f"📥 Mumlar {time.perf_counter() - started:.1f} sn'de çekildi")
+
+    rules = ScreenerRules(adx_min=args.adx_min, volume_pct=None if args.no_volume else args.volume_pct,
+                          trend=not args.no_trend)
+    screener = Screener(rules, top_n=args.top, output="file" if args.path else None, path=args.path,
+                        granularity=args.granularity, bars=args.bars)
+    result = screener.scan(symbols)
+    print(result.render(screener.title, args.top))
+    screener.publish(result)
+
+
+def main():
+    """
+    python -m lib.screener --limit 500 --top 20
+    python -m lib.screener --symbols BTCUSDT ETHUSDT SOLUSDT --no-volume
+    """
+    parser = argparse.ArgumentParser(description="Tüm borsa için sıralı sinyal adayı taraması")
+    parser.add_argument("--symbols", nargs="*", default=None, help="verilmezse tüm USDT çiftleri (ticker listesi)")
+    parser.add_argument("--limit", type=int, default=None, help="en yüksek hacimli N çift")
+    parser.add_argument("--top", type=int, default=SCREENER_TOP_N)
+    parser.add_argument("--granularity", default=SCREENER_GRANULARITY)
+    parser.add_argument("--bars", type=int, default=SCREENER_BARS)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--adx-min", type=float, default=20)
+    parser.add_argument("--volume-pct", type=float, default=15)
+    parser.add_argument("--no-volume", action="store_true", help="hacim koşulu yok (no-risk-without-volume)")
+    parser.add_argument("--no-trend", action="store_true", help="EMA50/EMA200 koşulu yok")
+    parser.add_argument("--path", default=None, help="tabloyu bu dosyaya da yaz")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from lib.log import setup_logging
+    load_dotenv()
+    # Tablo okunabilir kalsın: LOG_LEVEL verilmediyse sadece uyarılar (LOG_FORMAT / LOG_PATH geçerli)
+    setup_logging(os.getenv("LOG_LEVEL") or "WARNING")
+    asyncio.run(_scan_universe(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+import argparse
+import asyncio
+import bisect
+import hashlib
+import ipaddress
+import logging
+import multiprocessing
+import os
+import queue
+import secrets
+import socket
+import threading
+import time
+from multiprocessing.managers import BaseManager, DictProxy
+from typing import Dict, Iterable, List, Tuple, Union
+
+from lib.log import setup_logging
+
+# 🧩 Sharding ayarları
+VIRTUAL_NODES = 128  # worker başına halkadaki sanal düğüm sayısı (dağılımı dengeler)
+HEARTBEAT_INTERVAL = 5.0  # sn
+HEARTBEAT_TIMEOUT = 30.0  # bu süre kalp atışı gelmeyen worker kayıp sayılır
+DEFAULT_PORT = 50000
+SHARD_CHART_DIR = "temp"
+
+
+# --------------------------
+# Tutarlı hash halkası
+# --------------------------
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Tutarlı hash halkası: bir worker eklenip çıkarıldığında sadece o worker'ın
+    coinleri yer değiştirir, diğer atamalar aynı kalır.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = VIRTUAL_NODES):
+        self.vnodes = vnodes
+        self._keys: List[int] = []
+        self._owners: List[str] = []
+        self.nodes = set()
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str):
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for i in range(self.vnodes):
+            key = _hash(f"{node}#{i}")
+            index = bisect.bisect(self._keys, key)
+            self._keys.insert(index, key)
+            self._owners.insert(index, node)
+
+    def remove(self, node: str):
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        kept = [(key, owner) for key, owner in zip(self._keys, self._owners) if owner != node]
+        self._keys = [key for key, _ in kept]
+        self._owners = [owner for _, owner in kept]
+
+    def node_for(self, symbol: str) -> Union[str, None]:
+        if not self._keys:
+            return None
+        index = bisect.bisect(self._keys, _hash(symbol)) % len(self._keys)
+        return self._owners[index]
+
+    def assign(self, symbols: Iterable[str]) -> Dict[str, List[str]]:
+        """worker -> coin listesi (sıra korunur)"""
+        assignment = {node: [] for node in self.nodes}
+        for symbol in symbols:
+            node = self.node_for(symbol)
+            if node is not None:
+                assignment[node].append(symbol)
+        return assignment
+
+
+# --------------------------
+# Paylaşılan durum (manager sunucusu)
+# --------------------------
+
+# Bu nesneler manager sunucu sürecinde yaşar; worker'lar proxy ile erişir
+_deliveries = queue.Queue()
+_assignments = {}
+_heartbeats = {}
+
+
+def _get_deliveries():
+    return _deliveries
+
+
+def _get_assignments():
+    return _assignments
+
+
+def _get_heartbeats():
+    return _heartbeats
+
+
+class ShardManager(BaseManager):
+    """Koordinatör ile worker'lar arasındaki kuyruk ve sözlükler (farklı makinelerden de bağlanılabilir)"""
+
+
+ShardManager.register("get_deliveries", callable=_get_deliveries)
+ShardManager.register("get_assignments", callable=_get_assignments, proxytype=DictProxy)
+ShardManager.register("get_heartbeats", callable=_get_heartbeats, proxytype=DictProxy)
+
+
+def _authkey() -> Union[bytes, None]:
+    key = os.getenv("SHARD_AUTHKEY")
+    return key.encode() if key else None
+
+
+def is_loopback(host: str) -> bool:
+    """Adres sadece bu makineden erişilebilir mi (127.0.0.0/8, ::1, localhost)"""
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def coordinator_authkey(host: str) -> bytes:
+    """
+    Manager bağlantıları pickle taşır: anahtarı bilen, porta erişebilen herkes kod çalıştırabilir.
+    Dışarı açık adreste SHARD_AUTHKEY zorunludur; sadece loopback'te rastgele anahtar üretilir
+    (yerel worker'lara süreç argümanıyla verilir).
+    """
+    key = _authkey()
+    if key:
+        return key
+    if not is_loopback(host):
+        raise ValueError(f"❌ Koordinatör {host} adresinde dışarı açılıyor: SHARD_AUTHKEY .env dosyasında tanımlanmalı!")
+    return secrets.token_bytes(32)
+
+
+# --------------------------
+# Worker
+# --------------------------
+
+def worker_main(address: Tuple[str, int], worker_id: str, strategy_name: str, authkey: Union[bytes, None] = None,
+                candle_shm: Union[str, None] = None):
+    """
+    Worker süreci: koordinatöre bağlanır, kendisine atanan coinler için stratejinin run_cycle()
+    fonksiyonunu çalıştırır ve tüm mesajları teslimat kuyruğuna iletir (Telegram'a bağlanmaz).
+    candle_shm: yerel worker'larda koordinatörün mum deposu; mumlar oradan kopyasız okunur.
+    """
+    # lib.sms.sms ve lib.dedup import edilmeden önce ayarlanmalı
+    os.environ["TELEGRAM_FORWARD_ONLY"] = "1"
+    os.environ["SIGNAL_DEDUP_PATH"] = f"temp/signal_dedup.{worker_id}.json"
+    os.environ["CHECKPOINT_PATH"] = f"temp/checkpoint.{worker_id}.bin"
+    setup_logging(prefix=f"[{worker_id}] ")
+
+    authkey = authkey or _authkey()
+    if not authkey:
+        raise ValueError("❌ SHARD_AUTHKEY .env dosyasında tanımlanmalı (koordinatörle aynı anahtar)!")
+    manager = ShardManager(address=address, authkey=authkey)
+    manager.connect()
+    deliveries = manager.get_deliveries()
+    assignments = manager.get_assignments()
+    heartbeats = manager.get_heartbeats()
+
+    from lib.runner import load_strategy
+    from lib.sms.sms import set_message_sink
+
+    def forward(text, chat_types, chart_path, as_photo, priority):
+        # Grafik dosyası başka makinede olabilir: içerik mesajla birlikte gönderilir
+        chart = None
+        if chart_path:
+            with open(chart_path, "rb") as f:
+                chart = (os.path.basename(chart_path), f.read())
+        deliveries.put({"text": text, "chat_types": list(chat_types), "chart": chart, "as_photo": as_photo,
+                        "priority": priority, "worker": worker_id})
+
+    set_message_sink(forward)
+    module = load_strategy(strategy_name)
+    if candle_shm:
+        # Önbellek fork öncesi koordinatörde oluşmuş olabilir: okuyucu burada bağlanır
+        from lib.cache import candle_cache
+        from lib.shm import SharedCandleReader
+        os.environ["CANDLE_SHM"] = candle_shm
+        candle_cache.shared = SharedCandleReader(candle_shm)
+
+    # Kalp atışı ayrı thread'de: uzun döngüler worker'ı kayıp gösterilmesin
+    stop = threading.Event()
+
+    def beat():
+        while not stop.is_set():
+            try:
+                heartbeats[worker_id] = time.time()
+            except Exception as e:
+                logging.warning(f"⚠️ Kalp atışı gönderilemedi: {e}")
+            stop.wait(HEARTBEAT_INTERVAL)
+
+    threading.Thread(target=beat, name="shard-heartbeat", daemon=True).start()
+    try:
+        asyncio.run(_worker_loop(module, assignments, worker_id))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        from lib.checkpoint import save_all
+        save_all()
+
+
+async def _worker_loop(module, assignments, worker_id: str):
+    from lib.checkpoint import checkpointer, install_shutdown_handler
+    install_shutdown_handler()
+    checkpointer.restore()
+    period = getattr(module, "PERIOD_SECONDS", 15 * 60)
+    checked = []
+    next_cycle = 0.0
+    while True:
+        coins = list(assignments.get(worker_id, []))
+        if time.monotonic() >= next_cycle:
+            if coins:
+                logging.info(f"🧩 {len(coins)} coin kontrol ediliyor: {', '.join(coins)}")
+                module.COINS[:] = coins
+                await module.run_cycle()
+                checked = coins
+                next_cycle = time.monotonic() + period
+        else:
+            # Yeniden dengeleme ile gelen yeni coinleri periyodu beklemeden kontrol et
+            added = [coin for coin in coins if coin not in checked]
+            if added:
+                logging.info(f"🧩 Yeni atanan coinler kontrol ediliyor: {', '.join(added)}")
+                module.COINS[:] = added
+                await module.run_cycle()
+            checked = coins
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+
+# --------------------------
+# Koordinatör (tek teslimat süreci)
+# --------------------------
+
+class Coordinator:
+    """
+    Coin listesini tutarlı hash ile canlı worker'lara böler, kalp atışlarını izler,
+    kayıp worker'ın coinlerini diğerlerine dağıtır ve tüm mesajları tek Telegram kuyruğundan gönderir.
+    shared_candles: yerel worker varsa mumları koordinatör bir kez çekip paylaşılan belleğe yayınlar
+    (lib/shm.py); worker'lar kopyasız okur, worker sayısı arttıkça mum belleği ve istek sayısı artmaz.
+    """
+
+    def __init__(self, strategy_name: str, workers: int = 0, host: str = "127.0.0.1", port: int = 0,
+                 symbols: Union[List[str], None] = None, shared_candles: bool = True):
+        self.strategy_name = strategy_name
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.symbols = symbols
+        self.candle_shm = (os.getenv("CANDLE_SHM") or f"bot-candles-{os.getpid()}") if shared_candles and workers else None
+        self.authkey = coordinator_authkey(host)
+        self.ring = HashRing()
+        self.processes: Dict[str, multiprocessing.Process] = {}
+        self.manager = None
+        self.delivered = 0
+        self.moved = 0
+
+    def _spawn(self, worker_id: str):
+        process = multiprocessing.Process(
+            target=worker_main,
+            args=(self.manager.address, worker_id, self.strategy_name, self.authkey, self.candle_shm),
+            name=f"shard-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        self.processes[worker_id] = process
+
+    def rebalance(self, live: Iterable[str]) -> bool:
+        """Halkayı canlı worker'lara göre güncelle; değiştiyse atamaları yaz"""
+        live = set(live)
+        if live == self.ring.nodes:
+            return False
+        before = self.ring.assign(self.symbols)
+        for node in self.ring.nodes - live:
+            logging.warning(f"💀 Worker kayıp: {node}")
+            self.ring.remove(node)
+        for node in live - self.ring.nodes:
+            logging.info(f"🧩 Worker katıldı: {node}")
+            self.ring.add(node)
+        after = self.ring.assign(self.symbols)
+
+        owner_before = {symbol: node for node, symbols in before.items() for symbol in symbols}
+        moved = [symbol for node, symbols in after.items() for symbol in symbols if owner_before.get(symbol) not in (None, node)]
+        self.moved += len(moved)
+        assignments = self.manager.get_assignments()
+        for node in list(assignments.keys()):
+            if node not in after:
+                del assignments[node]
+        assignments.update(after)
+        logging.info(f"⚖️ Yeniden dengelendi: {len(after)} worker, {len(moved)} coin yer değiştirdi | "
+                     + " | ".join(f"{node}: {len(symbols)}" for node, symbols in sorted(after.items())))
+        return True
+
+    def _deliver(self, item: dict):
+        from lib.sms.sms import enqueue_message
+        chart_path = None
+        if item.get("chart"):
+            name, data = item["chart"]
+            os.makedirs(SHARD_CHART_DIR, exist_ok=True)
+            chart_path = os.path.join(SHARD_CHART_DIR, f"shard_{name}")
+            with open(chart_path, "wb") as f:
+                f.write(data)
+        enqueue_message(text=item["text"], chat_types=item["chat_types"], chart_path=chart_path,
+                        as_photo=item["as_photo"], priority=item["priority"])
+        self.delivered += 1
+
+    async def run(self):
+        from lib.dedup import signal_store
+        from lib.runner import load_strategy
+        from lib.sms.sms import shutdown_bot, start_bot
+
+        if self.symbols is None:
+            self.symbols = list(load_strategy(self.strategy_name).COINS)
+
+        self.manager = ShardManager(address=(self.host, self.port), authkey=self.authkey)
+        self.manager.start()
+        logging.info(f"🧩 Koordinatör {self.manager.address[0]}:{self.manager.address[1]} adresinde, "
+                     f"{len(self.symbols)} coin, {self.workers} yerel worker")
+        try:
+            await start_bot()
+        except Exception as e:
+            logging.error(f"❌ Telegram bağlantısı kurulamadı, gönderimde tekrar denenecek: {e}")
+
+        publisher = None
+        if self.candle_shm:
+            from lib.shm import SharedCandleStore, run_publisher
+            # Segment worker'lar başlamadan oluşturulur; ilk yayına kadar worker'lar kendileri çeker
+            publisher = asyncio.create_task(run_publisher(self.symbols, store=SharedCandleStore(self.candle_shm)),
+                                            name="candle-publisher")
+
+        for i in range(self.workers):
+            self._spawn(f"local-{i}")
+
+        deliveries = self.manager.get_deliveries()
+        heartbeats = self.manager.get_heartbeats()
+        next_check = 0.0
+        try:
+            while True:
+                if time.monotonic() >= next_check:
+                    now = time.time()
+                    beats = dict(heartbeats.items())
+                    self.rebalance(node for node, beat in beats.items() if now - beat < HEARTBEAT_TIMEOUT)
+                    # Ölen yerel worker'ı yeniden başlat (kalp atışı gelince halkaya geri katılır)
+                    for worker_id, process in list(self.processes.items()):
+                        if not process.is_alive():
+                            logging.warning(f"🔁 {worker_id} süreci durdu (kod {process.exitcode}), yeniden başlatılıyor")
+                            self._spawn(worker_id)
+                    next_check = time.monotonic() + HEARTBEAT_INTERVAL
+                try:
+                    item = await asyncio.to_thread(deliveries.get, True, 0.5)
+                except queue.Empty:
+                    continue
+                self._deliver(item)
+        finally:
+            for process in self.processes.values():
+                process.terminate()
+            if publisher is not None:
+                publisher.cancel()
+                await asyncio.gather(publisher, return_exceptions=True)
+            await shutdown_bot()
+            signal_store.save(force=True)
+            self.manager.shutdown()
+
+
+def main():
+    """
+    python -m lib.shard coordinator no-risk --workers 4
+    python -m lib.shard worker no-risk --connect host:50000 --id host-b-0   (başka makineden)
+    """
+    parser = argparse.ArgumentParser(description="Coin listesini birden fazla sürece/makineye bölerek çalıştırır")
+    parser.add_argument("role", choices=["coordinator", "worker"])
+    parser.add_argument("strategy")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="koordinatörün başlatacağı yerel worker sayısı")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="koordinatör dinleme adresi (uzak worker'lar için 0.0.0.0; SHARD_AUTHKEY zorunlu)")
+    parser.add_argument("--port", type=int, default=0, help=f"koordinatör portu (uzak worker'lar için ör. {DEFAULT_PORT})")
+    parser.add_argument("--connect", default=f"127.0.0.1:{DEFAULT_PORT}", help="worker: koordinatör adresi host:port")
+    parser.add_argument("--id", default=None, help="worker kimliği (makineler arasında benzersiz olmalı)")
+    parser.add_argument("--no-shared-candles", action="store_true",
+                        help="yerel worker'lar mumları paylaşılan bellekten okumasın, her biri kendisi çeksin")
+    args = parser.parse_args()
+
+    # Worker da .env okur: SHARD_AUTHKEY ve Telegram/borsa ayarları
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    if args.role == "worker":
+        host, _, port = args.connect.rpartition(":")
+        worker_main((host, int(port)), args.id or f"{os.uname().nodename if hasattr(os, 'uname') else 'worker'}-{os.getpid()}", args.strategy)
+        return
+
+    setup_logging()
+    try:
+        asyncio.run(Coordinator(args.strategy, workers=args.workers, host=args.host, port=args.port,
+                                shared_candles=not args.no_shared_candles).run())
+    except KeyboardInterrupt:
+        logging.info("👋 Çıkılıyor...")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+import argparse
+import asyncio
+import logging
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from lib.candles import CANDLE_COLUMNS, CandleSeries
+
+# 🧠 Paylaşılan bellek mum deposu ayarları
+SHM_NAME = os.getenv("CANDLE_SHM") or ""  # boş: kapalı
+SHM_SLOTS = 256  # en fazla coin/periyot sayısı
+SHM_CAPACITY = 500  # slot başına en fazla mum
+SHM_REATTACH_SECONDS = 30.0  # veri bayatsa (yayıncı yeniden başlamış olabilir) en sık bu aralıkla yeniden bağlan
+SHM_MAGIC = int.from_bytes(b"CNDLSHM1", "little")
+
+_created = set()  # bu süreçte oluşturulan segmentler (izleyici kaydı yazıcıya aittir)
+
+_HEADER = np.dtype([("magic", "<u8"), ("slots", "<i8"), ("capacity", "<i8"), ("columns", "<i8"),
+                    ("itemsize", "<i8"), ("created", "<f8")])
+# seq: her yayında iki artar (tek: yazılıyor). Çift tampon: okuyucu güncel tamponu kopyasız görür,
+# yazıcı diğerine yazar; okuyucunun gördüğü tampon ancak ikinci yayında yeniden yazılır.
+_ENTRY = np.dtype([("key", "S40"), ("seq", "<u8"), ("length", "<i8", (2,)), ("updated_at", "<f8", (2,))])
+
+
+def _key(symbol: str, granularity: str) -> bytes:
+    return f"{symbol}|{granularity}".encode()
+
+
+def _layout(slots: int, capacity: int, itemsize: int) -> Tuple[int, int, int]:
+    """(index başlangıcı, veri başlangıcı, tampon boyutu) byte cinsinden, 8 byte hizalı"""
+    index_offset = _HEADER.itemsize
+    data_offset = index_offset + slots * _ENTRY.itemsize
+    data_offset += -data_offset % 8
+    buffer_bytes = capacity * 8 + len(CANDLE_COLUMNS) * capacity * itemsize
+    return index_offset, data_offset, buffer_bytes
+
+
+class _Segment:
+    """Segmentin numpy görünümleri: başlık, index tablosu ve slot başına iki tampon"""
+
+    def __init__(self, shm: shared_memory.SharedMemory):
+        self.shm = shm
+        self.header = np.ndarray((), dtype=_HEADER, buffer=shm.buf)
+        if int(self.header["magic"]) != SHM_MAGIC:
+            raise ValueError(f"{shm.name} bir mum deposu değil")
+        self.slots = int(self.header["slots"])
+        self.capacity = int(self.header["capacity"])
+        self.dtype = np.dtype(f"<f{int(self.header['itemsize'])}")
+        index_offset, self.data_offset, self.buffer_bytes = _layout(self.slots, self.capacity, self.dtype.itemsize)
+        self.index = np.ndarray((self.slots,), dtype=_ENTRY, buffer=shm.buf, offset=index_offset)
+
+    def buffer(self, slot: int, which: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(zamanlar, değerler (kolon, satır)) görünümleri"""
+        offset = self.data_offset + (slot * 2 + which) * self.buffer_bytes
+        times = np.ndarray((self.capacity,), dtype="<i8", buffer=self.shm.buf, offset=offset)
+        values = np.ndarray((len(CANDLE_COLUMNS), self.capacity), dtype=self.dtype, buffer=self.shm.buf,
+                            offset=offset + self.capacity * 8)
+        return times, values
+
+
+class SharedCandleStore:
+    """
+    Yayıncı (tek yazıcı): mum pencerelerini paylaşılan bellek segmentine yazar.
+    Aynı makinedeki süreçler SharedCandleReader ile kopyasız okur; okuyucu sayısı bellek/IPC maliyetini değiştirmez.
+    Segment: başlık + index (anahtar, seq, uzunluk, güncelleme zamanı) + slot başına iki tampon.
+    """
+
+    def __init__(self, name: str = SHM_NAME, slots: int = SHM_SLOTS, capacity: int = SHM_CAPACITY,
+                 dtype: str = "float64"):
+        itemsize = np.dtype(dtype).itemsize
+        _, data_offset, buffer_bytes = _layout(slots, capacity, itemsize)
+        size = data_offset + slots * 2 * buffer_bytes
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Önceki yayıncıdan kalan segment: bağlı okuyucular bayat veriyi görüp yeniden bağlanır
+            old = shared_memory.SharedMemory(name=name)
+            old.unlink()
+            old.close()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((), dtype=_HEADER, buffer=self.shm.buf)
+        header[()] = (0, slots, capacity, len(CANDLE_COLUMNS), itemsize, time.time())
+        header["magic"] = SHM_MAGIC  # en son: okuyucular yarım başlık görmesin
+        self.segment = _Segment(self.shm)
+        self.name = self.shm.name
+        _created.add(self.shm._name)
+        self._slots: Dict[bytes, int] = {}
+        self.published = 0
+        logging.info(f"🧠 Paylaşılan mum deposu: {self.name} ({size / 1024 / 1024:.1f} MB, {slots} slot x {capacity} mum)")
+
+    def publish(self, series: CandleSeries) -> bool:
+        """Serinin son `capacity` mumunu yayınlar; slot kalmadıysa False"""
+        key = _key(series.symbol, series.granularity)
+        slot = self._slots.get(key)
+        if slot is None:
+            if len(self._slots) >= self.segment.slots:
+                logging.warning(f"⚠️ Paylaşılan mum deposu dolu, {series.symbol} yayınlanmadı")
+                return False
+            slot = self._slots[key] = len(self._slots)
+            self.segment.index[slot]["key"] = key
+        entry = self.segment.index[slot:slot + 1]
+        seq = int(entry["seq"][0])
+        target = (seq // 2 + 1) % 2
+        entry["seq"] = seq + 1  # tek: yazılıyor (okuyucular hâlâ diğer tamponu görür)
+
+        arrays = series.arrays()
+        count = min(len(series), self.segment.capacity)
+        times, values = self.segment.buffer(slot, target)
+        times[:count] = arrays["timestamp"][-count:]
+        for i, name in enumerate(CANDLE_COLUMNS):
+            values[i, :count] = arrays[name][-count:]
+        entry["length"][0, target] = count
+        entry["updated_at"][0, target] = series.updated_at
+
+        entry["seq"] = seq + 2  # çift: yeni tampon güncel
+        self.published += 1
+        return True
+
+    def close(self, unlink: bool = True):
+        self.segment = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # aynı süreçte okuyucu görünümleri varsa eşleme onlarla birlikte serbest kalır
+        if unlink:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class CandleView:
+    """
+    Okuyucunun kopyasız görünümü: valid() False dönerse yazıcı bu tamponun üzerine yazmaya başlamıştır.
+    Sadece senkron kullanım içindir (await yok); pencere saklanacaksa SharedCandleReader.read() ile kopyalanmalı.
+    """
+
+    def __init__(self, reader: "SharedCandleReader", slot: int, seq: int, frame: pd.DataFrame):
+        self.reader = reader
+        self.slot = slot
+        self.seq = seq
+        self.frame = frame
+
+    def valid(self) -> bool:
+        return self.reader._valid(self.slot, self.seq)
+
+
+class SharedCandleReader:
+    """
+    Okuyucu: yayıncının segmentine bağlanır (segment yoksa veya bayatsa None döner, çağıran kendisi çeker).
+    view() kopyasız DataFrame görünümü verir; tampon en az bir yayın aralığı boyunca değişmez (senkron kullanım).
+    read() seqlock ile tutarlı bir kopya döndürür (await'ler boyunca tutulacak pencereler için).
+    """
+
+    def __init__(self, name: str = SHM_NAME):
+        self.name = name
+        self.segment: Union[_Segment, None] = None
+        self._slots: Dict[bytes, int] = {}
+        self._index_cache: Dict[Tuple[int, int], pd.DatetimeIndex] = {}
+        self._attached_at = float("-inf")
+        self.hits = 0
+        self.misses = 0
+
+    def _attach(self) -> bool:
+        now = time.monotonic()
+        if now - self._attached_at < SHM_REATTACH_SECONDS:
+            return self.segment is not None
+        self._attached_at = now
+        try:
+            shm = shared_memory.SharedMemory(name=self.name)
+        except FileNotFoundError:
+            return False
+        # Okuyucu segmenti silmemeli: Python < 3.13 bağlanan süreci de izler ve çıkışta siler
+        if shm._name not in _created:
+            try:
+                resource_tracker.unregister(shm._name, "shared_memory")
+            except Exception:
+                pass
+        try:
+            segment = _Segment(shm)
+        except ValueError as e:
+            logging.warning(f"⚠️ {e}")
+            shm.close()
+            return False
+        if self.segment is not None:
+            try:
+                self.segment.shm.close()
+            except BufferError:
+                pass  # eski segmente ait görünümler hâlâ kullanımda: eşleme onlarla birlikte serbest kalır
+        self.segment = segment
+        self._slots.clear()
+        self._index_cache.clear()
+        logging.info(f"🧠 Paylaşılan mum deposuna bağlanıldı: {self.name}")
+        return True
+
+    def _slot(self, key: bytes) -> Union[int, None]:
+        slot = self._slots.get(key)
+        if slot is None:
+            found = np.flatnonzero(self.segment.index["key"] == key)
+            if not len(found):
+                return None
+            slot = self._slots[key] = int(found[0])
+        return slot
+
+    def _valid(self, slot: int, seq: int) -> bool:
+        # Okunan tampon, yazıcı bir sonraki yayından sonrakine başlayana kadar (seq < 2k + 3) sabittir
+        current = int(self.segment.index["seq"][slot])
+        return current - (seq - seq % 2) < 3
+
+    def view(self, symbol: str, granularity: str, limit: int, max_age: Union[float, None] = None) -> Union[CandleView, None]:
+        """Son `limit` mumun kopyasız görünümü; yoksa, yetersizse veya max_age'den eskiyse None"""
+        if self.segment is None and not self._attach():
+            return None
+        key = _key(symbol, granularity)
+        slot = self._slot(key)
+        view = self._view(slot, symbol, granularity, limit, max_age) if slot is not None else None
+        if view is None and self._attach():
+            # Yayıncı yeniden başlamış olabilir: yeni segmentte tekrar dene
+            slot = self._slot(key)
+            view = self._view(slot, symbol, granularity, limit, max_age) if slot is not None else None
+        if view is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return view
+
+    def _view(self, slot: int, symbol: str, granularity: str, limit: int,
+              max_age: Union[float, None]) -> Union[CandleView, None]:
+        entry = self.segment.index[slot]
+        seq = int(entry["seq"])
+        which = (seq // 2) % 2
+        count = int(entry["length"][which])
+        updated_at = float(entry["updated_at"][which])
+        if seq < 2 or count < limit or (max_age is not None and time.time() - updated_at > max_age):
+            return None
+        times, values = self.segment.buffer(slot, which)
+        start = count - limit
+        index = self._index_cache.get((slot, seq))
+        if index is None:
+            index = pd.DatetimeIndex(times[:count].view("M8[ns]"), name="timestamp").tz_localize("UTC")
+            self._index_cache = {key: value for key, value in self._index_cache.items() if key[0] != slot}
+            self._index_cache[(slot, seq)] = index
+        data = values[:, start:count].T.view()
+        data.flags.writeable = False
+        frame = pd.DataFrame(data, index=index[start:], columns=list(CANDLE_COLUMNS), copy=False)
+        frame.attrs.update(symbol=symbol, granularity=granularity, fetched_at=updated_at)
+        if not self._valid(slot, seq):
+            return None
+        return CandleView(self, slot, seq, frame)
+
+    def read(self, symbol: str, granularity: str, limit: int, max_age: Union[float, None] = None,
+             retries: int = 3) -> Union[pd.DataFrame, None]:
+        """Tutarlı kopya: kopyalama sırasında tampon yeniden yazıldıysa tekrar dener"""
+        for _ in range(retries):
+            view = self.view(symbol, granularity, limit, max_age)
+            if view is None:
+                return None
+            frame = view.frame.copy()
+            if view.valid():
+                return frame
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+async def run_publisher(symbols: List[str], granularity: str = "15min", limit: int = 300,
+                        interval: Union[float, None] = None, store: Union[SharedCandleStore, None] = None):
+    """
+    Coinlerin mumlarını (kendi CandleCache'i ile, her turda son mumlarla yenileyerek) çekip yayınlar.
+    Okuyucular max_age=CANDLE_CACHE_TTL ile okur: yayın aralığı bunun yarısıdır, veri okuyucuya hiç bayat görünmez.
+    symbols listesi referans olarak tutulur; yerinde değiştirilirse takip edilir.
+    """
+    from lib.cache import CANDLE_CACHE_TTL, CandleCache
+    # TTL 0: her tur gerçekten yenilenir (aynı TTL ile önbellek isabeti eski updated_at'i tekrar yayınlıyordu);
+    # okuyucusuz: yayıncı kendi yayınından beslenmemeli
+    cache = CandleCache(ttl=0)
+    store = store or SharedCandleStore()
+    interval = interval or CANDLE_CACHE_TTL / 2
+    if interval >= CANDLE_CACHE_TTL:
+        logging.warning(f"⚠️ Yayın aralığı ({interval:.0f} sn) okuyucu TTL'inden ({CANDLE_CACHE_TTL} sn) kısa değil: "
+                        "okuyucular veriyi bayat görüp kendileri çekecek")
+    semaphore = asyncio.Semaphore(8)
+
+    async def refresh(symbol: str):
+        async with semaphore:
+            if await cache.get(symbol=symbol, granularity=granularity, limit=limit) is not None:
+                store.publish(cache.series(symbol, granularity))
+
+    try:
+        while True:
+            started = time.monotonic()
+            await asyncio.gather(*(refresh(symbol) for symbol in list(symbols)))
+            logging.debug(f"🧠 {len(symbols)} coin yayınlandı ({time.monotonic() - started:.1f} sn)")
+            await asyncio.sleep(max(1.0, interval - (time.monotonic() - started)))
+    finally:
+        store.close()
+
+
+def main():
+    """
+    Aynı makinedeki strateji süreçleri için tek mum yayıncısı:
+    python -m lib.shm no-risk no-risk-without-volume   (stratejiler CANDLE_SHM=bot-candles ile çalıştırılır)
+    """
+    from dotenv import load_dotenv
+    from lib.log import setup_logging
+    from lib.runner import load_strategy
+
+    parser = argparse.ArgumentParser(description="Mum pencerelerini paylaşılan belleğe yayınlar")
+    parser.add_argument("strategies", nargs="+", help="COINS listeleri birleştirilecek stratejiler")
+    parser.add_argument("--name", default=SHM_NAME or "bot-candles", help="segment adı (okuyucularda CANDLE_SHM)")
+    parser.add_argument("--granularity", default="15min")
+    parser.add_argument("--limit", type=int, default=300)
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    symbols = []
+    for name in args.strategies:
+        symbols += [symbol for symbol in load_strategy(name).COINS if symbol not in symbols]
+    logging.info(f"🧠 {len(symbols)} coin yayınlanacak: {', '.join(symbols)}")
+    try:
+        asyncio.run(run_publisher(symbols, args.granularity, args.limit, store=SharedCandleStore(args.name)))
+    except KeyboardInterrupt:
+        logging.info("👋 Çıkılıyor...")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Union
+
+import httpx
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+# 🔌 HTTP bağlantı havuzu ayarları: (env değişkeni, varsayılan)
+# .env, lib.sms.sms tarafından yüklendiği için değerler BotClient oluşturulurken okunur
+SETTINGS = {
+    "pool_size": ("TELEGRAM_POOL_SIZE", 16),
+    "keepalive": ("TELEGRAM_KEEPALIVE", 90.0),
+    "connect_timeout": ("TELEGRAM_CONNECT_TIMEOUT", 5.0),
+    "read_timeout": ("TELEGRAM_READ_TIMEOUT", 10.0),
+    "write_timeout": ("TELEGRAM_WRITE_TIMEOUT", 10.0),
+    "media_write_timeout": ("TELEGRAM_MEDIA_WRITE_TIMEOUT", 30.0),
+    "pool_timeout": ("TELEGRAM_POOL_TIMEOUT", 5.0),
+    "warmup_connections": ("TELEGRAM_WARMUP_CONNECTIONS", 2),
+}
+
+
+def _setting(name: str, value):
+    if value is not None:
+        return value
+    env_key, default = SETTINGS[name]
+    raw = os.getenv(env_key)
+    return type(default)(raw) if raw not in (None, "") else default
+
+
+class BotClient:
+    """
+    Süreç içinde tek bir Telegram Bot nesnesi: açık başlatma/kapatma, ayarlanabilir
+    bağlantı havuzu ve keep-alive, başlangıçta bağlantı ısıtma (TLS el sıkışması önceden yapılır).
+    Aynı süreçteki tüm stratejiler aynı istemciyi paylaşır.
+    """
+
+    def __init__(self, token: str, pool_size: Union[int, None] = None, keepalive: Union[float, None] = None,
+                 connect_timeout: Union[float, None] = None, read_timeout: Union[float, None] = None,
+                 write_timeout: Union[float, None] = None, media_write_timeout: Union[float, None] = None,
+                 pool_timeout: Union[float, None] = None, warmup_connections: Union[int, None] = None,
+                 base_url: Union[str, None] = None, base_file_url: Union[str, None] = None):
+        self.token = token
+        self.pool_size = _setting("pool_size", pool_size)
+        self.keepalive = _setting("keepalive", keepalive)
+        self.connect_timeout = _setting("connect_timeout", connect_timeout)
+        self.read_timeout = _setting("read_timeout", read_timeout)
+        self.write_timeout = _setting("write_timeout", write_timeout)
+        self.media_write_timeout = _setting("media_write_timeout", media_write_timeout)
+        self.pool_timeout = _setting("pool_timeout", pool_timeout)
+        self.warmup_connections = _setting("warmup_connections", warmup_connections)
+        self.base_url = base_url
+        self.base_file_url = base_file_url
+
+        self.bot: Union[Bot, None] = None
+        self._loop = None
+        self._lock = None
+
+    def _build_bot(self) -> Bot:
+        request = HTTPXRequest(
+            connection_pool_size=self.pool_size,
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+            write_timeout=self.write_timeout,
+            media_write_timeout=self.media_write_timeout,
+            pool_timeout=self.pool_timeout,
+            httpx_kwargs={
+                "limits": httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                    keepalive_expiry=self.keepalive,
+                ),
+            },
+        )
+        kwargs = {}
+        if self.base_url:
+            kwargs["base_url"] = self.base_url
+        if self.base_file_url:
+            kwargs["base_file_url"] = self.base_file_url
+        return Bot(token=self.token, request=request, **kwargs)
+
+    @property
+    def started(self) -> bool:
+        return self.bot is not None and self._loop is asyncio.get_running_loop()
+
+    async def start(self) -> Bot:
+        """Bot'u başlatır ve bağlantıları ısıtır. Zaten başlatılmışsa aynı nesneyi döndürür."""
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            # httpx bağlantıları event loop'a bağlı: yeni loop'ta istemci yeniden kurulur
+            self._lock = asyncio.Lock()
+            self._loop = loop
+            self.bot = None
+
+        async with self._lock:
+            if self.bot is not None:
+                return self.bot
+            bot = self._build_bot()
+            start = time.perf_counter()
+            # initialize() getMe çağırır: ilk bağlantı + TLS burada kurulur
+            await bot.initialize()
+            if self.warmup_connections > 1:
+                # Paralel getMe ile havuzda birden fazla sıcak bağlantı aç
+                await asyncio.gather(*(bot.get_me() for _ in range(self.warmup_connections - 1)), return_exceptions=True)
+            logging.info(f"🔌 Telegram bağlantısı hazır: @{bot.username} "
+                         f"(havuz {self.pool_size}, ısıtma {(time.perf_counter() - start) * 1000:.0f} ms)")
+            self.bot = bot
+            return bot
+
+    async def get(self) -> Bot:
+        """Başlatılmış Bot nesnesini döndürür (gerekirse başlatır)"""
+        if self.started:
+            return self.bot
+        return await self.start()
+
+    async def shutdown(self):
+        """HTTP bağlantılarını kapatır"""
+        if self.bot is None:
+            return
+        bot, self.bot = self.bot, None
+        try:
+            await bot.shutdown()
+            logging.info("🔌 Telegram bağlantısı kapatıldı")
+        except Exception as e:
+            logging.warning(f"⚠️ Telegram bağlantısı kapatılamadı: {e}")
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Union
+
+from telegram.error import Conflict, NetworkError, TimedOut
+
+from lib.sms.sms import CHAT_IDS, bot_client, enqueue_message
+
+# 🤖 Bot komutları ayarları
+POLL_TIMEOUT = 30  # sn: getUpdates uzun yoklama süresi
+RETRY_DELAY = 5.0  # sn: ağ hatasında bekleme
+
+# Komut adı -> handler(args) -> cevap metni (veya None)
+CommandHandler = Callable[[List[str]], Union[str, None, Awaitable[Union[str, None]]]]
+_handlers: Dict[str, CommandHandler] = {}
+_task: Union[asyncio.Task, None] = None
+
+
+def register_command(name: str, handler: CommandHandler):
+    """/name arg1 arg2 komutu için handler kaydeder"""
+    _handlers[name.lstrip("/").lower()] = handler
+
+
+async def _handle(text: str):
+    parts = text.strip().split()
+    # /profile@bot_adı biçimi de kabul edilir
+    name = parts[0].lstrip("/").split("@")[0].lower()
+    handler = _handlers.get(name)
+    if handler is None:
+        return
+    logging.info(f"🤖 Komut alındı: {text.strip()}")
+    try:
+        reply = handler(parts[1:])
+        if asyncio.iscoroutine(reply):
+            reply = await reply
+    except Exception as e:
+        reply = f"❌ /{name} hatası: {e}"
+    if reply:
+        enqueue_message(text=reply, chat_types=["log"], priority="status")
+
+
+async def _poll():
+    bot = await bot_client.get()
+    # Sadece yapılandırılmış chatlerden gelen komutlar işlenir
+    allowed = {str(chat_id) for chat_id in CHAT_IDS.values()}
+    offset = None
+    logging.info(f"🤖 Bot komutları dinleniyor: {', '.join('/' + name for name in _handlers)}")
+    while True:
+        try:
+            updates = await bot.get_updates(offset=offset, timeout=POLL_TIMEOUT,
+                                            allowed_updates=["message", "channel_post"])
+        except Conflict:
+            logging.warning("⚠️ Aynı bot başka bir süreçte komut dinliyor (getUpdates çakışması), komutlar kapatıldı")
+            return
+        except (NetworkError, TimedOut) as e:
+            # Sadece geçici ağ hataları tekrar denenir; diğer hatalar görevi bitirir ve loglanır
+            logging.debug(f"⚠️ Komut yoklama hatası: {e}")
+            await asyncio.sleep(RETRY_DELAY)
+            continue
+        for update in updates:
+            offset = update.update_id + 1
+            message = update.effective_message
+            if message is None or not message.text or not message.text.startswith("/"):
+                continue
+            if str(message.chat_id) not in allowed:
+                continue
+            await _handle(message.text)
+
+
+def start_command_listener() -> Union[asyncio.Task, None]:
+    """Komut dinleyicisini arka plan görevi olarak başlatır (çalışan event loop içinden, bir kez)"""
+    global _task
+    if not _handlers or (_task is not None and not _task.done()):
+        return _task
+    _task = asyncio.get_running_loop().create_task(_poll(), name="telegram-commands")
+    _task.add_done_callback(_log_crash)
+    return _task
+
+
+def _log_crash(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logging.error("❌ Komut dinleyicisi durdu", exc_info=task.exception())
@@ -0,0 +1,97 @@
+from typing import Dict, Hashable, List, Union
+
+from lib.sms.sms import enqueue_message
+
+TELEGRAM_MAX_LENGTH = 4096  # Telegram tek mesaj karakter limiti
+
+
+def split_message(text: str, limit: int = TELEGRAM_MAX_LENGTH) -> List[str]:
+    """
+    Metni satır sınırlarından bölerek her parçası limit'i aşmayan mesajlar üretir.
+    Tek başına limit'ten uzun satırlar zorunlu olarak kesilir.
+    """
+    chunks = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            chunks.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class DiagnosticDigest:
+    """
+    Bir döngüdeki coin bazlı teşhis satırlarını toplar ve döngü sonunda tek (gerekirse bölünmüş)
+    bir mesaj olarak gönderir.
+    suppress_unchanged=True ise bir önceki özetteki ile aynı parmak izine sahip coinler gizlenir.
+    Aynı özet periyodunda tekrar kontrol edilen coin (uyarlanabilir tarama) tek satırda kalır: son durum geçerlidir.
+    """
+
+    def __init__(self, title: str, suppress_unchanged: bool = False):
+        self.title = title
+        self.suppress_unchanged = suppress_unchanged
+        self.rows: Dict[str, str] = {}
+        self.suppressed: Dict[str, None] = {}  # sıralı küme
+        self._fingerprints: Dict[str, Hashable] = {}  # önceki özetlerdeki parmak izleri
+        self._current: Dict[str, Hashable] = {}  # bu periyotta eklenenler (flush'ta kalıcı olur)
+
+    def add(self, symbol: str, row: str, fingerprint: Union[Hashable, None] = None):
+        """Coin satırını ekler. fingerprint verilmezse satırın kendisi karşılaştırılır."""
+        fingerprint = row if fingerprint is None else fingerprint
+        self._current[symbol] = fingerprint
+        if self.suppress_unchanged and self._fingerprints.get(symbol) == fingerprint:
+            self.rows.pop(symbol, None)
+            self.suppressed[symbol] = None
+            return
+        self.suppressed.pop(symbol, None)
+        self.rows[symbol] = row
+
+    def forget(self, symbol: str):
+        """Coin'i özetten ve parmak izlerinden sil (sinyal gönderildiğinde: bir sonraki teşhis yeniden gösterilsin)"""
+        self.rows.pop(symbol, None)
+        self.suppressed.pop(symbol, None)
+        self._fingerprints.pop(symbol, None)
+        self._current.pop(symbol, None)
+
+    def snapshot(self) -> Dict[str, Hashable]:
+        """Durum kaydı için son parmak izleri (yeniden başlatmada değişmeyen coinler yine gizlenir)"""
+        return {**self._fingerprints, **self._current}
+
+    def restore(self, state: Dict[str, Hashable]):
+        self._fingerprints.update(state)
+
+    def render(self, footer: str = "") -> List[str]:
+        """Özet tabloyu Telegram limitine göre bölünmüş mesajlar olarak döndürür"""
+        lines = [self.title, "━━━━━━━━━━━━━━━━━"]
+        lines.extend(self.rows.values())
+        if self.suppressed:
+            lines.append(f"\nℹ️ Değişmeyen {len(self.suppressed)} coin gizlendi: {', '.join(self.suppressed)}")
+        if footer:
+            lines.append(f"\n{footer}")
+        return split_message("\n".join(lines))
+
+    def flush(self, footer: str = "", chat_types=None, priority: str = "diagnostic") -> int:
+        """Özeti kuyruğa ekler, döngü verilerini sıfırlar ve gönderilen mesaj sayısını döndürür"""
+        if chat_types is None:
+            chat_types = ["log"]
+        self._fingerprints.update(self._current)
+        self._current = {}
+        if not self.rows and not self.suppressed and not footer:
+            return 0
+        chunks = self.render(footer)
+        for chunk in chunks:
+            enqueue_message(text=chunk, chat_types=chat_types, priority=priority)
+        self.rows = {}
+        self.suppressed = {}
+        return len(chunks)
@@ -0,0 +1,302 @@
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import defaultdict, deque
+from email.parser import BytesParser
+from email.policy import HTTP
+from typing import Any, Dict, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+
+DEFAULT_PORT = 8081
+
+
+class FakeTelegramServer:
+    """
+    Yük testi için yerel sahte Telegram Bot API sunucusu.
+    Gerçek Bot API yanıt biçimini taklit eder; gecikme, hız limiti (429 + retry_after)
+    ve hata enjeksiyonu ayarlanabilir. Hiçbir mesaj gerçek bir chat'e gitmez.
+
+    Args:
+        latency: Her istek için temel gecikme (sn)
+        jitter: Gecikmeye eklenen rastgele üst sınır (sn)
+        upload_seconds_per_mb: Dosya yüklemelerinde MB başına ek gecikme (yavaş upload simülasyonu)
+        global_rate: Saniyede izin verilen toplam istek (aşılırsa 429)
+        chat_rate: Chat başına saniyede izin verilen istek (aşılırsa 429)
+        retry_after: 429 yanıtlarında dönülecek retry_after (sn)
+        error_rate: Rastgele 502 (NetworkError) döndürme olasılığı
+        flood_rate: Limitten bağımsız rastgele 429 döndürme olasılığı
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.05, jitter: float = 0.02,
+                 upload_seconds_per_mb: float = 0.5, global_rate: Union[float, None] = 30,
+                 chat_rate: Union[float, None] = 1, retry_after: int = 1, error_rate: float = 0.0,
+                 flood_rate: float = 0.0, seed: Union[int, None] = None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.upload_seconds_per_mb = upload_seconds_per_mb
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.flood_rate = flood_rate
+        self.random = random.Random(seed)
+
+        self._server = None
+        self._message_id = 0
+        self._file_id = 0
+        self._global_window = deque()
+        self._chat_windows = defaultdict(deque)
+
+        # İstatistikler
+        self.requests = defaultdict(int)
+        self.delivered = defaultdict(int)
+        self.rate_limited = 0
+        self.errors = 0
+        self.bytes_received = 0
+        self.uploads = 0
+        self._updates = []  # getUpdates ile dönülecek gelen mesajlar (push_command)
+        self._update_id = 0
+
+    # --------------------------
+    # Yaşam döngüsü
+    # --------------------------
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/bot"
+
+    @property
+    def base_file_url(self) -> str:
+        return f"http://{self.host}:{self.port}/file/bot"
+
+    async def start(self) -> "FakeTelegramServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logging.info(f"🧪 Sahte Telegram API çalışıyor: {self.base_url}")
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": dict(self.requests),
+            "delivered": dict(self.delivered),
+            "rate_limited": self.rate_limited,
+            "errors": self.errors,
+            "uploads": self.uploads,
+            "bytes_received": self.bytes_received,
+        }
+
+    # --------------------------
+    # HTTP
+    # --------------------------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                body = await self._read_body(reader, headers)
+                self.bytes_received += len(body)
+                status, payload = await self._dispatch(urlsplit(target).path, headers, body)
+
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+        if "content-length" in headers:
+            return await reader.readexactly(int(headers["content-length"]))
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = b""
+            while True:
+                size = int((await reader.readline()).strip(), 16)
+                if size == 0:
+                    await reader.readline()
+                    return body
+                body += await reader.readexactly(size)
+                await reader.readline()
+        return b""
+
+    @staticmethod
+    def _parse_params(headers: Dict[str, str], body: bytes) -> Tuple[Dict[str, str], int]:
+        """Form / JSON / multipart parametrelerini ve yüklenen dosya boyutunu döndürür"""
+        content_type = headers.get("content-type", "")
+        if content_type.startswith("multipart/form-data"):
+            message = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+            params = {}
+            file_bytes = 0
+            for part in message.iter_parts():
+                name = part.get_param("name", header="content-disposition")
+                content = part.get_payload(decode=True) or b""
+                if part.get_filename():
+                    file_bytes += len(content)
+                else:
+                    params[name] = content.decode(errors="replace")
+            return params, file_bytes
+        if content_type.startswith("application/json"):
+            return {k: str(v) for k, v in json.loads(body or b"{}").items()}, 0
+        return dict(parse_qsl(body.decode(errors="replace"))), 0
+
+    def _rate_limited(self, chat_id: Union[str, None]) -> bool:
+        now = time.monotonic()
+        windows = [(self._global_window, self.global_rate)]
+        if chat_id is not None:
+            windows.append((self._chat_windows[chat_id], self.chat_rate))
+        for window, rate in windows:
+            while window and now - window[0] > 1.0:
+                window.popleft()
+            if rate is not None and len(window) >= rate:
+                return True
+        for window, _ in windows:
+            window.append(now)
+        return False
+
+    async def _dispatch(self, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, Dict[str, Any]]:
+        # /bot<token>/<method>
+        api_method = path.rsplit("/", 1)[-1]
+        self.requests[api_method] += 1
+        params, file_bytes = self._parse_params(headers, body)
+        chat_id = params.get("chat_id")
+
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if file_bytes:
+            delay += file_bytes / 1024 / 1024 * self.upload_seconds_per_mb
+        await asyncio.sleep(delay)
+
+        if api_method.startswith("send"):
+            if self.random.random() < self.error_rate:
+                self.errors += 1
+                return 502, {"ok": False, "error_code": 502, "description": "Bad Gateway"}
+            if self.random.random() < self.flood_rate or self._rate_limited(chat_id):
+                self.rate_limited += 1
+                return 429, {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                }
+
+        if api_method == "getMe":
+            return 200, {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_signal_bot"}}
+
+        if api_method in ("sendMessage", "sendDocument", "sendPhoto"):
+            self.delivered[api_method] += 1
+            return 200, {"ok": True, "result": self._message(api_method, chat_id, params, file_bytes)}
+
+        if api_method == "getUpdates":
+            offset = int(params.get("offset") or 0)
+            self._updates = [update for update in self._updates if update["update_id"] >= offset]
+            if not self._updates:
+                # Uzun yoklama: testleri bekletmemek için en fazla 1 sn
+                await asyncio.sleep(min(float(params.get("timeout") or 0), 1.0))
+            return 200, {"ok": True, "result": self._updates}
+
+        return 200, {"ok": True, "result": True}
+
+    def push_command(self, chat_id: int, text: str):
+        """Bot'a chat'ten yazılmış gibi bir mesaj ekler (getUpdates ile döner)"""
+        self._update_id += 1
+        self._message_id += 1
+        self._updates.append({"update_id": self._update_id, "message": {
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "supergroup" if chat_id < 0 else "private"},
+            "text": text,
+        }})
+
+    def _message(self, api_method: str, chat_id: Union[str, None], params: Dict[str, str], file_bytes: int) -> Dict[str, Any]:
+        self._message_id += 1
+        chat_id = int(chat_id) if chat_id and chat_id.lstrip("-").isdigit() else 0
+        message = {
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "supergroup" if chat_id < 0 else "private"},
+        }
+        if api_method == "sendMessage":
+            message["text"] = params.get("text", "")
+            return message
+
+        message["caption"] = params.get("caption", "")
+        if file_bytes:
+            self.uploads += 1
+            self._file_id += 1
+            file_id = f"fake-file-{self._file_id}"
+        else:
+            # Daha önce yüklenmiş dosya file_id ile tekrar gönderildi
+            file_id = params.get("document") or params.get("photo") or "fake-file-0"
+        if api_method == "sendDocument":
+            message["document"] = {"file_id": file_id, "file_unique_id": file_id, "file_name": "chart.png", "file_size": file_bytes}
+        else:
+            message["photo"] = [{"file_id": file_id, "file_unique_id": file_id, "width": 800, "height": 575, "file_size": file_bytes}]
+        return message
+
+
+async def _serve(args):
+    server = await FakeTelegramServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        upload_seconds_per_mb=args.upload_seconds_per_mb,
+        global_rate=args.global_rate,
+        chat_rate=args.chat_rate,
+        retry_after=args.retry_after,
+        error_rate=args.error_rate,
+        flood_rate=args.flood_rate,
+    ).start()
+    print(f"🧪 TELEGRAM_DRY_RUN=1 TELEGRAM_API_URL={server.base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Yerel sahte Telegram Bot API sunucusu")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--upload-seconds-per-mb", type=float, default=0.5)
+    parser.add_argument("--global-rate", type=float, default=30)
+    parser.add_argument("--chat-rate", type=float, default=1)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--flood-rate", type=float, default=0.0)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,417 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Tuple, Union
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+from lib.metrics import http_requests, http_retries, http_seconds
+
+# 🚦 Öncelik şeritleri: küçük sayı önce gönderilir
+PRIORITIES = {
+    "signal": 0,
+    "status": 1,
+    "diagnostic": 2,
+}
+
+# Telegram limitleri: https://core.telegram.org/bots/faq#my-bot-is-hitting-limits-how-do-i-avoid-this
+GLOBAL_RATE = 30  # mesaj / saniye (tüm chatler)
+CHAT_RATE = 1  # mesaj / saniye (tek chat)
+GROUP_RATE_PER_MINUTE = 20  # mesaj / dakika (grup ve kanallar)
+WORKERS = 4
+MAX_RETRIES = 3  # ağ hataları için (RetryAfter bu sayıya dahil değil)
+MAX_RETRY_AFTER = 5  # aynı mesaj için en fazla RetryAfter tekrar denemesi
+RETRY_BACKOFF = 2.0  # saniye, her denemede iki katına çıkar
+LATENCY_HISTORY = 1000
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    """RetryAfter.retry_after int veya timedelta olabilir"""
+    value = error.retry_after
+    return value.total_seconds() if hasattr(value, "total_seconds") else float(value)
+
+
+class RateLimiter:
+    """Basit asenkron token bucket: `per` saniyede `rate` istek"""
+
+    def __init__(self, rate: float, per: float = 1.0, burst: Union[float, None] = None):
+        self.rate = rate
+        self.per = per
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def block(self, seconds: float):
+        """Telegram RetryAfter döndüğünde limiti verilen süre boyunca kapat"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+    def delay(self) -> float:
+        """Bir sonraki token'a kadar beklenecek süre (sn); 0 ise hemen alınabilir"""
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate / self.per)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) * self.per / self.rate
+
+    def take(self):
+        """delay() 0 döndükten sonra (arada await olmadan) token'ı düşer"""
+        self.tokens -= 1
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate / self.per)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) * self.per / self.rate)
+
+
+@dataclass
+class OutboundMessage:
+    """Kuyruktaki tek bir chat'e gidecek mesaj"""
+    chat_id: str
+    text: str
+    chart_path: Union[str, None] = None
+    as_photo: bool = False
+    media: Any = None  # chatler arasında paylaşılan yükleme (lib.sms.sms.SharedMedia)
+    priority: str = "status"
+    label: str = ""
+    attempts: int = 0
+    rate_limited: int = 0  # alınan RetryAfter sayısı
+    reserved: bool = False  # chat limitinden token zaten alındı (bekletmeden çıkan mesaj)
+    enqueued_at: float = field(default_factory=time.monotonic)
+    future: Union[asyncio.Future, None] = None
+
+
+class QueueStopped(Exception):
+    """Kuyruk durdurulduğunda gönderilmeden bırakılan mesajların future'larına verilir"""
+
+
+def message_endpoint(message: OutboundMessage) -> str:
+    """Mesajın gideceği Bot API metodu (metrik etiketi)"""
+    if not message.chart_path:
+        return "sendMessage"
+    return "sendPhoto" if message.as_photo else "sendDocument"
+
+
+class OutboundQueue:
+    """
+    Telegram Bot API önünde öncelikli, hız limitli gönderim kuyruğu.
+    Strateji kodu submit() ile mesajı bırakır ve hemen devam eder; gönderimi worker'lar yapar.
+    """
+
+    def __init__(self, send_func: Callable[[OutboundMessage], Awaitable[Any]], workers: int = WORKERS,
+                 global_rate: float = GLOBAL_RATE, chat_rate: float = CHAT_RATE,
+                 group_rate_per_minute: float = GROUP_RATE_PER_MINUTE, max_retries: int = MAX_RETRIES):
+        self.send_func = send_func
+        self.workers = workers
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.group_rate_per_minute = group_rate_per_minute
+        self.max_retries = max_retries
+
+        self._loop = None
+        self._queue = None
+        self._tasks: List[asyncio.Task] = []
+        self._seq = itertools.count()
+        self._global_limiter = None
+        self._chat_limiters: Dict[str, List[RateLimiter]] = {}
+        # Chat limiti dolu olan mesajlar worker tutmadan chat başına burada bekler
+        self._parked: Dict[str, List[Tuple[int, int, OutboundMessage]]] = {}
+        self._release_handles: Dict[str, asyncio.TimerHandle] = {}
+        # Ağ hatası sonrası tekrar denemeyi bekleyenler: id(mesaj) -> (zamanlayıcı, mesaj)
+        self._retrying: Dict[int, Tuple[asyncio.TimerHandle, OutboundMessage]] = {}
+        self._pending = 0  # kuyrukta veya tekrar denemeyi bekleyen mesaj sayısı
+        self._idle = None
+
+        # Metrikler
+        self.depth = {lane: 0 for lane in PRIORITIES}
+        self.sent = {lane: 0 for lane in PRIORITIES}
+        self.failed = {lane: 0 for lane in PRIORITIES}
+        self.dropped = {lane: 0 for lane in PRIORITIES}  # kuyruk durdurulurken gönderilmeden kalanlar
+        self.retried = 0
+        self.rate_limited = 0
+        self.latencies: Dict[str, Deque[float]] = {lane: deque(maxlen=LATENCY_HISTORY) for lane in PRIORITIES}
+
+    # --------------------------
+    # Yaşam döngüsü
+    # --------------------------
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        # Yeni event loop (ör. asyncio.run tekrar çağrıldı): kuyruğu ve limitleri yeniden kur.
+        # stop() çağrılmadan loop değiştiyse eski kuyrukta kalanlar sessizce kaybolmasın
+        self._drop_pending()
+        self._loop = loop
+        self._queue = asyncio.PriorityQueue()
+        self._global_limiter = RateLimiter(self.global_rate)
+        self._chat_limiters = {}
+        self._pending = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.depth = {lane: 0 for lane in PRIORITIES}
+        self._tasks = [loop.create_task(self._worker(i), name=f"telegram-outbound-{i}") for i in range(self.workers)]
+
+    async def join(self, timeout: Union[float, None] = None):
+        """Kuyruktaki tüm mesajlar gönderilene kadar bekle"""
+        if self._idle is None:
+            return
+        await asyncio.wait_for(self._idle.wait(), timeout)
+
+    async def stop(self, drain: bool = True, timeout: Union[float, None] = 10):
+        """Worker'ları durdur; drain=True ise önce kuyruğu boşalt"""
+        if drain:
+            try:
+                await self.join(timeout)
+            except asyncio.TimeoutError:
+                logging.warning(f"⚠️ Telegram kuyruğu {timeout} sn içinde boşalmadı, kalan mesajlar: {sum(self.depth.values())}")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._drop_pending()
+
+    def _drop_pending(self):
+        """
+        Kuyrukta, chat yığınlarında ve tekrar denemede kalan mesajları bırakır: bırakılan mesajlar şerit başına
+        `dropped` olarak sayılır, loglanır ve future'ları QueueStopped ile tamamlanır.
+        """
+        for handle in self._release_handles.values():
+            handle.cancel()
+        self._release_handles = {}
+        # Yığındakiler ve kuyruktakiler derinliğe dahil, tekrar denemeyi bekleyenler değil
+        queued = [message for parked in self._parked.values() for _, _, message in parked]
+        self._parked = {}
+        while self._queue is not None and not self._queue.empty():
+            queued.append(self._queue.get_nowait()[2])
+        for message in queued:
+            self.depth[message.priority] -= 1
+        messages = queued + [message for _, message in self._retrying.values()]
+        for handle, _ in self._retrying.values():
+            handle.cancel()
+        self._retrying = {}
+        if not messages:
+            return
+        error = QueueStopped("Telegram kuyruğu durduruldu")
+        for message in messages:
+            self.dropped[message.priority] += 1
+            self._done()
+            future = message.future
+            if future is not None and not future.done() and not future.get_loop().is_closed():
+                future.set_exception(error)
+                future.exception()
+        lanes = ", ".join(f"{lane} {count}" for lane, count in self.dropped.items() if count)
+        logging.warning(f"⚠️ Telegram kuyruğu durduruldu, {len(messages)} mesaj gönderilmeden bırakıldı (toplam: {lanes})")
+
+    # --------------------------
+    # Kuyruğa ekleme
+    # --------------------------
+
+    def submit(self, message: OutboundMessage) -> asyncio.Future:
+        """Mesajı kuyruğa ekler ve hemen döner. Dönen future gönderim sonucunu taşır."""
+        if message.priority not in PRIORITIES:
+            raise ValueError(f"Geçersiz öncelik: {message.priority} (seçenekler: {', '.join(PRIORITIES)})")
+        self._ensure_started()
+        message.future = self._loop.create_future()
+        message.enqueued_at = time.monotonic()
+        self._pending += 1
+        self._idle.clear()
+        self._put(message)
+        return message.future
+
+    def _put(self, message: OutboundMessage):
+        self.depth[message.priority] += 1
+        self._queue.put_nowait((PRIORITIES[message.priority], next(self._seq), message))
+
+    # --------------------------
+    # Gönderim
+    # --------------------------
+
+    def _limiters_for(self, chat_id: str) -> List[RateLimiter]:
+        limiters = self._chat_limiters.get(chat_id)
+        if limiters is None:
+            limiters = [RateLimiter(self.chat_rate)]
+            # Grup/kanal chat id'leri negatiftir
+            if str(chat_id).startswith("-"):
+                limiters.append(RateLimiter(self.group_rate_per_minute, per=60, burst=3))
+            self._chat_limiters[chat_id] = limiters
+        return limiters
+
+    def _chat_delay(self, chat_id: str) -> float:
+        return max(limiter.delay() for limiter in self._limiters_for(chat_id))
+
+    def _park(self, message: OutboundMessage):
+        """
+        Chat limiti dolu: mesajı worker'da bekletmek yerine chat'in bekleme yığınına koy.
+        Böylece kısıtlanan bir chat (ör. log grubu) worker'ları tıkamaz, diğer chatler ve
+        öncelikli şeritler akmaya devam eder. Yığın içinde de öncelik sırası korunur.
+        """
+        self.depth[message.priority] += 1
+        parked = self._parked.setdefault(message.chat_id, [])
+        heapq.heappush(parked, (PRIORITIES[message.priority], next(self._seq), message))
+        self._schedule_release(message.chat_id)
+
+    def _schedule_release(self, chat_id: str):
+        if chat_id in self._release_handles or not self._parked.get(chat_id):
+            return
+        self._release_handles[chat_id] = self._loop.call_later(self._chat_delay(chat_id), self._release, chat_id)
+
+    def _release(self, chat_id: str):
+        """Chat limiti açıldığında yığının başındaki mesajı token'ı alınmış olarak kuyruğa geri koy"""
+        self._release_handles.pop(chat_id, None)
+        parked = self._parked.get(chat_id)
+        if not parked:
+            return
+        if self._chat_delay(chat_id) <= 0:
+            _, _, message = heapq.heappop(parked)
+            if not parked:
+                del self._parked[chat_id]
+            for limiter in self._limiters_for(chat_id):
+                limiter.take()
+            message.reserved = True
+            self.depth[message.priority] -= 1
+            self._put(message)
+        self._schedule_release(chat_id)
+
+    async def _worker(self, worker_id: int):
+        while True:
+            _, _, message = await self._queue.get()
+            self.depth[message.priority] -= 1
+            try:
+                await self._deliver(message)
+            except asyncio.CancelledError:
+                # stop() gönderim sürerken worker'ı iptal etti: mesaj bırakılanlara eklenir
+                self.depth[message.priority] += 1
+                self._queue.put_nowait((PRIORITIES[message.priority], next(self._seq), message))
+                raise
+            except Exception as e:
+                logging.error(f"❌ Telegram worker {worker_id} hatası: {e}")
+                self._fail(message, e)
+
+    async def _deliver(self, message: OutboundMessage):
+        limiters = self._limiters_for(message.chat_id)
+        if not message.reserved:
+            # Aynı chat'te bekleyen varsa sırayı bozma
+            if message.chat_id in self._parked or self._chat_delay(message.chat_id) > 0:
+                self._park(message)
+                return
+            for limiter in limiters:
+                limiter.take()
+        message.reserved = False
+        await self._global_limiter.acquire()
+
+        message.attempts += 1
+        endpoint = message_endpoint(message)
+        started = time.perf_counter()
+        try:
+            result = await self.send_func(message)
+        except RetryAfter as e:
+            http_requests.inc("telegram", endpoint, "rate_limited")
+            http_retries.inc("telegram", "rate_limited")
+            seconds = retry_after_seconds(e)
+            self.rate_limited += 1
+            message.rate_limited += 1
+            for limiter in limiters:
+                limiter.block(seconds)
+            if message.rate_limited > MAX_RETRY_AFTER:
+                self._fail(message, e)
+                return
+            logging.warning(f"⏳ Telegram hız limiti ({message.chat_id}): {seconds:.0f} sn sonra tekrar denenecek")
+            # Chat limiti blok süresince kapalı: mesaj chat'in yığınında bekler
+            self.retried += 1
+            self._park(message)
+        except (BadRequest, Forbidden) as e:
+            # Tekrar denemek sonucu değiştirmez
+            http_requests.inc("telegram", endpoint, "rejected")
+            self._fail(message, e)
+        except NetworkError as e:
+            http_requests.inc("telegram", endpoint, "network_error")
+            if message.attempts > self.max_retries:
+                self._fail(message, e)
+            else:
+                http_retries.inc("telegram", "network_error")
+                delay = RETRY_BACKOFF * 2 ** (message.attempts - 1)
+                logging.warning(f"🔁 Telegram ağ hatası ({message.chat_id}): {e} - {delay:.1f} sn sonra tekrar denenecek")
+                self._requeue(message, delay)
+        else:
+            http_seconds.observe(time.perf_counter() - started, "telegram", endpoint)
+            http_requests.inc("telegram", endpoint, "ok")
+            latency = time.monotonic() - message.enqueued_at
+            self.sent[message.priority] += 1
+            self.latencies[message.priority].append(latency)
+            if not message.future.done():
+                message.future.set_result(result)
+            self._done()
+
+    def _requeue(self, message: OutboundMessage, delay: float):
+        # Worker'ı bekletmemek için zamanlayıcı ile geri koy (mesaj hâlâ "pending" sayılır)
+        self.retried += 1
+        self._retrying[id(message)] = (self._loop.call_later(delay, self._retry, message), message)
+
+    def _retry(self, message: OutboundMessage):
+        self._retrying.pop(id(message), None)
+        self._put(message)
+
+    def _done(self):
+        self._pending -= 1
+        if self._pending <= 0:
+            self._pending = 0
+            self._idle.set()
+
+    def _fail(self, message: OutboundMessage, error: Exception):
+        self._done()
+        self.failed[message.priority] += 1
+        logging.error(f"❌ Mesaj gönderilemedi ({message.label or message.chat_id}): {error}")
+        if message.future is not None and not message.future.done():
+            message.future.set_exception(error)
+            # Kimse beklemiyorsa "exception never retrieved" uyarısını bastır
+            message.future.exception()
+
+    # --------------------------
+    # Metrikler
+    # --------------------------
+
+    def metrics(self) -> Dict[str, Any]:
+        """Şerit bazında kuyruk derinliği, gönderim sayıları ve gecikme yüzdelikleri (sn)"""
+        lanes = {}
+        for lane in PRIORITIES:
+            values = sorted(self.latencies[lane])
+            lanes[lane] = {
+                "depth": self.depth[lane],
+                "sent": self.sent[lane],
+                "failed": self.failed[lane],
+                "dropped": self.dropped[lane],
+                "latency_p50": _percentile(values, 50),
+                "latency_p95": _percentile(values, 95),
+                "latency_max": values[-1] if values else None,
+            }
+        return {
+            "depth": sum(self.depth.values()),
+            "pending": self._pending,
+            "retried": self.retried,
+            "rate_limited": self.rate_limited,
+            "lanes": lanes,
+        }
+
+
+def _percentile(sorted_values: List[float], pct: float) -> Union[float, None]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
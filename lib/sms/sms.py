@@ -4,9 +4,14 @@ import os
 from pathlib import Path
 sys.path.append('..')
 
-from telegram import Bot, InputFile
+from telegram import InputFile
 from dotenv import load_dotenv
 
+from lib.sms.client import BotClient
+from lib.sms.fake_api import DEFAULT_PORT as FAKE_API_PORT
+from lib.metrics import registry
+from lib.sms.queue import OutboundMessage, OutboundQueue
+
 # .env dosyasını yükle (proje root'undan)
 env_path = Path(__file__).parent.parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
@@ -25,10 +30,32 @@ else:
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 
+# 🧪 Dry-run: mesajlar gerçek Telegram yerine yerel sahte Bot API'ye gider (lib/sms/fake_api.py)
+DRY_RUN = os.getenv("TELEGRAM_DRY_RUN", "").strip().lower() in ("1", "true", "yes")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL") or None
+if DRY_RUN:
+    TELEGRAM_API_URL = TELEGRAM_API_URL or f"http://127.0.0.1:{FAKE_API_PORT}/bot"
+    BOT_TOKEN = BOT_TOKEN or "123456:dry-run"
+    SIGNAL_CHAT_ID = SIGNAL_CHAT_ID or "-1001"
+    SIGNAL_LOG_CHAT_ID = SIGNAL_LOG_CHAT_ID or "-1002"
+
+# 📮 Sadece iletim: bu süreç Telegram'a bağlanmaz, mesajlar set_message_sink ile başka sürece iletilir
+# (ör. lib/shard.py worker'ları). Token ve chat id'ler teslimat sürecinde gereklidir.
+FORWARD_ONLY = os.getenv("TELEGRAM_FORWARD_ONLY", "").strip().lower() in ("1", "true", "yes")
+if FORWARD_ONLY:
+    BOT_TOKEN = BOT_TOKEN or "0:forward-only"
+    SIGNAL_CHAT_ID = SIGNAL_CHAT_ID or "forward:signal"
+    SIGNAL_LOG_CHAT_ID = SIGNAL_LOG_CHAT_ID or "forward:log"
+
 if not BOT_TOKEN or not SIGNAL_CHAT_ID or not SIGNAL_LOG_CHAT_ID:
     raise ValueError("❌ BOT_TOKEN, SIGNAL_CHAT_ID ve SIGNAL_LOG_CHAT_ID .env dosyasında tanımlanmalı!")
 
-bot = Bot(token=BOT_TOKEN)
+# Süreç genelinde paylaşılan, açıkça başlatılıp kapatılan Telegram istemcisi
+bot_client = BotClient(
+    token=BOT_TOKEN,
+    base_url=TELEGRAM_API_URL,
+    base_file_url=TELEGRAM_API_URL.replace("/bot", "/file/bot") if TELEGRAM_API_URL else None,
+)
 
 # Available chat IDs dictionary
 CHAT_IDS = {
@@ -36,7 +63,99 @@ CHAT_IDS = {
     "log": SIGNAL_LOG_CHAT_ID,
 }
 
-async def send_message(text, chat_types=None, chart_path=None):
+def _normalize_chat_types(chat_types):
+    # Default: sadece log chat'e gönder
+    if chat_types is None:
+        return ["log"]
+    # String ise liste yap
+    if isinstance(chat_types, str):
+        return [chat_types]
+    return chat_types
+
+# 📎 Medya yükleme istatistikleri (upload-once / file_id yeniden kullanım)
+MEDIA_STATS = {
+    "uploads": 0,
+    "reuses": 0,
+    "bytes_uploaded": 0,
+}
+
+class SharedMedia:
+    """
+    Birden fazla chat'e gidecek tek bir grafik dosyası.
+    İlk gönderim dosyayı yükler, Telegram'ın döndürdüğü file_id diğer chatlerde yeniden kullanılır.
+    """
+
+    def __init__(self, path, as_photo=False):
+        self.path = path
+        self.as_photo = as_photo
+        self.file_id = None
+        self._lock = asyncio.Lock()
+
+    async def send(self, chat_id, caption):
+        if self.file_id is None:
+            async with self._lock:
+                # Kilidi bekleyen diğer gönderimler, ilk yüklemenin file_id'sini kullanır
+                if self.file_id is None:
+                    bot = await bot_client.get()
+                    with open(self.path, "rb") as f:
+                        data = f.read()
+                    if self.as_photo:
+                        result = await bot.send_photo(chat_id, photo=InputFile(data, filename=os.path.basename(self.path)), caption=caption)
+                        self.file_id = result.photo[-1].file_id if result.photo else None
+                    else:
+                        result = await bot.send_document(chat_id, document=InputFile(data, filename=os.path.basename(self.path)), caption=caption)
+                        self.file_id = result.document.file_id if result.document else None
+                    MEDIA_STATS["uploads"] += 1
+                    MEDIA_STATS["bytes_uploaded"] += len(data)
+                    return result
+
+        MEDIA_STATS["reuses"] += 1
+        bot = await bot_client.get()
+        if self.as_photo:
+            return await bot.send_photo(chat_id, photo=self.file_id, caption=caption)
+        return await bot.send_document(chat_id, document=self.file_id, caption=caption)
+
+async def _send_to_chat(message: OutboundMessage):
+    """Tek bir chat'e gönderim - hatalar çağırana (send_message / kuyruk) iletilir"""
+    if message.media is not None:
+        return await message.media.send(message.chat_id, message.text)
+    if message.chart_path:
+        return await SharedMedia(message.chart_path, message.as_photo).send(message.chat_id, message.text)
+    bot = await bot_client.get()
+    return await bot.send_message(message.chat_id, text=message.text)
+
+async def start_bot():
+    """Telegram istemcisini başlat ve bağlantıları ısıt (strateji başında çağrılması önerilir)"""
+    if FORWARD_ONLY:
+        return None
+    return await bot_client.start()
+
+async def get_bot():
+    """Paylaşılan Bot nesnesi (gerekirse başlatılır)"""
+    return await bot_client.get()
+
+async def shutdown_bot(timeout=10):
+    """Kuyruğu boşalt ve Telegram bağlantılarını kapat"""
+    await outbound_queue.stop(drain=True, timeout=timeout)
+    await bot_client.shutdown()
+
+# Strateji döngüsünü bekletmeyen öncelikli gönderim kuyruğu
+outbound_queue = OutboundQueue(_send_to_chat)
+registry.gauge("bot_telegram_queue_depth", "Telegram kuyruğunda bekleyen mesaj sayısı", ("priority",),
+               callback=lambda: {(lane,): depth for lane, depth in outbound_queue.depth.items()})
+
+# enqueue_message çağrılarını kuyruk yerine başka bir sürece iletmek için (lib/shard.py)
+_message_sink = None
+
+def set_message_sink(sink):
+    """
+    sink(text=..., chat_types=..., chart_path=..., as_photo=..., priority=...) verilirse
+    enqueue_message mesajları kuyruğa eklemek yerine sink'e iletir. None ile kapatılır.
+    """
+    global _message_sink
+    _message_sink = sink
+
+async def send_message(text, chat_types=None, chart_path=None, as_photo=False):
     """
     Telegram mesaj gönderme fonksiyonu
     
@@ -45,33 +164,84 @@ async def send_message(text, chat_types=None, chart_path=None):
         chat_types: Liste veya string. Örnek: ["signal", "log"] veya "signal" 
                    None ise sadece log chat'e gönderilir
         chart_path: Opsiyonel grafik dosyası yolu
+        as_photo: True ise grafik fotoğraf olarak (send_photo), değilse dosya olarak (send_document) gönderilir.
+                  WebP grafikler dosya olarak sticker gibi göründüğü için her zaman fotoğraf olarak gönderilir.
+
+    Tüm chatlere aynı anda gönderilir; grafik bir kez yüklenir, diğer chatlerde file_id kullanılır.
     """
-    # Default: sadece log chat'e gönder
-    if chat_types is None:
-        chat_types = ["log"]
-    
-    # String ise liste yap
-    if isinstance(chat_types, str):
-        chat_types = [chat_types]
-    
-    # Her chat'e gönder
+    chat_types = _normalize_chat_types(chat_types)
+
+    if chart_path and str(chart_path).lower().endswith(".webp"):
+        as_photo = True
+    media = SharedMedia(chart_path, as_photo) if chart_path else None
+
+    async def send_one(chat_type, chat_id):
+        try:
+            await _send_to_chat(OutboundMessage(chat_id=chat_id, text=text, chart_path=chart_path, as_photo=as_photo, media=media))
+            print(f"✅ Mesaj gönderildi: {chat_type} ({chat_id})")
+        except Exception as e:
+            print(f"❌ Mesaj gönderilemedi ({chat_type}): {e}")
+
+    # Her chat'e paralel gönder
+    sends = []
     for chat_type in chat_types:
         chat_id = CHAT_IDS.get(chat_type)
         
         if not chat_id:
             print(f"⚠️ Geçersiz chat type: {chat_type}")
             continue
-            
-        try:
-            if chart_path:
-                with open(chart_path, "rb") as f:
-                    await bot.send_document(chat_id, document=InputFile(f), caption=text)
-            else:
-                await bot.send_message(chat_id, text=text)
-            
-            print(f"✅ Mesaj gönderildi: {chat_type} ({chat_id})")
-        except Exception as e:
-            print(f"❌ Mesaj gönderilemedi ({chat_type}): {e}")
+        sends.append(send_one(chat_type, chat_id))
+
+    await asyncio.gather(*sends)
+
+def enqueue_message(text, chat_types=None, chart_path=None, as_photo=False, priority="status"):
+    """
+    Mesajı gönderim kuyruğuna ekler ve hemen döner (await gerekmez, çalışan bir event loop gerekir).
+
+    Args:
+        text, chat_types, chart_path, as_photo: send_message ile aynı
+        priority: "signal" (en önce), "status" veya "diagnostic" (en son)
+
+    Returns:
+        Her chat için gönderim sonucunu taşıyan asyncio.Future listesi (sink varsa boş liste)
+    """
+    chat_types = _normalize_chat_types(chat_types)
+
+    if _message_sink is not None:
+        _message_sink(text=text, chat_types=chat_types, chart_path=chart_path, as_photo=as_photo, priority=priority)
+        return []
+
+    if chart_path and str(chart_path).lower().endswith(".webp"):
+        as_photo = True
+    # Tüm chatler aynı SharedMedia'yı paylaşır: grafik bir kez yüklenir
+    media = SharedMedia(chart_path, as_photo) if chart_path else None
+
+    futures = []
+    for chat_type in chat_types:
+        chat_id = CHAT_IDS.get(chat_type)
+        if not chat_id:
+            print(f"⚠️ Geçersiz chat type: {chat_type}")
+            continue
+        futures.append(outbound_queue.submit(OutboundMessage(
+            chat_id=chat_id,
+            text=text,
+            chart_path=chart_path,
+            as_photo=as_photo,
+            media=media,
+            priority=priority,
+            label=chat_type,
+        )))
+    return futures
+
+async def flush_messages(timeout=10):
+    """Kuyruktaki mesajlar gönderilene kadar bekle (kapanıştan önce çağrılmalı)"""
+    await outbound_queue.stop(drain=True, timeout=timeout)
+
+def get_queue_metrics():
+    """Kuyruk derinliği, gönderim/hata sayıları, gecikme yüzdelikleri ve medya yükleme istatistikleri"""
+    metrics = outbound_queue.metrics()
+    metrics["media"] = dict(MEDIA_STATS)
+    return metrics
 
 async def test_text_message(chat_types=["log"]):
     """Basit metin mesajı testi - tek chat'e gönderir"""
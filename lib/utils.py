@@ -1,56 +1,48 @@
-import requests
+import asyncio
 import pandas as pd
 import logging
 from typing import Union, Literal, Tuple
 import mplfinance as mpf
 from datetime import datetime
+from lib.candles import CandleSeries, parse_rows
+from lib.chart import ChartFormat, chart_engine, downsample_ohlc
+from lib.fetch import bitget
 
 # api.bitget.com
 # [1min,3min,5min,15min,30min,1h,4h,6h,12h,1day,1week,1M,6Hutc,12Hutc,1Dutc,3Dutc,1Wutc,1Mutc]
 GranularityType = Literal["1min", "3min", "5min", "15min", "30min", "1h", "4h", "6h", "12h", "1day", "1week", "1M", "6Hutc", "12Hutc", "1Dutc", "3Dutc", "1Wutc", "1Mutc"]
-# 📈 Bitget’ten mumları alma (requests.get ile)
+# 📈 Bitget’ten mumları alma (lib.fetch ile)
 def get_candles(symbol: str = "BTCUSDT", granularity: GranularityType = "15min", limit: int = 200) -> Union[pd.DataFrame, None]:
-    url = f"https://api.bitget.com/api/v2/spot/market/candles?symbol={symbol}&granularity={granularity}&limit={limit}"
+    series = get_candle_series(symbol=symbol, granularity=granularity, limit=limit)
+    return None if series is None else series.frame()
+
+# 🕯️ Mumları kompakt seri olarak alma (lib.cache bunu kullanır; capacity: tutulacak en fazla mum sayısı)
+# İstek lib.fetch üzerinden: ayna adresleri (BITGET_BASE_URLS), devre kesici, yedek istek ve döngü süresi bütçesi
+def get_candle_series(symbol: str = "BTCUSDT", granularity: GranularityType = "15min", limit: int = 200, capacity: Union[int, None] = None) -> Union[CandleSeries, None]:
+    data = bitget.get("/api/v2/spot/market/candles", {"symbol": symbol, "granularity": granularity, "limit": limit})
+    if data is None:
+        return None
     try:
-        resp = requests.get(url, timeout=15)
-        data = resp.json()
-        if "data" in data and isinstance(data["data"], list) and len(data["data"]) > 0:
-            # Data format may be list of lists (timestamp,open,high,low,close,volume,...)
-            # Ensure we convert correctly.
-            df = pd.DataFrame(data["data"])
-            # If API returns more than 6 columns, take first 6 expected columns
-            # Normalize to: timestamp, open, high, low, close, volume, quote_volume, quote_volume_repeat
-            if df.shape[1] >= 8:
-                df = df.iloc[:, :8]
-                df.columns = ["timestamp", "open", "high", "low", "close", "volume","quote_volume","quote_volume_repeat"]
-            else:
-                return None
+        return parse_candle_series(data, symbol=symbol, granularity=granularity, capacity=capacity or limit)
+    except Exception as e:
+        logging.warning(f"⚠️ {symbol} mum yanıtı işlenemedi: {e}")
+        return None
 
-            # convert types reliably
-            df = df.dropna()
-            df["open"] = pd.to_numeric(df["open"], errors="coerce")
-            df["high"] = pd.to_numeric(df["high"], errors="coerce")
-            df["low"] = pd.to_numeric(df["low"], errors="coerce")
-            df["close"] = pd.to_numeric(df["close"], errors="coerce")
-            df["volume"] = pd.to_numeric(df["volume"], errors="coerce")
-            df["quote_volume"] = pd.to_numeric(df["quote_volume"], errors="coerce")
-            df["quote_volume_repeat"] = pd.to_numeric(df["quote_volume_repeat"], errors="coerce")
-            
-            # timestamps from API might be in ms or seconds or strings — try to coerce
-            try:
-                df["timestamp"] = pd.to_datetime(pd.to_numeric(df["timestamp"]), unit="ms", utc=True)
-            except Exception:
-                try:
-                    df["timestamp"] = pd.to_datetime(pd.to_numeric(df["timestamp"]), unit="s", utc=True)
-                except Exception:
-                    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", utc=True)
+# 🧾 Bitget mum yanıtını DataFrame'e çevirme (get_candles ve benchmark fixture'ları kullanır)
+# Kolonlar: open, high, low, close, volume, quote_volume (tekrarlanan quote_volume kolonu atılır)
+def parse_candles(data: dict, symbol: str = "BTCUSDT", granularity: GranularityType = "15min") -> Union[pd.DataFrame, None]:
+    series = parse_candle_series(data, symbol=symbol, granularity=granularity)
+    return None if series is None else series.frame()
 
-            df.set_index("timestamp", inplace=True)
-            df = df.sort_index()
-            return df
-        else:
+def parse_candle_series(data: dict, symbol: str = "BTCUSDT", granularity: GranularityType = "15min", capacity: Union[int, None] = None) -> Union[CandleSeries, None]:
+    if "data" in data and isinstance(data["data"], list) and len(data["data"]) > 0:
+        # Satırlar: timestamp, open, high, low, close, volume, quote_volume, quote_volume (en az 8 alan)
+        parsed = parse_rows(data["data"])
+        if parsed is None:
             return None
-    except Exception as e:
+        times, values = parsed
+        return CandleSeries.from_arrays(times, values, symbol=symbol, granularity=granularity, capacity=capacity)
+    else:
         return None
 
 # 🎯 TP / SL hesaplama
@@ -70,8 +62,26 @@ def get_tp_and_sl(df : pd.DataFrame, signal : str, tp_percent: float = 0.5, sl_p
     return round(tp, 5) if tp else None, round(sl, 5) if sl else None
 
 # 📈 Grafik çizme (TP/SL dahil)
-async def get_chart(df : pd.DataFrame, strategy_name: str = "", granularity: GranularityType = "15min", tp: Union[float, None] = None, sl: Union[float, None] = None, symbol: str = "COIN") -> str:
-    path = f"temp/{strategy_name}_{symbol}_{granularity}_chart.png"
+# renderer="fast": önceden kurulmuş figürü yeniden kullanan lib.chart motoru
+# renderer="mplfinance": eski mpf.plot yolu (karşılaştırma / yedek için)
+# max_bytes: hedef dosya boyutu (byte). Aşılırsa palet PNG / düşük WebP kalitesi / düşük DPI denenir.
+# fmt="webp" daha küçük dosya üretir ama sadece fotoğraf olarak gönderilmeli (send_message(as_photo=True))
+async def get_chart(df : pd.DataFrame, strategy_name: str = "", granularity: GranularityType = "15min", tp: Union[float, None] = None, sl: Union[float, None] = None, symbol: str = "COIN", renderer: Literal["fast", "mplfinance"] = "fast", max_bars: Union[int, None] = None, fmt: ChartFormat = "png", max_bytes: Union[int, None] = None, palette: bool = False, dpi: Union[int, None] = None) -> str:
+    path = f"temp/{strategy_name}_{symbol}_{granularity}_chart.{fmt if renderer == 'fast' else 'png'}"
+    if max_bars:
+        df = downsample_ohlc(df, max_bars)
+
+    if renderer == "fast":
+        # Çizim thread'de: event loop (mum çekme, Telegram kuyruğu) bu sırada çalışmaya devam eder
+        render = await asyncio.to_thread(chart_engine.render, df, path, granularity=granularity, tp=tp, sl=sl,
+                                         title=f"{symbol} {granularity}", fmt=fmt, max_bytes=max_bytes,
+                                         palette=palette, dpi=dpi)
+        logging.debug(f"🖼️ {symbol} grafik: {render.bytes / 1024:.1f} KB {render.format} {render.width}x{render.height} "
+                      f"(çizim {render.render_ms:.0f} ms, kodlama {render.encode_ms:.0f} ms, {render.attempts} deneme)")
+        if not render.within_budget:
+            logging.warning(f"⚠️ {symbol} grafiği boyut bütçesini aştı: {render.bytes} > {max_bytes} byte")
+        return render.path
+
     add_lines = []
     if tp:
         add_lines.append(
@@ -0,0 +1,157 @@
+import logging
+import time
+from collections import Counter
+from typing import Dict, List, Union
+
+from lib.metrics import cycle_budget, cycle_late_seconds, watchdog_alerts
+
+# ⏲️ Döngü süresi bekçisi ayarları
+WATCHDOG_WARN_RATIO = 0.5  # döngü işi periyodun bu oranını geçerse "bütçe risk altında" uyarısı
+WATCHDOG_LATE_SECONDS = 60.0  # döngü planlanandan bu kadar geç başlarsa kayma uyarısı
+WATCHDOG_FETCH_SHARE = 0.5  # bir coinin mum çekmesi döngü süresinin bu oranını geçerse...
+WATCHDOG_FETCH_MIN_SECONDS = 5.0  # ...ve bu süreden uzunsa...
+WATCHDOG_FETCH_STREAK = 3  # ...art arda bu kadar döngüde tekrarlanırsa coin işaretlenir
+WATCHDOG_ALERT_COOLDOWN = 30 * 60  # sn: aynı uyarı log chat'e en sık bu aralıkla gönderilir
+WATCHDOG_TOP = 5  # uyarıda gösterilen coin sayısı
+FETCH_STAGE = "fetch"
+
+
+def _format_coin(coin: str, stages: Dict[str, float]) -> str:
+    parts = " ".join(f"{stage} {seconds:.1f}" for stage, seconds in sorted(stages.items(), key=lambda item: -item[1]))
+    return f"{coin} {sum(stages.values()):.1f} sn ({parts})"
+
+
+class CycleWatchdog:
+    """
+    Strateji döngülerini periyot bütçesine göre izler.
+    begin() döngü başında, end(item_seconds) sonunda çağrılır; item_seconds coin -> aşama -> sn
+    (lib.pipeline.Pipeline.item_seconds). Her döngü için:
+    - iş süresi / periyot oranı (bot_cycle_budget_ratio) ve başlangıç kayması ölçülür,
+    - oran WATCHDOG_WARN_RATIO'yu geçerse coin bazında süre katkıları biriktirilir ve log chat'e uyarı gider,
+    - mum çekmesi art arda döngünün çoğunu yiyen coinler işaretlenir.
+    remaining() sabit hızlı döngüde periyodun kalanını verir (uyku iş süresi kadar kısalır, kayma birikmez).
+    """
+
+    def __init__(self, name: str, period: float, warn_ratio: float = WATCHDOG_WARN_RATIO,
+                 late_seconds: float = WATCHDOG_LATE_SECONDS, cooldown: float = WATCHDOG_ALERT_COOLDOWN):
+        self.name = name
+        self.period = period
+        self.warn_ratio = warn_ratio
+        self.late_seconds = late_seconds
+        self.cooldown = cooldown
+        self.cycles = 0
+        self.overruns = 0  # periyodu aşan döngüler
+        self.at_risk = 0  # uyarı oranını aşan döngüler
+        self.last_ratio = 0.0
+        self.last_late = 0.0
+        # Bütçeyi zorlayan döngülerde coin başına harcanan toplam süre
+        self.overrun_seconds: Counter = Counter()
+        self.fetch_streaks: Dict[str, int] = {}
+        self.flagged: List[str] = []
+        self._started: Union[float, None] = None
+        self._expected: Union[float, None] = None
+        self._alerted: Dict[str, float] = {}
+
+    def begin(self, late: Union[float, None] = None):
+        """
+        Döngü başlangıcını kaydeder. late: planlanan zamandan gecikme (sn, ör. uyarlanabilir taramada
+        AdaptiveScheduler.lateness()); verilmezse bir önceki döngü başlangıcı + periyot beklenen zaman sayılır.
+        """
+        now = time.monotonic()
+        if late is None:
+            late = max(0.0, now - self._expected) if self._expected is not None else 0.0
+        self._started = now
+        self._expected = now + self.period
+        self.last_late = late
+        cycle_late_seconds.set(late, self.name)
+        if late >= self.late_seconds:
+            message = f"⏲️ {self.name} döngüsü planlanandan {late:.0f} sn geç başladı (periyot {self.period:.0f} sn)"
+            logging.warning(message)
+            self._alert("late", message)
+
+    def remaining(self) -> float:
+        """Periyodun kalanı (sn): sabit hızlı döngüde bir sonraki begin()'e kadar beklenecek süre"""
+        if self._started is None:
+            return self.period
+        return max(0.0, self.period - (time.monotonic() - self._started))
+
+    def end(self, item_seconds: Union[Dict[str, Dict[str, float]], None] = None,
+            elapsed: Union[float, None] = None) -> float:
+        """Döngüyü bitirir, bütçe oranını (iş süresi / periyot) döndürür"""
+        if elapsed is None:
+            elapsed = time.monotonic() - self._started if self._started is not None else 0.0
+        item_seconds = item_seconds or {}
+        ratio = elapsed / self.period if self.period else 0.0
+        self.cycles += 1
+        self.last_ratio = ratio
+        cycle_budget.set(ratio, self.name)
+
+        if ratio >= self.warn_ratio:
+            self.at_risk += 1
+            if ratio >= 1.0:
+                self.overruns += 1
+            for coin, stages in item_seconds.items():
+                self.overrun_seconds[coin] += sum(stages.values())
+            self._report_budget(elapsed, ratio, item_seconds)
+
+        self._check_fetch(elapsed, item_seconds)
+        return ratio
+
+    def _report_budget(self, elapsed: float, ratio: float, item_seconds: Dict[str, Dict[str, float]]):
+        kind = "overrun" if ratio >= 1.0 else "risk"
+        title = "periyodu aştı" if kind == "overrun" else "bütçesi risk altında"
+        slowest = sorted(item_seconds.items(), key=lambda item: -sum(item[1].values()))[:WATCHDOG_TOP]
+        lines = [
+            f"⏲️ {self.name} döngü {title}: {elapsed:.1f} sn / {self.period:.0f} sn (%{ratio * 100:.0f}, "
+            f"{len(item_seconds)} coin)",
+            "━━━━━━━━━━━━━━━━━",
+        ]
+        if slowest:
+            lines.append("🐢 Bu döngüde en çok süre alan coinler:")
+            lines.extend(f"  {_format_coin(coin, stages)}" for coin, stages in slowest)
+        if self.at_risk > 1:
+            lines.append(f"📊 Son {self.at_risk} riskli döngüde toplam katkı: " + ", ".join(
+                f"{coin} {seconds:.0f} sn" for coin, seconds in self.overrun_seconds.most_common(WATCHDOG_TOP)))
+        message = "\n".join(lines)
+        logging.warning(message)
+        self._alert(kind, message)
+
+    def _check_fetch(self, elapsed: float, item_seconds: Dict[str, Dict[str, float]]):
+        for coin, stages in item_seconds.items():
+            fetch = stages.get(FETCH_STAGE, 0.0)
+            if elapsed and fetch >= WATCHDOG_FETCH_MIN_SECONDS and fetch / elapsed >= WATCHDOG_FETCH_SHARE:
+                self.fetch_streaks[coin] = self.fetch_streaks.get(coin, 0) + 1
+            else:
+                self.fetch_streaks.pop(coin, None)
+                if coin in self.flagged:
+                    self.flagged.remove(coin)
+                    logging.info(f"⏲️ {coin} mum çekme süresi normale döndü")
+                continue
+            if self.fetch_streaks[coin] >= WATCHDOG_FETCH_STREAK and coin not in self.flagged:
+                self.flagged.append(coin)
+                message = (f"🐌 {self.name}: {coin} mum çekmesi art arda {self.fetch_streaks[coin]} döngüdür "
+                           f"döngünün çoğunu alıyor (son: {fetch:.1f} sn / {elapsed:.1f} sn)")
+                logging.warning(message)
+                self._alert(f"fetch:{coin}", message)
+
+    def _alert(self, key: str, message: str):
+        watchdog_alerts.inc(self.name, key.split(":")[0])
+        now = time.monotonic()
+        if now - self._alerted.get(key, float("-inf")) < self.cooldown:
+            return
+        self._alerted[key] = now
+        try:
+            from lib.sms.sms import enqueue_message
+            enqueue_message(text=message[:4000], chat_types=["log"], priority="status")
+        except Exception as e:
+            logging.warning(f"⚠️ Bekçi uyarısı gönderilemedi: {e}")
+
+    def stats(self) -> Dict[str, Union[int, float, List[str]]]:
+        return {
+            "cycles": self.cycles,
+            "at_risk": self.at_risk,
+            "overruns": self.overruns,
+            "last_ratio": self.last_ratio,
+            "last_late": self.last_late,
+            "flagged": list(self.flagged),
+        }
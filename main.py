@@ -131,7 +131,9 @@ def run_strategy(strategy_path):
         if hasattr(module, 'main'):
             import asyncio
             if asyncio.iscoroutinefunction(module.main):
-                asyncio.run(module.main())
+                from lib.runner import run_strategy_main
+                # Bitince/iptal edilince Telegram kuyruğunu boşaltır, bağlantıyı kapatır ve durumu kaydeder
+                asyncio.run(run_strategy_main(module.main))
             else:
                 module.main()
         else:
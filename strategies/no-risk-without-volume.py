@@ -4,21 +4,34 @@ import pandas as pd
 import pandas_ta as ta
 import numpy as np
 import mplfinance as mpf
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 import os
-from lib.sms.sms import send_message
-from lib.utils import get_candles, get_tp_and_sl, get_chart
+import time
+from lib.sms.sms import enqueue_message, get_queue_metrics, start_bot
+from lib.sms.digest import DiagnosticDigest
+from lib.dedup import signal_store
+from lib.context import market_context
+from lib.fetch import FETCH_CYCLE_SHARE, cycle_deadline
+from lib.history import signal_history
+from lib.utils import get_tp_and_sl, get_chart
+from lib.cache import candle_cache, indicator
+from lib.scheduler import AdaptiveScheduler, threshold_distance
+from lib.screener import Screener, ScreenerRules
+from lib.pipeline import Pipeline, Stage
+from lib.checkpoint import checkpointer, install_shutdown_handler
+from lib.metrics import start_exporter
+from lib.profiling import profiler
+from lib.log import log_event, setup_logging
+from lib.watchdog import CycleWatchdog
+from lib.runner import run_strategy_main
 
 strategy_name = os.path.splitext(os.path.basename(__file__))[0]
 strategy_name = strategy_name.replace("-", " ").capitalize()
 
 # Logging ayarları
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+# Kayıtlar kuyrukla arka plan thread'inde yazılır (LOG_LEVEL, LOG_FORMAT=json, LOG_PATH: lib/log.py)
+setup_logging()
 
 # Takip listesi (sizin belirttiğiniz coinler)
 COINS = ["BTCUSDT", "ETHUSDT", "DOGEUSDT", "SOLUSDT", "WIFUSDT",
@@ -34,6 +47,24 @@ ADX_MIN = 20  # ADX eşik
 MIN_DATA_LEN = 60  # gerekli minimum mum sayısı (EMA200 için >200 ideal ama 60 ile çalışıyoruz)
 # Spam önleme: aynı coin için en az bu kadar süre bekle (dakika)
 MIN_RESEND_MINUTES = 30
+# Piyasa rejimi filtresi: BTC trendine ters yönlü ve BTC ile korele (>=0.5) coinlerde sinyali bastır (lib/context.py)
+BTC_REGIME_FILTER = False
+# Grafik gönderimi: hedef boyut (byte), format ("png"/"webp") ve fotoğraf/dosya seçimi
+CHART_MAX_BYTES = 150 * 1024
+CHART_FORMAT = "png"
+CHART_AS_PHOTO = False
+# Teşhis özeti: coin başına "Analiz Raporu" yerine döngü sonunda tek bir özet tablo gönder
+DIGEST_MODE = True
+DIGEST_SUPPRESS_UNCHANGED = False  # eksik koşulları değişmeyen coinleri özette gizle
+# Uyarlanabilir tarama: sinyale yakın coinler daha sık (en sık 1 dk), uzak coinler daha seyrek kontrol edilir.
+# Toplam API isteği sabit PERIOD_SECONDS taramasını aşmaz (lib/scheduler.py)
+ADAPTIVE_POLLING = True
+# İşlem hattı: eşzamanlı mum çekme sayısı (analiz event loop'ta, grafikler tek thread'de sırayla çizilir)
+PIPELINE_FETCH_CONCURRENCY = 4
+# Sıralı aday tarayıcı: tüm takip listesi için koşullar tek numpy geçişinde değerlendirilir, sinyale en yakın
+# SCREENER_TOP_N coin PERIOD_SECONDS'da bir log chat'e ("log") veya dosyaya ("file") yazılır; None: kapalı
+SCREENER_OUTPUT = None
+SCREENER_TOP_N = 10
 
 # --------------------------
 # Yardımcı fonksiyonlar
@@ -42,7 +73,7 @@ MIN_RESEND_MINUTES = 30
 def safe_ta_macd(close_series):
     """MACD dönen DataFrame kontrolü"""
     try:
-        macd = ta.macd(close_series)
+        macd = indicator(close_series, "macd", ta.macd, close_series)
         # Beklenen kolonlar: MACD_12_26_9, MACDh_12_26_9, MACDs_12_26_9
         if macd is None or macd.shape[1] < 3:
             return None
@@ -52,18 +83,20 @@ def safe_ta_macd(close_series):
 
 def safe_ta_adx(high, low, close):
     try:
-        adx = ta.adx(high, low, close)
+        adx = indicator(close, "adx", ta.adx, high, low, close)
         if adx is None or "ADX_14" not in adx.columns:
             return None
         return adx
     except Exception:
         return None
 
-def calculate_signal(df):
+def calculate_signal(df, context=None):
     """
     Tüm filtreleri uygular. Eğer güçlü LONG veya SHORT varsa (tüm koşullar sağlanır)
     döndürür: ("LONG" veya "SHORT", detay_dict)
     Aksi halde None döner.
+    context: döngü başında bir kez hesaplanan MarketContext (salt okunur); BTC trendi, BTC korelasyonu ve
+    piyasa genişliği detaylara eklenir, BTC_REGIME_FILTER açıksa rejime ters sinyaller bastırılır.
     """
     if df is None or len(df) < MIN_DATA_LEN:
         logging.debug(f"⚠️ Yetersiz veri: {len(df) if df is not None else 0} mum (minimum {MIN_DATA_LEN} gerekli)")
@@ -75,9 +108,9 @@ def calculate_signal(df):
     low = df["low"]
     vol = df["volume"]
 
-    rsi = ta.rsi(close, length=14)
-    ema50 = ta.ema(close, length=50)
-    ema200 = ta.ema(close, length=200)
+    rsi = indicator(close, "rsi", ta.rsi, close, length=14)
+    ema50 = indicator(close, "ema", ta.ema, close, length=50)
+    ema200 = indicator(close, "ema", ta.ema, close, length=200)
     macd_df = safe_ta_macd(close)
     adx_df = safe_ta_adx(high, low, close)
 
@@ -95,12 +128,16 @@ def calculate_signal(df):
 
     # MACD cross kontrolü
     macd_cross = None
+    macd_gap = None
     if macd_df is not None:
         try:
             macd_line = macd_df.iloc[:, 0]  # MACD line
             macd_signal = macd_df.iloc[:, 2]  # signal line
             macd_last = float(macd_line.iloc[-1])
             macd_signal_last = float(macd_signal.iloc[-1])
+            # Sinyale yakınlık için MACD-sinyal farkı (histogramın son 50 mum ortalamasına göre)
+            hist_scale = float((macd_line - macd_signal).abs().tail(50).mean())
+            macd_gap = (macd_last - macd_signal_last) / hist_scale if hist_scale else None
             macd_prev = float(macd_line.iloc[-2])
             macd_signal_prev = float(macd_signal.iloc[-2])
             # Bullish cross: prev MACD <= prev SIGNAL and last MACD > last SIGNAL
@@ -164,12 +201,22 @@ def calculate_signal(df):
         "ema50": ema50_last,
         "ema200": ema200_last,
         "macd_cross": macd_cross,
+        "macd_gap": macd_gap,
         "adx": adx_last,
         "vol_last": vol_last,
         "vol_avg": vol_avg,
         "vol_pct": vol_pct
     }
 
+    if context is not None:
+        symbol = df.attrs.get("symbol")
+        details.update(context.features(symbol))
+        side = "LONG" if long_ok else "SHORT" if short_ok else None
+        if BTC_REGIME_FILTER and side and context.regime_conflict(symbol, side):
+            logging.info(f"🌐 {side} sinyali BTC rejimine ters (BTC {context.btc_trend}), bastırıldı")
+            details["regime_blocked"] = True
+            long_ok = short_ok = False
+
     if long_ok:
         logging.info(f"🟢 LONG sinyali tespit edildi!")
         return "LONG", details
@@ -180,12 +227,293 @@ def calculate_signal(df):
     logging.debug(f"⏸️  Sinyal yok (EMA50/200, RSI, MACD, ADX veya hacim koşulları sağlanmadı)")
     return None, details
 
-# send_message fonksiyonu artık lib.sms.sms modülünden import ediliyor
+def signal_distance(details):
+    """
+    Coinin sinyale uzaklığı: 0 = koşullar sağlanmak üzere, 1 = çok uzak (uyarlanabilir tarama için).
+    Trend biliniyorsa o yön, bilinmiyorsa sinyale daha yakın olan yön puanlanır.
+    """
+    if not details:
+        return 1.0
+
+    def side_distance(long):
+        # MACD: kesişim olmuşsa 0; çizgi zaten sinyal tarafındaysa kesişim mümkün değil (1);
+        # değilse aradaki fark (histogramın son 50 mum ortalamasına göre normalize)
+        gap = details.get("macd_gap")
+        if details.get("macd_cross") == ("bull" if long else "bear"):
+            macd_part = 0.0
+        elif gap is None or (gap > 0) == long:
+            macd_part = 1.0
+        else:
+            macd_part = min(1.0, abs(gap))
+        parts = [
+            threshold_distance(details.get("rsi"), 40 if long else 60, below=long, scale=20),
+            macd_part,
+            threshold_distance(details.get("adx"), ADX_MIN, below=False, scale=ADX_MIN / 2),
+        ]
+        return sum(parts) / len(parts)
+
+    if details.get("ema50") is not None and details.get("ema200") is not None:
+        return side_distance(details["ema50"] > details["ema200"])
+    return min(side_distance(True), side_distance(False))
+
+# enqueue_message: mesajı öncelikli Telegram kuyruğuna bırakır ve hemen döner (lib.sms.sms)
 
 # --------------------------
 # Ana döngü
 # --------------------------
 
+# Teşhis özeti durumu (döngüler arasında korunur)
+# Spam koruması: lib.dedup.signal_store (süreç genelinde paylaşılır, diske kalıcı)
+scheduler = AdaptiveScheduler(COINS, base_period=PERIOD_SECONDS)
+last_report_time = float("-inf")
+digest = DiagnosticDigest(title=f"📊 {strategy_name} - Döngü Özeti", suppress_unchanged=DIGEST_SUPPRESS_UNCHANGED)
+
+# 💾 Yeniden başlatmada kaldığı yerden devam: tarama planı, özet parmak izleri ve son özet zamanı (lib/checkpoint.py)
+def checkpoint_state():
+    return {
+        "scheduler": scheduler.snapshot(),
+        "digest": digest.snapshot(),
+        "last_report_at": time.time() - (time.monotonic() - last_report_time),
+    }
+
+def restore_state(state):
+    global last_report_time
+    scheduler.restore(state["scheduler"])
+    digest.restore(state["digest"])
+    last_report_time = time.monotonic() - (time.time() - state["last_report_at"])
+
+checkpointer.register(f"strategy:{strategy_name}", checkpoint_state, restore_state)
+
+# 🏭 Coin işlem hattı: fetch → analiz → grafik → gönderim (lib/pipeline.py)
+# Aşamalar sınırlı kuyruklarla bağlı ve eşzamanlı çalışır: bir coinin grafiği çizilirken
+# sonraki coinlerin mumları çekilir ve analiz edilir.
+
+async def fetch_stage(item):
+    """Mumları paylaşılan önbellekten çeker (istek thread'de yapılır)"""
+    coin = item["coin"]
+    # Veri alınamazsa / hata olursa önceki puanla yeniden planla
+    scheduler.update(coin, scheduler.scores.get(coin, 1.0))
+    logging.info("\n\n--- %s kontrol ediliyor ---", coin)
+    df = await candle_cache.get(symbol=coin, granularity="15min", limit=300)
+    if df is None or df.empty:
+        logging.warning(f"⏭️  {coin} atlanıyor (veri yok)")
+        if DIGEST_MODE:
+            digest.add(coin, f"{coin} ⏭️ veri yok")
+        return None
+    item["df"] = df
+    return item
+
+def analyze_stage(item):
+    """İndikatörleri hesaplar; sinyal yoksa teşhis bilgisini ekler, varsa mesajı hazırlar"""
+    coin, df = item["coin"], item["df"]
+    price = float(df["close"].iloc[-1])
+    logging.info("💰 %s güncel fiyat: %s", coin, price)
+
+    side, details = calculate_signal(df=df, context=cycle_context)
+    # Yapılandırılmış kayıt: indikatör değerleri (LOG_FORMAT=json veya LOG_EVENTS=1 ise yazılır)
+    log_event("signal", strategy=strategy_name, symbol=coin, price=price, side=side, **(details or {}))
+    scheduler.update(coin, 0.0 if side else signal_distance(details))
+
+    # Her coin için detaylı bilgi göster
+    if details:
+        trend_text = ""
+        if details.get("ema50") is not None and details.get("ema200") is not None:
+            if details["ema50"] > details["ema200"]:
+                trend_text = "📈 Yükseliş trendi (EMA50>EMA200)"
+            else:
+                trend_text = "📉 Düşüş trendi (EMA50<EMA200)"
+
+        vol_pct_str = f"{details['vol_pct']:.1f}%" if details.get("vol_pct") is not None else "N/A"
+        adx_str = f"{details['adx']:.1f}" if details.get("adx") is not None else "N/A"
+        rsi_str = f"{details['rsi']:.1f}" if details.get("rsi") is not None else "N/A"
+        macd_str = details.get("macd_cross", "N/A")
+
+        logging.info("📊 Trend: %s", trend_text)
+        logging.info("📈 RSI: %s | MACD Cross: %s | ADX: %s", rsi_str, macd_str, adx_str)
+        #logging.info(f"📊 Hacim artışı: {vol_pct_str} (Eşik: %{VOLUME_THRESHOLD_PCT})") # Hacim eşiği kaldırıldı
+
+        # Koşulların durumu
+        if side is None:
+            reasons = []
+            if details.get("ema50") and details.get("ema200"):
+                if details["ema50"] > details["ema200"]:
+                    if not (details.get("rsi") and details["rsi"] < 40):
+                        reasons.append(f"RSI yeterince düşük değil ({rsi_str}, <40 olmalı)")
+                    if macd_str != "bull":
+                        reasons.append(f"MACD bullish cross yok ({macd_str})")
+                else:
+                    if not (details.get("rsi") and details["rsi"] > 60):
+                        reasons.append(f"RSI yeterince yüksek değil ({rsi_str}, >60 olmalı)")
+                    if macd_str != "bear":
+                        reasons.append(f"MACD bearish cross yok ({macd_str})")
+
+            if details.get("adx") and details["adx"] <= ADX_MIN:
+                reasons.append(f"ADX yetersiz ({adx_str}, >{ADX_MIN} olmalı)")
+
+            if details.get("vol_pct") and details["vol_pct"] < VOLUME_THRESHOLD_PCT:
+                reasons.append(f"Hacim artışı yetersiz ({vol_pct_str}, >%{VOLUME_THRESHOLD_PCT} olmalı)")
+
+            if reasons:
+                logging.info("⏸️  Sinyal YOK - Eksik koşullar:")
+                for reason in reasons:
+                    logging.info("   ❌ %s", reason)
+
+                if DIGEST_MODE:
+                    # Döngü sonunda tek mesajda gönderilecek özete ekle
+                    digest_row = f"{coin} {price} | RSI {rsi_str} | MACD {macd_str} | ADX {adx_str}\n   ❌ " + " / ".join(reasons)
+                    # Parmak izi: değerler değil, hangi koşulların eksik olduğu
+                    digest.add(coin, digest_row, fingerprint=tuple(reason.split(" (")[0] for reason in reasons))
+                else:
+                    # Diagnostic mesajını Telegram'a gönder
+                    diagnostic_message = (
+                        f"📊 {coin} Analiz Raporu\n"
+                        f"━━━━━━━━━━━━━━━━━\n\n"
+                        f"📋 Strateji: {strategy_name}\n\n"
+                        f"💰 Güncel fiyat: {price}\n"
+                        f"📊 Trend: {trend_text}\n"
+                        f"📈 RSI: {rsi_str} | MACD Cross: {macd_str} | ADX: {adx_str}\n"
+                        #f"📊 Hacim artışı: {vol_pct_str} (Eşik: %{VOLUME_THRESHOLD_PCT})\n\n" # Hacim eşiği kaldırıldı
+                        f"⏸️ Sinyal YOK - Eksik koşullar:\n"
+                    )
+                    for reason in reasons:
+                        diagnostic_message += f"   ❌ {reason}\n"
+                    diagnostic_message += f"\n⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - GMT-6"
+
+                    # Log chat'e gönder
+                    enqueue_message(text=diagnostic_message, chat_types=["log"], priority="diagnostic")
+            else:
+                logging.info("⏸️  %s için sinyal yok", coin)
+            return None
+    else:
+        logging.info("⏸️  %s için detay bilgisi alınamadı", coin)
+        return None
+
+    # Sinyal tespit edildi!
+    logging.info(f"{'🟢' if side == 'LONG' else '🔴'} ═══ {side} SİNYALİ TESPİT EDİLDİ! ═══")
+    logging.info(f"✅ Tüm koşullar sağlandı:")
+    logging.info(f"   ✓ Trend: {trend_text}")
+    logging.info(f"   ✓ RSI: {rsi_str} {'(<40 ✓)' if side == 'LONG' else '(>60 ✓)'}")
+    logging.info(f"   ✓ MACD Cross: {macd_str} ✓")
+    logging.info(f"   ✓ ADX: {adx_str} (>{ADX_MIN} ✓)")
+    # logging.info(f"   ✓ Hacim artışı: {vol_pct_str} (>%{VOLUME_THRESHOLD_PCT} ✓)") # Hacim eşiği kaldırıldı
+
+    tp, sl = get_tp_and_sl(df=df, signal=side, tp_percent=TP_PERCENT, sl_percent=SL_PERCENT)
+    logging.info(f"🎯 TP: {tp} | 🛑 SL: {sl}")
+
+    # Mesajı oluştur
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    emoji = "🟢" if side == "LONG" else "🔴"
+    trend_text_msg = ""
+    if details.get("ema50") is not None and details.get("ema200") is not None:
+        if details["ema50"] > details["ema200"]:
+            trend_text_msg = "Yükseliş (EMA50>EMA200)"
+        else:
+            trend_text_msg = "Düşüş (EMA50<EMA200)"
+    vol_pct_str = f"{details['vol_pct']:.1f}%" if details.get("vol_pct") is not None else "N/A"
+    adx_str = f"{details['adx']:.1f}" if details.get("adx") is not None else "N/A"
+    rsi_str = f"{details['rsi']:.1f}" if details.get("rsi") is not None else "N/A"
+    macd_str = details.get("macd_cross", "N/A")
+
+    message = (
+        f"📊 {coin} Analiz Raporu\n"
+        f"━━━━━━━━━━━━━━━━━━━━\n\n"
+        f"📋 Strateji: {strategy_name}\n\n"
+        f"💰 Güncel fiyat: {price}\n"
+        f"✳️ Sinyal: {emoji} {side}\n"
+        f"📊 Trend: {trend_text_msg}\n"
+        f"📈 RSI: {rsi_str} | MACD: {macd_str} | ADX: {adx_str}"
+        #f"📈 Hacim artışı: {vol_pct_str}\n" # Hacim eşiği kaldırıldı
+        f"🎯 TP: {tp} | 🛑 SL: {sl}\n\n"
+        f"⏰ {now} - GMT-6"
+    )
+
+    # Spam kontrolü: aynı mum için aynı sinyali tekrar göndermeme ve minimum bekleme süresi
+    bar_time = df.index[-1]
+    resend_allowed = signal_store.should_send(strategy_name, coin, side, bar_time, min_interval=MIN_RESEND_MINUTES * 60)
+
+    if not resend_allowed:
+        time_since_last = (signal_store.seconds_since_last(strategy_name, coin) or 0) / 60
+        logging.warning(f"⏳ {coin} için spam koruması aktif (son mesajdan {time_since_last:.1f} dk geçti, minimum {MIN_RESEND_MINUTES} dk gerekli)")
+        return None
+    # Önbellek görünümü kopyalanır: grafik await'lerden sonra çizilir, bu arada yenilenen önbellek süren mumu
+    # yerinde günceller. Grafik, sinyalin ve TP/SL'nin hesaplandığı mumları göstermeli
+    item.update(df=df.copy(), side=side, tp=tp, sl=sl, message=message, bar_time=bar_time, price=price, details=details)
+    return item
+
+async def render_stage(item):
+    """Sinyal grafiğini çizer (çizim thread'de yapılır)"""
+    logging.info(f"📤 {item['coin']} için Telegram mesajı gönderiliyor...")
+    item["chart_path"] = await get_chart(df=item["df"], strategy_name=strategy_name, granularity="15min", tp=item["tp"], sl=item["sl"], symbol=item["coin"], fmt=CHART_FORMAT, max_bytes=CHART_MAX_BYTES)
+    return item
+
+def send_stage(item):
+    """Mesajı Telegram kuyruğuna bırakır (beklemez) ve sinyali gönderildi olarak kaydeder"""
+    enqueue_message(text=item["message"], chat_types=["signal","log"], chart_path=item["chart_path"], as_photo=CHART_AS_PHOTO, priority="signal")
+    signal_store.mark_sent(strategy_name, item["coin"], item["side"], item["bar_time"])
+    # Sinyal gelen coin özetten çıkar; sonraki teşhisi değişmemiş olsa da yeniden gösterilir
+    digest.forget(item["coin"])
+    # Sinyal geçmişi: kuyruğa bırakılır, arka planda toplu yazılır (lib/history.py)
+    signal_history.record(strategy_name, item["coin"], item["side"], price=item["price"], tp=item["tp"], sl=item["sl"],
+                          bar_time=item["bar_time"], details=item["details"])
+    logging.info(f"✅ {item['coin']} mesajı gönderim kuyruğuna eklendi!")
+    return item
+
+pipeline = Pipeline([
+    Stage("fetch", fetch_stage, concurrency=PIPELINE_FETCH_CONCURRENCY),
+    Stage("analyze", analyze_stage),
+    # Tek worker: çizim GIL'e bağlı ve motor kilidi altında, ikinci worker sadece kilitte bekler
+    Stage("render", render_stage),
+    Stage("send", send_stage),
+], name=strategy_name)
+# Döngü bekçisi: iş süresini periyot bütçesine göre izler, aşımda log chat'e uyarır (lib/watchdog.py)
+watchdog = CycleWatchdog(strategy_name, PERIOD_SECONDS)
+# Döngü başında bir kez hesaplanan piyasa bağlamı (BTC trendi, korelasyon, genişlik): tüm coinlere aynı nesne verilir
+cycle_context = None
+# Tarayıcı calculate_signal ile aynı eşikleri kullanır; mumları önbellekten okur, ek istek atmaz (lib/screener.py)
+screener = Screener(ScreenerRules(adx_min=ADX_MIN, volume_pct=None),
+                    title=f"🔎 {strategy_name} - Sinyale En Yakın Coinler", top_n=SCREENER_TOP_N,
+                    output=SCREENER_OUTPUT, path=f"temp/screener_{os.path.splitext(os.path.basename(__file__))[0]}.txt")
+
+@profiler.profiled(strategy_name)
+async def run_cycle(coins=None):
+    """
+    Coinleri bir kez kontrol eder (periyot beklemesi yapmaz). coins verilmezse COINS listesinin tamamı.
+    Kısmi turlarda (uyarlanabilir tarama) özet ve döngü sonu mesajı PERIOD_SECONDS'da bir gönderilir.
+    """
+    global last_report_time, cycle_context
+    coins = COINS if coins is None else coins
+    logging.info(f"\n\n🔄 Yeni kontrol döngüsü başlıyor... ({len(coins)} coin, {datetime.now().strftime('%H:%M:%S')})\n\n")
+
+    # Uyarlanabilir taramada gecikme planlanan kontrol zamanına göre ölçülür
+    watchdog.begin(late=scheduler.lateness(coins) if coins is not COINS else None)
+    # Mum istekleri periyodun FETCH_CYCLE_SHARE kadarında bitmeli: istek başına süre kalan süreyle sınırlanır,
+    # süre dolunca kalan coinler atlanır ve sonraki turda tekrar denenir (lib/fetch.py)
+    with cycle_deadline(PERIOD_SECONDS * FETCH_CYCLE_SHARE):
+        # Korelasyon ve genişlik tüm takip listesi üzerinden (kısmi turlarda da), önbellekteki serilerden hesaplanır
+        cycle_context = await market_context.refresh(COINS)
+        await pipeline.run({"coin": coin} for coin in coins)
+    pipeline.log_metrics()
+    watchdog.end(pipeline.item_seconds, pipeline.elapsed)
+
+    signal_store.save(force=True)
+    checkpointer.save()
+    if coins is not COINS and time.monotonic() - last_report_time < PERIOD_SECONDS:
+        return
+    last_report_time = time.monotonic()
+    if SCREENER_OUTPUT:
+        # Özetten önce: sinyale en yakın coinler tablosu
+        screener.run(COINS)
+    logging.info(f"\n\n💤 Tüm coinler kontrol edildi. {PERIOD_SECONDS//60} dakika bekleniyor...")
+    try:
+        if DIGEST_MODE:
+            # Özet + döngü sonu mesajı tek seferde (4096 karakteri aşarsa bölünür)
+            digest.flush(footer=f"💤 Tüm coinler kontrol edildi. {PERIOD_SECONDS//60} dakika bekleniyor...\n⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - GMT-6")
+        else:
+            enqueue_message(f"💤 Tüm coinler kontrol edildi. {PERIOD_SECONDS//60} dakika bekleniyor...", chat_types=["log"], priority="status")
+        logging.info(f"✅ Tüm mesajlar Telegram kuyruğuna eklendi! (kuyrukta: {get_queue_metrics()['depth']}) \n\n")
+    except Exception as e:
+        logging.error(f"❌ Tüm mesajlar Telegram kuyruğuna eklenemedi: {e} \n\n")
+
 async def main():
     logging.info("=" * 60)
     logging.info("🚀 Crypto Sinyal Bot başlatılıyor...")
@@ -195,6 +523,20 @@ async def main():
     logging.info(f"🎯 TP: %{TP_PERCENT} | 🛑 SL: %{SL_PERCENT}")
     logging.info("=" * 60)
     
+    # Önceki çalışmanın durumunu yükle; SIGTERM'de durumu kaydedip kapan
+    install_shutdown_handler()
+    checkpointer.restore()
+    # METRICS_PORT / METRICS_PATH ayarlıysa metrikleri dışa aktar (lib/metrics.py)
+    start_exporter()
+    # Profil alma: PROFILE_CYCLES, SIGUSR1 veya /profile komutu (lib/profiling.py)
+    profiler.install()
+
+    # Telegram bağlantısını önceden kur (TLS + bağlantı havuzu ısıtma)
+    try:
+        await start_bot()
+    except Exception as e:
+        logging.error(f"❌ Telegram bağlantısı kurulamadı, gönderimde tekrar denenecek: {e}")
+
     # Bot başlangıç mesajı gönder
     startup_message = (
         f"🚀 *BOT BAŞLATILDI* 🚀\n\n"
@@ -210,161 +552,22 @@ async def main():
     )
     
     try:
-        await send_message(startup_message, chat_types=["signal","log"])
-        logging.info("✅ Başlangıç mesajı Telegram'a gönderildi!")
+        enqueue_message(startup_message, chat_types=["signal","log"], priority="status")
+        logging.info("✅ Başlangıç mesajı Telegram kuyruğuna eklendi!")
     except Exception as e:
         logging.error(f"❌ Başlangıç mesajı gönderilemedi: {e}")
     
-    last_sent_text = {coin: None for coin in COINS}
-    last_sent_time = {coin: datetime.min for coin in COINS}
-
+    # Kapanış (kuyruğu boşaltma, bağlantıyı kapatma, durum kaydı) stratejiyi başlatanındır: lib.runner
     while True:
-        logging.info(f"\n\n🔄 Yeni kontrol döngüsü başlıyor... ({datetime.now().strftime('%H:%M:%S')})\n\n")
-        
-        for coin in COINS:
-            try:
-                logging.info(f"\n\n--- {coin} kontrol ediliyor ---")
-                df = get_candles(coin, limit=300)
-                if df is None or df.empty:
-                    logging.warning(f"⏭️  {coin} atlanıyor (veri yok)")
-                    continue
-
-                price = float(df["close"].iloc[-1])
-                logging.info(f"💰 {coin} güncel fiyat: {price}")
-                
-                side, details = calculate_signal(df)
-                
-                # Her coin için detaylı bilgi göster
-                if details:
-                    trend_text = ""
-                    if details.get("ema50") is not None and details.get("ema200") is not None:
-                        if details["ema50"] > details["ema200"]:
-                            trend_text = "📈 Yükseliş trendi (EMA50>EMA200)"
-                        else:
-                            trend_text = "📉 Düşüş trendi (EMA50<EMA200)"
-                    
-                    vol_pct_str = f"{details['vol_pct']:.1f}%" if details.get("vol_pct") is not None else "N/A"
-                    adx_str = f"{details['adx']:.1f}" if details.get("adx") is not None else "N/A"
-                    rsi_str = f"{details['rsi']:.1f}" if details.get("rsi") is not None else "N/A"
-                    macd_str = details.get("macd_cross", "N/A")
-                    
-                    logging.info(f"📊 Trend: {trend_text}")
-                    logging.info(f"📈 RSI: {rsi_str} | MACD Cross: {macd_str} | ADX: {adx_str}")
-                    #logging.info(f"📊 Hacim artışı: {vol_pct_str} (Eşik: %{VOLUME_THRESHOLD_PCT})") # Hacim eşiği kaldırıldı
-                    
-                    # Koşulların durumu
-                    if side is None:
-                        reasons = []
-                        if details.get("ema50") and details.get("ema200"):
-                            if details["ema50"] > details["ema200"]:
-                                if not (details.get("rsi") and details["rsi"] < 40):
-                                    reasons.append(f"RSI yeterince düşük değil ({rsi_str}, <40 olmalı)")
-                                if macd_str != "bull":
-                                    reasons.append(f"MACD bullish cross yok ({macd_str})")
-                            else:
-                                if not (details.get("rsi") and details["rsi"] > 60):
-                                    reasons.append(f"RSI yeterince yüksek değil ({rsi_str}, >60 olmalı)")
-                                if macd_str != "bear":
-                                    reasons.append(f"MACD bearish cross yok ({macd_str})")
-                        
-                        if details.get("adx") and details["adx"] <= ADX_MIN:
-                            reasons.append(f"ADX yetersiz ({adx_str}, >{ADX_MIN} olmalı)")
-                        
-                        if details.get("vol_pct") and details["vol_pct"] < VOLUME_THRESHOLD_PCT:
-                            reasons.append(f"Hacim artışı yetersiz ({vol_pct_str}, >%{VOLUME_THRESHOLD_PCT} olmalı)")
-                        
-                        if reasons:
-                            logging.info(f"⏸️  Sinyal YOK - Eksik koşullar:")
-                            for reason in reasons:
-                                logging.info(f"   ❌ {reason}")
-                            
-                            # Diagnostic mesajını Telegram'a gönder
-                            diagnostic_message = (
-                                f"📊 {coin} Analiz Raporu\n"
-                                f"━━━━━━━━━━━━━━━━━\n\n"
-                                f"📋 Strateji: {strategy_name}\n\n"
-                                f"💰 Güncel fiyat: {price}\n"
-                                f"📊 Trend: {trend_text}\n"
-                                f"📈 RSI: {rsi_str} | MACD Cross: {macd_str} | ADX: {adx_str}\n"
-                                #f"📊 Hacim artışı: {vol_pct_str} (Eşik: %{VOLUME_THRESHOLD_PCT})\n\n" # Hacim eşiği kaldırıldı
-                                f"⏸️ Sinyal YOK - Eksik koşullar:\n"
-                            )
-                            for reason in reasons:
-                                diagnostic_message += f"   ❌ {reason}\n"
-                            diagnostic_message += f"\n⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - GMT-6"
-
-                            # Log chat'e gönder
-                            await send_message(text=diagnostic_message, chat_types=["log"])
-                        else:
-                            logging.info(f"⏸️  {coin} için sinyal yok")
-                        continue
-                else:
-                    logging.info(f"⏸️  {coin} için detay bilgisi alınamadı")
-                    continue
-
-                # Sinyal tespit edildi!
-                logging.info(f"{'🟢' if side == 'LONG' else '🔴'} ═══ {side} SİNYALİ TESPİT EDİLDİ! ═══")
-                logging.info(f"✅ Tüm koşullar sağlandı:")
-                logging.info(f"   ✓ Trend: {trend_text}")
-                logging.info(f"   ✓ RSI: {rsi_str} {'(<40 ✓)' if side == 'LONG' else '(>60 ✓)'}")
-                logging.info(f"   ✓ MACD Cross: {macd_str} ✓")
-                logging.info(f"   ✓ ADX: {adx_str} (>{ADX_MIN} ✓)")
-                # logging.info(f"   ✓ Hacim artışı: {vol_pct_str} (>%{VOLUME_THRESHOLD_PCT} ✓)") # Hacim eşiği kaldırıldı
-                
-                tp, sl = get_tp_and_sl(df=df, signal=side, tp_percent=TP_PERCENT, sl_percent=SL_PERCENT)
-                logging.info(f"🎯 TP: {tp} | 🛑 SL: {sl}")
-
-                # Mesajı oluştur
-                now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                emoji = "🟢" if side == "LONG" else "🔴"
-                trend_text_msg = ""
-                if details.get("ema50") is not None and details.get("ema200") is not None:
-                    if details["ema50"] > details["ema200"]:
-                        trend_text_msg = "Yükseliş (EMA50>EMA200)"
-                    else:
-                        trend_text_msg = "Düşüş (EMA50<EMA200)"
-                vol_pct_str = f"{details['vol_pct']:.1f}%" if details.get("vol_pct") is not None else "N/A"
-                adx_str = f"{details['adx']:.1f}" if details.get("adx") is not None else "N/A"
-                rsi_str = f"{details['rsi']:.1f}" if details.get("rsi") is not None else "N/A"
-                macd_str = details.get("macd_cross", "N/A")
-
-                message = (
-                    f"📊 {coin} Analiz Raporu\n"
-                    f"━━━━━━━━━━━━━━━━━━━━\n\n"
-                    f"📋 Strateji: {strategy_name}\n\n"
-                    f"💰 Güncel fiyat: {price}\n"
-                    f"✳️ Sinyal: {emoji} {side}\n"
-                    f"📊 Trend: {trend_text_msg}\n"
-                    f"📈 RSI: {rsi_str} | MACD: {macd_str} | ADX: {adx_str}"
-                    #f"📈 Hacim artışı: {vol_pct_str}\n" # Hacim eşiği kaldırıldı
-                    f"🎯 TP: {tp} | 🛑 SL: {sl}\n\n"
-                    f"⏰ {now} - GMT-6"
-                )
-
-                # Spam kontrolü: aynı mesajı tekrar göndermeme ve minimum bekleme süresi
-                resend_allowed = (last_sent_text[coin] != message) and (datetime.now() - last_sent_time[coin] > timedelta(minutes=MIN_RESEND_MINUTES))
-
-                if resend_allowed:
-                    logging.info(f"📤 {coin} için Telegram mesajı gönderiliyor...")
-                    chart_path = await get_chart(df=df, strategy_name=strategy_name, granularity="15min", tp=tp, sl=sl, symbol=coin)
-                    await send_message(text=message, chat_types=["signal","log"], chart_path=chart_path)
-                    last_sent_text[coin] = message
-                    last_sent_time[coin] = datetime.now()
-                    logging.info(f"✅ {coin} mesajı başarıyla gönderildi!")
-                else:
-                    time_since_last = (datetime.now() - last_sent_time[coin]).total_seconds() / 60
-                    logging.warning(f"⏳ {coin} için spam koruması aktif (son mesajdan {time_since_last:.1f} dk geçti, minimum {MIN_RESEND_MINUTES} dk gerekli)")
-
-            except Exception as e:
-                logging.error(f"❌ {coin} işlem hatası: {e}")
-
-        logging.info(f"\n\n💤 Tüm coinler kontrol edildi. {PERIOD_SECONDS//60} dakika bekleniyor...")
-        try:
-            await send_message(f"💤 Tüm coinler kontrol edildi. {PERIOD_SECONDS//60} dakika bekleniyor...", chat_types=["log"])
-            logging.info("✅ Tüm mesajlar Telegram'a gönderildi! \n\n")
-        except Exception as e:
-            logging.error(f"❌ Tüm mesajlar Telegram'a gönderilemedi: {e} \n\n")
-        await asyncio.sleep(PERIOD_SECONDS)
+        if ADAPTIVE_POLLING:
+            due = scheduler.due()
+            if due:
+                await run_cycle(due)
+            await asyncio.sleep(scheduler.seconds_until_next())
+        else:
+            await run_cycle()
+            # Sabit hız: döngü süresi periyottan düşülür, başlangıçlar kaymaz
+            await asyncio.sleep(watchdog.remaining())
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(run_strategy_main(main))
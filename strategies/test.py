@@ -5,20 +5,26 @@ import pandas_ta as ta
 import numpy as np
 import mplfinance as mpf
 from datetime import datetime
-from lib.sms.sms import send_message  # sizin mevcut fonksiyonunuz
+from lib.sms.sms import enqueue_message, start_bot  # mesajı kuyruğa bırakır, beklemez
 import logging
 import os
-from lib.utils import get_candles, get_tp_and_sl, get_chart
+import time
+from lib.utils import get_tp_and_sl, get_chart
+from lib.cache import candle_cache, indicator
+from lib.dedup import signal_store
+from lib.history import signal_history
+from lib.checkpoint import checkpointer, install_shutdown_handler
+from lib.profiling import profiler
+from lib.log import setup_logging
+from lib.watchdog import CycleWatchdog
+from lib.runner import run_strategy_main
 
 strategy_name = os.path.splitext(os.path.basename(__file__))[0]
 strategy_name = strategy_name.replace("-", " ").capitalize()
 
 # Logging ayarları
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+# Kayıtlar kuyrukla arka plan thread'inde yazılır (LOG_LEVEL, LOG_FORMAT=json, LOG_PATH: lib/log.py)
+setup_logging()
 
 # 🪙 Takip edilecek coinler
 COINS = [
@@ -43,28 +49,21 @@ def get_signal(df):
         return "⚠️ Yeterli veri yok"
 
     # --- Göstergelerin hesaplanması ---
-    df["rsi"] = ta.rsi(df["close"], length=14)
-    df["ema50"] = ta.ema(df["close"], length=50)
-    df["ema200"] = ta.ema(df["close"], length=200)
-
-    macd = ta.macd(df["close"])
-    if macd is not None:
-        for col in macd.columns:
-            df[col] = macd[col]
-
-    adx = ta.adx(df["high"], df["low"], df["close"])
-    if adx is not None and "ADX_14" in adx.columns:
-        df["adx"] = adx["ADX_14"]
-    else:
-        df["adx"] = np.nan
+    # Sonuçlar mum DataFrame'ine kolon olarak eklenmez (önbellekteki mumların salt okunur görünümü)
+    close = df["close"]
+    rsi = indicator(df, "rsi", ta.rsi, close, length=14)
+    ema50_series = indicator(df, "ema", ta.ema, close, length=50)
+    ema200_series = indicator(df, "ema", ta.ema, close, length=200)
+    macd = indicator(df, "macd", ta.macd, close)
+    adx = indicator(df, "adx", ta.adx, df["high"], df["low"], close)
 
     # --- Güncel değerlerin alınması ---
-    rsi_val = df["rsi"].iloc[-1]
-    ema50 = df["ema50"].iloc[-1]
-    ema200 = df["ema200"].iloc[-1]
-    macd_val = df["MACD_12_26_9"].iloc[-1] if "MACD_12_26_9" in df.columns else None
-    macd_signal = df["MACDs_12_26_9"].iloc[-1] if "MACDs_12_26_9" in df.columns else None
-    adx_val = df["adx"].iloc[-1]
+    rsi_val = rsi.iloc[-1]
+    ema50 = ema50_series.iloc[-1] if ema50_series is not None else None
+    ema200 = ema200_series.iloc[-1] if ema200_series is not None else None
+    macd_val = macd["MACD_12_26_9"].iloc[-1] if macd is not None and "MACD_12_26_9" in macd.columns else None
+    macd_signal = macd["MACDs_12_26_9"].iloc[-1] if macd is not None and "MACDs_12_26_9" in macd.columns else None
+    adx_val = adx["ADX_14"].iloc[-1] if adx is not None and "ADX_14" in adx.columns else np.nan
 
     # --- Ana sinyal hesaplama ---
     signal = "⚪ NÖTR"
@@ -90,8 +89,8 @@ def get_signal(df):
     return signal
 
 # 🔄 Tek coin işleyici
-async def process_coin(coin, last_signals):
-    df = get_candles(symbol=coin, granularity="15min", limit=200)
+async def process_coin(coin):
+    df = await candle_cache.get(symbol=coin, granularity="15min", limit=200)
     if df is None or len(df) == 0:
         logging.warning(f"⚠️ {coin} için veri alınamadı.")
         return
@@ -113,28 +112,53 @@ async def process_coin(coin, last_signals):
     full_msg += f"\n\n⏰ {now} - GMT-6"
     logging.info(f"\n\n{full_msg}\n")
     
-    # 🔍 Sadece gerçek sinyal (LONG veya SHORT) olduğunda mesaj gönder
-    if ("LONG" in signal or "SHORT" in signal) and full_msg != last_signals.get(coin):
+    # 🔍 Sadece gerçek sinyal (LONG veya SHORT) olduğunda ve bu mum için daha önce gönderilmediyse mesaj gönder
+    bar_time = df.index[-1]
+    if ("LONG" in signal or "SHORT" in signal) and signal_store.should_send(strategy_name, coin, signal, bar_time):
         chart_path = await get_chart(df=df, strategy_name=strategy_name, granularity="15min", tp=tp, sl=sl, symbol=coin)
-        await send_message(text=full_msg, chat_types=["signal"], chart_path=chart_path)
+        enqueue_message(text=full_msg, chat_types=["signal"], chart_path=chart_path, priority="signal")
         logging.info(f"\n🚀 SİNYAL GÖNDERİLDİ: {coin} | {signal}\n")
-        last_signals[coin] = full_msg
+        signal_store.mark_sent(strategy_name, coin, signal, bar_time)
+        signal_history.record(strategy_name, coin, "LONG" if "LONG" in signal else "SHORT", price=df["close"].iloc[-1],
+                              tp=tp, sl=sl, bar_time=bar_time, details={"signal": signal})
 
     # ❌ Sinyal yoksa sadece log'a yaz
     else:
         logging.info(f"ℹ️ {coin}: Sinyal Yok → {signal}")
-        await send_message(text=full_msg, chat_types=["log"])
+        enqueue_message(text=full_msg, chat_types=["log"], priority="diagnostic")
     print("-" * 100)
 
+# ⏲️ Döngü bekçisi: periyot bütçesi aşılırsa log chat'e uyarır
+watchdog = CycleWatchdog(strategy_name, PERIOD_SECONDS)
+
+# 🔄 Tek döngü: tüm coinleri bir kez kontrol et
+@profiler.profiled(strategy_name)
+async def run_cycle():
+    watchdog.begin()
+    spent = {}
+    for coin in COINS:
+        started = time.monotonic()
+        await process_coin(coin)
+        spent[coin] = {"process": time.monotonic() - started}
+    watchdog.end(spent)
+    signal_store.save(force=True)
+    checkpointer.save()
+    logging.info(f"\n\n💤 Tüm coinler kontrol edildi. {PERIOD_SECONDS//60} dakika bekleniyor...")
+
 # 🚀 Ana döngü
 async def main():
-    last_signals = {coin: None for coin in COINS}
+    install_shutdown_handler()
+    checkpointer.restore()
+    profiler.install()
+    try:
+        await start_bot()
+    except Exception as e:
+        logging.error(f"❌ Telegram bağlantısı kurulamadı, gönderimde tekrar denenecek: {e}")
+    # Kapanış (kuyruğu boşaltma, bağlantıyı kapatma, durum kaydı) stratejiyi başlatanındır: lib.runner
     while True:
-        for coin in COINS:
-            await process_coin(coin, last_signals)
-        logging.info(f"\n\n💤 Tüm coinler kontrol edildi. {PERIOD_SECONDS//60} dakika bekleniyor...")
-        await asyncio.sleep(PERIOD_SECONDS)
+        await run_cycle()
+        await asyncio.sleep(watchdog.remaining())
 
 # 🔁 Çalıştır
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(run_strategy_main(main))
\ No newline at end of file
@@ -0,0 +1,367 @@
+import argparse
+import asyncio
+import copy
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Proje root'unu sys.path'e ekle
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+import pandas as pd
+import requests
+
+from lib.context import compute_context
+from lib.sms.fake_api import FakeTelegramServer
+from lib.utils import get_chart, get_tp_and_sl, parse_candle_series, parse_candles
+
+FIXTURES_DIR = project_root / "test" / "fixtures"
+CANDLE_FIXTURE = FIXTURES_DIR / "bitget_candles_BTCUSDT_15min.json"
+BASELINE_PATH = FIXTURES_DIR / "bench_baseline.json"
+GOLDEN_PATH = FIXTURES_DIR / "golden_signals.json"
+STRATEGIES = ["no-risk", "no-risk-without-volume", "no-risk-without-volume-and-trend"]
+
+SCALES = (1, 10, 100)  # 1x = 300 mum / 1 mesaj
+BASE_CANDLES = 300
+LATENCY_TOLERANCE = 0.30  # baseline'a göre %30'dan fazla yavaşlama hata
+MEMORY_TOLERANCE = 0.20  # baseline'a göre %20'den fazla tepe bellek artışı hata
+MIN_LATENCY_DELTA = 0.0005  # sn: bundan küçük farklar gürültü sayılır
+MIN_MEMORY_DELTA = 256 * 1024  # byte
+MIN_RUNS = 3
+MAX_RUNS = 50
+MIN_TIME = 0.5  # sn: vaka başına en az bu kadar tekrar
+GOLDEN_WINDOW_STEP = 10  # altın sinyal kontrolünde kayan pencere adımı (mum)
+# Altın veri seri öncesi strateji kodundan üretildi; sonradan eklenen detay alanları (macd_gap, piyasa bağlamı)
+# karşılaştırmaya girmez, mevcut alanların değerleri aynı kalmalı
+GOLDEN_DETAIL_KEYS = ("rsi", "ema50", "ema200", "macd_cross", "adx", "vol_last", "vol_avg", "vol_pct")
+
+
+# --------------------------
+# Veri
+# --------------------------
+
+def load_fixture():
+    with open(CANDLE_FIXTURE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def scale_fixture(data, scale):
+    """Kayıtlı yanıtı zaman ekseninde kopyalayarak scale katı uzunlukta bir yanıt üretir"""
+    rows = data["data"]
+    step = int(rows[1][0]) - int(rows[0][0])
+    span = step * len(rows)
+    scaled = copy.deepcopy(data)
+    scaled["data"] = [[str(int(row[0]) + copy_index * span)] + row[1:]
+                      for copy_index in range(scale) for row in rows]
+    return scaled
+
+
+def synthetic_candles(n, seed=42):
+    """Volatilite kümeleri ve hacim sıçramaları olan rastgele yürüyüş (tekrarlanabilir)"""
+    rng = np.random.default_rng(seed)
+    volatility = 0.002 * np.exp(np.cumsum(rng.normal(0, 0.05, n)).clip(-1.5, 1.5))
+    drift = np.repeat(rng.normal(0, 0.0008, n // 100 + 1), 100)[:n]
+    close = 100 * np.exp(np.cumsum(drift + rng.normal(0, 1, n) * volatility))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.5, n)) * volatility * close
+    volume = rng.gamma(2.0, 300, n) * (1 + 3 * (rng.random(n) < 0.05))
+    index = pd.date_range("2025-01-01", periods=n, freq="15min", tz="UTC")
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": volume,
+    }, index=index)
+
+
+def load_strategy(name):
+    """Strateji modülünü yükler; bağımlılıkları (ör. pandas_ta) yoksa None"""
+    path = project_root / "strategies" / f"{name}.py"
+    try:
+        spec = importlib.util.spec_from_file_location(path.stem, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    except ImportError as e:
+        print(f"⚠️  {name} yüklenemedi, atlanıyor: {e}")
+        return None
+
+
+def record_fixture(symbol="BTCUSDT", granularity="15min", limit=BASE_CANDLES):
+    """Canlı Bitget yanıtını fixture olarak kaydeder"""
+    url = f"https://api.bitget.com/api/v2/spot/market/candles?symbol={symbol}&granularity={granularity}&limit={limit}"
+    data = requests.get(url, timeout=15).json()
+    if parse_candles(data, symbol, granularity) is None:
+        raise RuntimeError(f"Geçersiz yanıt: {str(data)[:200]}")
+    with open(CANDLE_FIXTURE, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    print(f"✅ Fixture kaydedildi: {CANDLE_FIXTURE} ({len(data['data'])} mum)")
+
+
+# --------------------------
+# Ölçüm
+# --------------------------
+
+async def call(func):
+    result = func()
+    if asyncio.iscoroutine(result):
+        result = await result
+    return result
+
+
+async def measure(func):
+    """
+    En iyi süre (sn), medyan süre (sn) ve tepe bellek (byte). Isınma çalıştırması ölçüme dahil edilmez.
+    Gerileme kontrolü en iyi süreyle yapılır: arka plan yükünden en az etkilenen ölçüm odur.
+    """
+    await call(func)
+    durations = []
+    started = time.perf_counter()
+    while len(durations) < MIN_RUNS or (time.perf_counter() - started < MIN_TIME and len(durations) < MAX_RUNS):
+        run_started = time.perf_counter()
+        await call(func)
+        durations.append(time.perf_counter() - run_started)
+
+    # tracemalloc süreyi bozduğu için bellek ayrı bir çalıştırmada ölçülür
+    tracemalloc.start()
+    await call(func)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(durations), statistics.median(durations), peak
+
+
+def build_cases(strategies, scales, sms):
+    """(vaka adı, fonksiyon) listesi. Fonksiyonlar senkron veya async olabilir."""
+    fixture = load_fixture()
+    cases = []
+    for scale in scales:
+        data = scale_fixture(fixture, scale)
+        cases.append((f"parse_candles x{scale}", lambda data=data: parse_candles(data, "BTCUSDT", "15min")))
+
+    for scale in scales:
+        # Artımlı yol (lib.cache yenilemesi): süren mumu güncelle + scale kadar yeni mum ekle, ayırma yapmamalı
+        series = parse_candle_series(fixture, "BTCUSDT", "15min")
+        step = int(fixture["data"][1][0]) - int(fixture["data"][0][0])
+        row = series.arrays()["close"][-1:].repeat(6)
+
+        def append_batch(series=series, step=step * 1_000_000, row=row, scale=scale):
+            series.append(series.last_time, row)
+            for _ in range(scale):
+                series.append(series.last_time + step, row)
+        cases.append((f"candle_append x{scale}", append_batch))
+
+    for scale in scales:
+        # Döngü başı piyasa bağlamı: 10 x scale coin (BTC trendi, korelasyon matrisi, genişlik)
+        rng = np.random.default_rng(scale)
+        closes = {f"COIN{i}USDT": np.exp(np.cumsum(rng.normal(0, 0.01, BASE_CANDLES))) for i in range(10 * scale)}
+        benchmark = np.exp(np.cumsum(rng.normal(0, 0.01, BASE_CANDLES)))
+        cases.append((f"market_context x{scale}", lambda benchmark=benchmark, closes=closes: compute_context(benchmark, closes)))
+
+    for scale in scales:
+        # attrs yok: indikatör önbelleği devre dışı, her çalıştırma gerçekten hesaplar
+        df = synthetic_candles(BASE_CANDLES * scale)
+        cases.append((f"get_tp_and_sl x{scale}", lambda df=df: get_tp_and_sl(df, "LONG", 1.0, 0.6)))
+        for name, module in strategies.items():
+            cases.append((f"calculate_signal[{name}] x{scale}", lambda df=df, module=module: module.calculate_signal(df)))
+        price = float(df["close"].iloc[-1])
+        cases.append((f"get_chart x{scale}", lambda df=df, price=price, scale=scale: get_chart(
+            df, strategy_name="bench", tp=price * 1.01, sl=price * 0.994, symbol=f"BENCH{scale}")))
+
+    chart_path = str(project_root / "lib" / "sms" / "test_chart.png")
+    for scale in scales:
+        async def send_batch(scale=scale):
+            futures = []
+            for i in range(scale):
+                futures += sms.enqueue_message(text=f"🧪 BENCH #{i}", chat_types=["signal", "log"],
+                                               chart_path=chart_path if i % 10 == 0 else None, priority="signal")
+            await asyncio.gather(*futures)
+        cases.append((f"send_message x{scale}", send_batch))
+    return cases
+
+
+def compare(name, seconds, peak, baseline, tolerance, memory_tolerance):
+    """Baseline ile karşılaştırır; gerileme varsa açıklama döndürür"""
+    reference = baseline.get(name)
+    if reference is None:
+        return None, "yeni"
+    problems = []
+    if seconds - reference["seconds"] > max(reference["seconds"] * tolerance, MIN_LATENCY_DELTA):
+        problems.append(f"süre {reference['seconds'] * 1000:.2f} → {seconds * 1000:.2f} ms")
+    if peak - reference["peak_bytes"] > max(reference["peak_bytes"] * memory_tolerance, MIN_MEMORY_DELTA):
+        problems.append(f"bellek {reference['peak_bytes'] / 1024:.0f} → {peak / 1024:.0f} KB")
+    change = (seconds / reference["seconds"] - 1) * 100 if reference["seconds"] else 0.0
+    return ("; ".join(problems) or None), f"{change:+.0f}%"
+
+
+# --------------------------
+# Altın sinyaller
+# --------------------------
+
+def _rounded(value):
+    if isinstance(value, float):
+        return float(f"{value:.6g}")
+    return value
+
+
+def golden_signals(module):
+    """
+    Fixture ve sentetik serilerde kayan 300 mumluk pencerelerde calculate_signal sonuçları:
+    sinyal listesi + GOLDEN_DETAIL_KEYS detaylarının (6 anlamlı basamak) özeti.
+    """
+    datasets = {"fixture": parse_candles(load_fixture(), "BTCUSDT", "15min")}
+    for seed in (1, 2, 3):
+        datasets[f"synthetic-{seed}"] = synthetic_candles(BASE_CANDLES * 5, seed=seed)
+
+    results = {}
+    for dataset, df in datasets.items():
+        df = df.copy()
+        df.attrs = {}
+        signals = []
+        digest = hashlib.sha256()
+        for end in range(BASE_CANDLES, len(df) + 1, GOLDEN_WINDOW_STEP):
+            side, details = module.calculate_signal(df.iloc[end - BASE_CANDLES:end])
+            bar_time = df.index[end - 1].isoformat()
+            if side:
+                signals.append([bar_time, side])
+            rounded = {key: _rounded(value) for key, value in sorted((details or {}).items()) if key in GOLDEN_DETAIL_KEYS}
+            digest.update(json.dumps([bar_time, side, rounded], default=str).encode())
+        results[dataset] = {"signals": signals, "details_sha256": digest.hexdigest()}
+    return results
+
+
+def check_golden(strategies, update):
+    """
+    Strateji çıktılarını kayıtlı altın verilerle karşılaştırır; hata listesi döndürür.
+    Altın veri depoda tutulur; eksikse sessizce yeniden kaydedilmez, sadece --update-golden ile yazılır.
+    """
+    if not GOLDEN_PATH.exists() and not update:
+        return [f"{GOLDEN_PATH} bulunamadı (bilinçli olarak yeniden üretmek için --update-golden)"]
+    golden = json.loads(GOLDEN_PATH.read_text(encoding="utf-8")) if GOLDEN_PATH.exists() else {}
+    failures = []
+    for name, module in strategies.items():
+        current = golden_signals(module)
+        expected = golden.get(name)
+        if update:
+            golden[name] = current
+            count = sum(len(values["signals"]) for values in current.values())
+            print(f"   💾 {name}: altın veri kaydedildi ({count} sinyal)")
+            continue
+        if expected is None:
+            failures.append(f"{name}: altın veri yok (--update-golden)")
+            continue
+        for dataset, values in current.items():
+            reference = expected.get(dataset)
+            if reference is None:
+                failures.append(f"{name}/{dataset}: altın veri yok (--update-golden)")
+            elif values["signals"] != reference["signals"]:
+                missing = [s for s in reference["signals"] if s not in values["signals"]]
+                extra = [s for s in values["signals"] if s not in reference["signals"]]
+                failures.append(f"{name}/{dataset}: sinyaller değişti (kaybolan {missing[:3]}, yeni {extra[:3]})")
+            elif values["details_sha256"] != reference["details_sha256"]:
+                failures.append(f"{name}/{dataset}: sinyaller aynı ama indikatör detayları değişti")
+            else:
+                print(f"   ✅ {name}/{dataset}: {len(values['signals'])} sinyal eşleşti")
+    if update and strategies:
+        GOLDEN_PATH.write_text(json.dumps(golden, indent=1), encoding="utf-8")
+    return failures
+
+
+# --------------------------
+# Ana akış
+# --------------------------
+
+async def main(args):
+    print("=" * 60)
+    print("🧪 Benchmark Başlıyor...")
+    print("=" * 60)
+
+    # Telegram yerine sahte Bot API (gecikme ve limit yok: istemci tarafı maliyet ölçülür)
+    server = await FakeTelegramServer(latency=0, jitter=0, upload_seconds_per_mb=0, global_rate=None,
+                                      chat_rate=None, seed=42).start()
+    os.environ["TELEGRAM_DRY_RUN"] = "1"
+    os.environ["TELEGRAM_API_URL"] = server.base_url
+    os.environ.setdefault("TELEGRAM_WARMUP_CONNECTIONS", "1")
+    import lib.sms.sms as sms
+    logging.getLogger().setLevel(logging.WARNING)
+    sms.outbound_queue.chat_rate = sms.outbound_queue.global_rate = 1_000_000
+    sms.outbound_queue.group_rate_per_minute = 1_000_000
+    await sms.start_bot()
+
+    strategies = {}
+    for name in STRATEGIES:
+        module = load_strategy(name)
+        if module is not None:
+            strategies[name] = module
+    logging.getLogger().setLevel(logging.WARNING)
+
+    baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8")) if BASELINE_PATH.exists() else {}
+    results = {}
+    regressions = []
+    try:
+        print(f"\n📊 Hız ve bellek (en iyi süre, tolerans süre %{args.tolerance * 100:.0f} / bellek %{args.memory_tolerance * 100:.0f})")
+        for name, func in build_cases(strategies, args.scales, sms):
+            if args.only and args.only not in name:
+                continue
+            seconds, median, peak = await measure(func)
+            results[name] = {"seconds": seconds, "median_seconds": median, "peak_bytes": peak}
+            problem, change = compare(name, seconds, peak, baseline, args.tolerance, args.memory_tolerance)
+            mark = "❌" if problem else "✅"
+            print(f"   {mark} {name:<44} {seconds * 1000:9.2f} ms (medyan {median * 1000:9.2f}) | {peak / 1024:7.0f} KB | {change:>5}"
+                  + (f"  ({problem})" if problem else ""))
+            if problem:
+                regressions.append(f"{name}: {problem}")
+    finally:
+        await sms.shutdown_bot()
+        await server.stop()
+
+    if args.update_baseline or not baseline:
+        merged = {**baseline, **results}
+        BASELINE_PATH.write_text(json.dumps(merged, indent=1, sort_keys=True), encoding="utf-8")
+        print(f"\n💾 Baseline kaydedildi: {BASELINE_PATH}")
+        regressions = []
+
+    print("\n📊 Altın sinyal kontrolü")
+    if strategies:
+        golden_failures = check_golden(strategies, args.update_golden)
+    else:
+        print("   ⚠️  Yüklenebilen strateji yok, atlandı")
+        golden_failures = []
+
+    print("\n" + "=" * 60)
+    if regressions or golden_failures:
+        for line in regressions + golden_failures:
+            print(f"❌ {line}")
+        print("=" * 60)
+        return 1
+    print("✅ Benchmark tamamlandı, gerileme yok!")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sıcak yollar için benchmark ve gerileme kontrolü")
+    parser.add_argument("--scales", default=",".join(str(scale) for scale in SCALES), help="ör. 1,10,100")
+    parser.add_argument("--only", default=None, help="sadece adında bu metin geçen vakalar")
+    parser.add_argument("--tolerance", type=float, default=LATENCY_TOLERANCE, help="izin verilen yavaşlama oranı")
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE, help="izin verilen bellek artışı oranı")
+    parser.add_argument("--update-baseline", action="store_true", help="sonuçları yeni baseline olarak kaydet")
+    parser.add_argument("--update-golden", action="store_true", help="strateji çıktılarını yeni altın veri olarak kaydet")
+    parser.add_argument("--record", action="store_true", help="Bitget'ten canlı yanıtı fixture olarak kaydet ve çık")
+    args = parser.parse_args()
+    args.scales = [int(scale) for scale in args.scales.split(",") if scale.strip()]
+    if args.record:
+        record_fixture()
+        sys.exit(0)
+    sys.exit(asyncio.run(main(args)))
@@ -69,8 +69,8 @@ def test_get_candles():
     print("\n📊 Test 6: DataFrame yapısı kontrolü")
     if df1 is not None:
         print(f"   Kolon sayısı: {len(df1.columns)}")
-        print(f"   Beklenen kolonlar: timestamp, open, high, low, close, volume, quote_volume, quote_volume_repeat")
-        expected_cols = ["open", "high", "low", "close", "volume", "quote_volume", "quote_volume_repeat"]
+        print(f"   Beklenen kolonlar: timestamp (index), open, high, low, close, volume, quote_volume")
+        expected_cols = ["open", "high", "low", "close", "volume", "quote_volume"]
         missing_cols = [col for col in expected_cols if col not in df1.columns]
         if missing_cols:
             print(f"   ⚠️ Eksik kolonlar: {missing_cols}")
@@ -0,0 +1,99 @@
+import sys
+import os
+import time
+import asyncio
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from lib.chart import chart_engine
+from lib.utils import get_candles, get_chart
+
+RUNS = 10
+
+
+def synthetic_candles(n: int = 300, seed: int = 42) -> pd.DataFrame:
+    """Rastgele yürüyüş ile sahte mum verisi üret (API erişimi yoksa)"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.002, n)) * close
+    index = pd.date_range(end=pd.Timestamp.now(tz="UTC").floor("15min"), periods=n, freq="15min")
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": rng.uniform(100, 1000, n),
+    }, index=index)
+
+
+def measure(label, df, renderer, max_bars=None):
+    """Ortalama çizim süresi ve tepe bellek kullanımını ölç"""
+    tp = float(df["close"].iloc[-1]) * 1.01
+    sl = float(df["close"].iloc[-1]) * 0.994
+
+    # Isınma: şablon oluşturma maliyeti ölçüme dahil edilmez
+    asyncio.run(get_chart(df, strategy_name="bench", tp=tp, sl=sl, symbol=label, renderer=renderer, max_bars=max_bars))
+    plt.close("all")
+
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        asyncio.run(get_chart(df, strategy_name="bench", tp=tp, sl=sl, symbol=label, renderer=renderer, max_bars=max_bars))
+        plt.close("all")
+    elapsed = (time.perf_counter() - start) / RUNS
+
+    # tracemalloc süreyi bozduğu için bellek ayrı bir çizimde ölçülür
+    tracemalloc.start()
+    asyncio.run(get_chart(df, strategy_name="bench", tp=tp, sl=sl, symbol=label, renderer=renderer, max_bars=max_bars))
+    plt.close("all")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"   {renderer:<11} {len(df):>5} mum | {elapsed * 1000:8.1f} ms/grafik | tepe bellek {peak / 1024 / 1024:6.2f} MB")
+    return elapsed, peak
+
+
+def test_chart_benchmark():
+    """get_chart: hızlı motor ile mplfinance karşılaştırması"""
+    print("=" * 50)
+    print("🧪 get_chart Benchmark Başlıyor...")
+    print("=" * 50)
+    os.makedirs("temp", exist_ok=True)
+
+    df = get_candles(symbol="BTCUSDT", granularity="15min", limit=200)
+    if df is None:
+        print("⚠️ API'den veri alınamadı, sentetik veri kullanılıyor")
+        df = synthetic_candles(200)
+
+    print(f"\n📊 Test 1: {len(df)} mum")
+    mpf_time, mpf_peak = measure("BTCUSDT", df, "mplfinance")
+    fast_time, fast_peak = measure("BTCUSDT", df, "fast")
+    print(f"   ⚡ Hızlanma: x{mpf_time / fast_time:.1f} | Bellek oranı: x{mpf_peak / max(fast_peak, 1):.1f}")
+
+    print("\n📊 Test 2: Uzun pencere (2000 mum, downsample ile)")
+    long_df = synthetic_candles(2000)
+    mpf_time, mpf_peak = measure("LONGWIN", long_df, "mplfinance")
+    fast_time, fast_peak = measure("LONGWIN", long_df, "fast", max_bars=200)
+    print(f"   ⚡ Hızlanma: x{mpf_time / fast_time:.1f} | Bellek oranı: x{mpf_peak / max(fast_peak, 1):.1f}")
+
+    print("\n📊 Test 3: Çıktı boyutu / kodlama karşılaştırması")
+    for fmt, palette, max_bytes in (("png", False, None), ("png", True, None), ("webp", False, None), ("png", False, 12 * 1024)):
+        asyncio.run(get_chart(df, strategy_name="bench", symbol="SIZE", fmt=fmt, palette=palette, max_bytes=max_bytes))
+        r = chart_engine.renders[-1]
+        budget = f"bütçe {max_bytes // 1024} KB" if max_bytes else "bütçesiz"
+        print(f"   {fmt:<4} palet={str(r.palette):<5} {budget:<12} → {r.bytes / 1024:7.1f} KB | "
+              f"{r.width}x{r.height} @ {r.dpi} dpi | çizim {r.render_ms:6.1f} ms | kodlama {r.encode_ms:6.1f} ms")
+
+    print("\n" + "=" * 50)
+    print("✅ Benchmark tamamlandı!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_chart_benchmark()
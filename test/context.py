@@ -0,0 +1,122 @@
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from lib.cache import candle_cache
+from lib.candles import CandleSeries
+from lib.context import MarketContextBuilder, align_windows, compute_context
+
+BARS = 400
+STEP = 900 * 10 ** 9  # 15 dk (ns)
+ALTS = ["ETHUSDT", "SOLUSDT", "XRPUSDT", "DOGEUSDT"]
+
+
+def make_closes(seed: int = 7):
+    # BTC düşüş trendinde; ilk üç coin BTC'yi izler, DOGE bağımsız
+    rng = np.random.default_rng(seed)
+    btc = rng.normal(-0.001, 0.01, BARS)
+    closes = {"BTCUSDT": 30000 * np.exp(np.cumsum(btc))}
+    for i, coin in enumerate(ALTS):
+        noise = rng.normal(0, 0.01, BARS)
+        returns = noise if coin == "DOGEUSDT" else btc * (1 + i * 0.2) + noise * 0.3
+        closes[coin] = (10 + i) * np.exp(np.cumsum(returns))
+    return closes
+
+
+class FakeExchange:
+    """Borsa yerine: `now` mumuna kadar olan son `limit` mumu döndürür"""
+
+    def __init__(self, closes):
+        self.closes = closes
+        self.now = 300
+
+    def fetch(self, symbol, granularity, limit):
+        start = max(0, self.now + 1 - limit)
+        close = self.closes[symbol][start:self.now + 1]
+        values = np.vstack([close, close * 1.001, close * 0.999, close, np.ones_like(close), close])
+        times = np.arange(start, self.now + 1, dtype=np.int64) * STEP
+        return CandleSeries.from_arrays(times, values, symbol=symbol, granularity=granularity)
+
+
+async def run(exchange: FakeExchange, builder: MarketContextBuilder):
+    # Döngü N: coinler (ve BTC) N. mumda çekilir
+    for coin in ["BTCUSDT"] + ALTS:
+        await candle_cache.get(symbol=coin, granularity="15min", limit=300)
+    # Döngü N + 1: bağlam fetch aşamasından önce hesaplanır, sadece BTC yeni mumla çekilir
+    exchange.now += 1
+    candle_cache.ttl = 0
+    return await builder.refresh(ALTS)
+
+
+def test_context():
+    """Önceki döngüden kalan coin pencereleri BTC'den bir mum geride: bağlam yine hesaplanmalı"""
+
+    print("=" * 50)
+    print("🧪 Piyasa Bağlamı Test Başlıyor...")
+    print("=" * 50)
+
+    closes = make_closes()
+    exchange = FakeExchange(closes)
+    candle_cache.fetch = exchange.fetch
+    builder = MarketContextBuilder()
+    context = asyncio.run(run(exchange, builder))
+    lagged = exchange.now - 1
+
+    # Test 1: hizalama sonrası tüm coinler matriste
+    print("\n📊 Test 1: Bir mum geride kalan pencereler")
+    print(f"   Coinler: {context.symbols}, genişlik: {context.breadth_above_ema}")
+    if set(context.symbols) == {"BTCUSDT", *ALTS} and context.breadth_above_ema is not None:
+        print("✅ Başarılı! Korelasyon ve genişlik hesaplandı")
+    else:
+        print("❌ Hata: Pencereler atıldı, bağlam boş")
+
+    # Test 2: korelasyon, aynı muma hizalanmış verinin doğrudan hesabıyla aynı; fiyat / trend güncel BTC mumundan
+    print("\n📊 Test 2: Referans karşılaştırması")
+    reference = compute_context(closes["BTCUSDT"][:lagged + 1],
+                                {coin: closes[coin][lagged + 1 - 300:lagged + 1] for coin in ALTS})
+    difference = max(abs(context.btc_correlation[coin] - reference.btc_correlation[coin]) for coin in ALTS)
+    print(f"   BTC korelasyonları: { {coin: round(value, 3) for coin, value in context.btc_correlation.items()} }")
+    print(f"   En büyük fark: {difference:.2e}, BTC fiyatı: {context.btc_price:.2f}")
+    if difference < 1e-9 and context.btc_price == closes["BTCUSDT"][exchange.now]:
+        print("✅ Başarılı! Korelasyon hizalanmış mumlardan, fiyat son BTC mumundan")
+    else:
+        print("❌ Hata: Hizalama yanlış")
+
+    # Test 3: rejim filtresi artık devrede
+    print("\n📊 Test 3: Rejim filtresi")
+    print(f"   BTC trend: {context.btc_trend}")
+    blocked = context.regime_conflict("ETHUSDT", "LONG")
+    independent = context.regime_conflict("DOGEUSDT", "LONG")
+    if context.btc_trend == "down" and blocked and not independent:
+        print("✅ Başarılı! Korele coinde BTC'ye ters sinyal bastırılır, bağımsız coinde bastırılmaz")
+    else:
+        print("❌ Hata: Rejim filtresi çalışmıyor")
+
+    # Test 4: align_windows kenar durumları
+    print("\n📊 Test 4: align_windows")
+    times = np.arange(10, dtype=np.int64) * STEP
+    windows = {
+        "BTCUSDT": (times, np.arange(10.0)),
+        "A": (times[:-1], np.arange(9.0)),
+        "B": (times[:-1], np.arange(9.0)),
+        "C": (times, np.arange(10.0)),  # daha yeni: kırpılır
+        "D": (times[:-3], np.arange(7.0)),  # hedef mum yok: atlanır
+    }
+    end, aligned = align_windows(windows)
+    lengths = {coin: len(values) for coin, values in aligned.items()}
+    print(f"   Hedef mum: {end // STEP}, uzunluklar: {lengths}")
+    if end == times[-2] and lengths == {"BTCUSDT": 9, "A": 9, "B": 9, "C": 9}:
+        print("✅ Başarılı! Çoğunluğun son mumuna hizalandı")
+    else:
+        print("❌ Hata: Hizalama yanlış")
+
+    print("\n" + "=" * 50)
+    print("✅ Piyasa bağlamı testleri tamamlandı!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_context()
@@ -0,0 +1,252 @@
+import argparse
+import asyncio
+import importlib.util
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Proje root'unu sys.path'e ekle
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import requests
+
+from lib.fake_exchange import STATS_PATH, WS_PATH, FakeExchangeServer, SyntheticMarket, TickerSubscriber
+from lib.sms.fake_api import FakeTelegramServer
+
+SCALES = (10, 100, 1000)
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def rss_mb():
+    """Şu anki RSS (MB); /proc yoksa tepe değer"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE / 1024 / 1024
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def serve_exchange(args, symbols, ready):
+    """Sentetik borsa ayrı süreçte: CPU ve bellek ölçümü sadece botu kapsar"""
+    async def run():
+        server = await FakeExchangeServer(
+            symbols=symbols,
+            market=SyntheticMarket(model=args.model, seed=42),
+            latency=args.latency,
+            jitter=args.jitter,
+            rate=args.rate,
+            error_rate=args.error_rate,
+            tick_interval=args.tick_interval,
+            seed=42,
+        ).start()
+        ready.put(server.port)
+        await asyncio.Event().wait()
+    asyncio.run(run())
+
+
+class FetchCounter:
+    """candle_cache.fetch sarmalayıcısı: borsa isteklerini ve veri alınamayanları (None) sayar"""
+
+    def __init__(self, fetch):
+        self.fetch = fetch
+        self.calls = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, **kwargs):
+        series = self.fetch(**kwargs)
+        with self._lock:
+            self.calls += 1
+            self.failed += series is None or len(series) == 0
+        return series
+
+
+def exchange_stats(base_url):
+    return requests.get(base_url + STATS_PATH, timeout=10).json()
+
+
+def load_strategy(name):
+    """Strateji modülünü yükler; bağımlılıkları (ör. pandas_ta) yoksa None"""
+    path = project_root / "strategies" / f"{name}.py"
+    try:
+        spec = importlib.util.spec_from_file_location(path.stem, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    except ImportError as e:
+        print(f"⚠️  {name} yüklenemedi, sadece veri yolu ölçülecek (mum çekme + piyasa bağlamı): {e}")
+        return None
+
+
+def data_path_cycle():
+    """Strateji yüklenemezse: stratejinin veri yolu (paylaşılan önbellekten mum çekme + piyasa bağlamı)"""
+    from lib.cache import candle_cache
+    from lib.context import market_context
+    from lib.fetch import cycle_deadline
+    from lib.pipeline import Pipeline, Stage
+
+    async def fetch_stage(item):
+        item["df"] = await candle_cache.get(symbol=item["coin"], granularity="15min", limit=300)
+        return item if item["df"] is not None else None
+
+    pipeline = Pipeline([Stage("fetch", fetch_stage, concurrency=4)], name="data-path")
+
+    async def run_cycle(coins):
+        with cycle_deadline(450):
+            await market_context.refresh(coins)
+            await pipeline.run({"coin": coin} for coin in coins)
+    return run_cycle
+
+
+async def run_scale(args, scale, exchange_url, telegram, module, data_cycle, counter):
+    coins = ["BTCUSDT"] + [f"SYN{i:04d}USDT" for i in range(scale - 1)]
+    ws_url = exchange_url.replace("http://", "ws://") + WS_PATH
+    subscriber = await TickerSubscriber(ws_url, coins).start() if args.ws else None
+    exchange_before, telegram_before = await asyncio.to_thread(exchange_stats, exchange_url), telegram.stats()
+    ws_before = subscriber.messages if subscriber else 0
+    fetches_before, failed_before = counter.calls, counter.failed
+    durations, cpu = [], []
+    started = time.perf_counter()
+    for cycle in range(args.cycles):
+        cycle_start, cpu_start = time.perf_counter(), time.process_time()
+        if module is not None:
+            module.COINS = coins
+            await module.run_cycle()
+        else:
+            await data_cycle(coins)
+        durations.append(time.perf_counter() - cycle_start)
+        cpu.append(time.process_time() - cpu_start)
+        print(f"   {scale} coin döngü {cycle + 1}/{args.cycles}: {durations[-1]:.2f} sn (CPU {cpu[-1]:.2f} sn)")
+    elapsed = time.perf_counter() - started
+    if module is not None:
+        import lib.sms.sms as sms
+        try:
+            await asyncio.wait_for(sms.outbound_queue.join(), timeout=args.drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️  Telegram kuyruğu {args.drain_timeout} sn'de boşalmadı")
+    if subscriber:
+        await subscriber.stop()
+
+    exchange_after, telegram_after = await asyncio.to_thread(exchange_stats, exchange_url), telegram.stats()
+    request_count = sum(exchange_after["requests"].values()) - sum(exchange_before["requests"].values())
+    return {
+        "scale": scale,
+        "cycle_p50": percentile(durations, 50),
+        "cycle_max": max(durations),
+        "cpu": sum(cpu) / len(cpu),
+        "rss": rss_mb(),
+        "peak_rss": peak_rss_mb(),
+        "requests": request_count,
+        "requests_per_second": request_count / elapsed,
+        "rate_limited": exchange_after["rate_limited"] - exchange_before["rate_limited"],
+        "errors": exchange_after["errors"] - exchange_before["errors"],
+        "fetches": counter.calls - fetches_before,
+        "no_data": counter.failed - failed_before,
+        "megabytes": (exchange_after["bytes_sent"] - exchange_before["bytes_sent"]) / 1024 / 1024,
+        "ws_per_second": ((subscriber.messages - ws_before) / elapsed) if subscriber else None,
+        "ws_latency_p99": percentile(list(subscriber.latencies), 99) if subscriber and subscriber.latencies else None,
+        "telegram": sum(telegram_after["delivered"].values()) - sum(telegram_before["delivered"].values()),
+    }
+
+
+async def main(args):
+    print("=" * 50)
+    print("🧪 Sentetik Borsa Yük Testi Başlıyor...")
+    print("=" * 50)
+
+    scales = sorted(args.scales)
+    context = multiprocessing.get_context("spawn")
+    ready = context.Queue()
+    exchange = context.Process(target=serve_exchange, daemon=True, args=(
+        args, ["BTCUSDT"] + [f"SYN{i:04d}USDT" for i in range(scales[-1] - 1)], ready))
+    exchange.start()
+    exchange_url = f"http://127.0.0.1:{ready.get(timeout=30)}"
+    telegram = await FakeTelegramServer(latency=0.01, jitter=0.005, global_rate=None, chat_rate=None, seed=42).start()
+
+    # lib modülleri import edilmeden önce: bot sahte borsa ve sahte Telegram'a yönlenir, durum dosyaları geçici
+    state_dir = tempfile.mkdtemp(prefix="exchange-load-")
+    os.environ["BITGET_BASE_URLS"] = exchange_url
+    os.environ["TELEGRAM_DRY_RUN"] = "1"
+    os.environ["TELEGRAM_API_URL"] = telegram.base_url
+    os.environ.setdefault("TELEGRAM_WARMUP_CONNECTIONS", "1")
+    os.environ["SIGNAL_HISTORY_PATH"] = os.path.join(state_dir, "signal_history.db")
+    os.environ["SIGNAL_DEDUP_PATH"] = os.path.join(state_dir, "signal_dedup.json")
+    os.environ["CHECKPOINT_PATH"] = os.path.join(state_dir, "checkpoint.bin")
+    os.environ.pop("CANDLE_SHM", None)
+
+    module = load_strategy(args.strategy)
+    data_cycle = data_path_cycle() if module is None else None
+    logging.getLogger().setLevel(logging.DEBUG if args.verbose else logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    from lib.cache import candle_cache
+    # Her döngü gerçekten borsaya gitsin (varsayılan TTL aynı periyottaki tekrar istekleri önbellekten verir)
+    candle_cache.ttl = 0
+    counter = candle_cache.fetch = FetchCounter(candle_cache.fetch)
+
+    import lib.sms.sms as sms
+    if module is not None:
+        await sms.start_bot()
+    results = []
+    try:
+        for scale in scales:
+            print(f"🔄 {scale} coin ({args.cycles} döngü)")
+            results.append(await run_scale(args, scale, exchange_url, telegram, module, data_cycle, counter))
+    finally:
+        if module is not None:
+            await sms.shutdown_bot()
+        exchange.terminate()
+        exchange.join()
+        await telegram.stop()
+
+    print()
+    print(f"📊 {args.strategy if module else 'veri yolu'} | model {args.model} | gecikme {args.latency * 1000:.0f} ms | "
+          f"limit {args.rate or '∞'} istek/sn | hata %{args.error_rate * 100:.0f}")
+    print(f"{'coin':>6} {'döngü p50':>10} {'max':>7} {'CPU':>6} {'RSS':>8} {'tepe':>8} {'istek/sn':>9} "
+          f"{'429':>5} {'502':>5} {'veri yok':>9} {'MB':>6} {'ws/sn':>8} {'ws p99':>7} {'tg':>5}")
+    for r in results:
+        ws_rate = f"{r['ws_per_second']:.0f}" if r["ws_per_second"] is not None else "-"
+        ws_p99 = f"{r['ws_latency_p99'] * 1000:.0f}ms" if r["ws_latency_p99"] is not None else "-"
+        print(f"{r['scale']:>6} {r['cycle_p50']:>9.2f}s {r['cycle_max']:>6.2f}s {r['cpu']:>5.2f}s "
+              f"{r['rss']:>6.0f}MB {r['peak_rss']:>6.0f}MB {r['requests_per_second']:>9.1f} {r['rate_limited']:>5} "
+              f"{r['errors']:>5} {r['no_data']:>4}/{r['fetches']:<4} {r['megabytes']:>6.1f} {ws_rate:>8} {ws_p99:>7} {r['telegram']:>5}")
+    print("=" * 50)
+    print("✅ Yük testi tamamlandı!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sentetik borsa üzerinden uçtan uca strateji yük testi")
+    parser.add_argument("--strategy", default="no-risk")
+    parser.add_argument("--scales", default=",".join(map(str, SCALES)), help="virgülle ayrılmış coin sayıları")
+    parser.add_argument("--cycles", type=int, default=2)
+    parser.add_argument("--model", choices=["gbm", "regime"], default="regime")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--rate", type=float, default=None, help="borsa uç başına istek/sn limiti (Bitget: 20)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tick-interval", type=float, default=0.5, help="WebSocket ticker itme aralığı (sn)")
+    parser.add_argument("--no-ws", dest="ws", action="store_false", help="WebSocket abonesi açma")
+    parser.add_argument("--drain-timeout", type=float, default=60, help="Telegram kuyruğunun boşalması için beklenecek süre")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    args.scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    asyncio.run(main(args))
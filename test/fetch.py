@@ -0,0 +1,128 @@
+import sys
+import os
+import time
+from concurrent.futures import Future
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.fetch import MarketDataClient, _Failure, cycle_deadline
+
+COOLDOWN = 0.2  # sn: testte devre kısa sürede yarı açığa geçsin
+URL = "http://mirror.invalid"
+
+
+class ScriptedClient(MarketDataClient):
+    """Ağa çıkmadan sırayla verilen sonuçları döndüren istemci: "ok", "error", "limited" veya "crash" """
+
+    def __init__(self):
+        super().__init__([URL], target="test", hedge=False)
+        self.endpoints[0].breaker.cooldown = COOLDOWN
+        self.script = []
+        self.calls = 0
+
+    def _attempt(self, endpoint, path, params, timeout, name, limited):
+        self.calls += 1
+        outcome = self.script.pop(0)
+        if outcome == "error":
+            raise _Failure("http_502", "HTTP 502")
+        if outcome == "limited":
+            raise _Failure("timeout", f"{timeout:.1f} sn zaman aşımı", limited=True)
+        if outcome == "crash":
+            raise RuntimeError("beklenmeyen hata")
+        return 200, {"data": []}
+
+
+def open_circuit(client: ScriptedClient):
+    breaker = client.endpoints[0].breaker
+    client.script = ["error"] * breaker.failures
+    for _ in range(breaker.failures):
+        client.get("/candles", {})
+    time.sleep(COOLDOWN)
+
+
+def test_circuit_breaker():
+    """Yarı açık deneme sonuçsuz biterse (bütçe zaman aşımı, beklenmeyen hata) devre takılı kalmamalı"""
+
+    print("=" * 50)
+    print("🧪 Devre Kesici Test Başlıyor...")
+    print("=" * 50)
+
+    client = ScriptedClient()
+    breaker = client.endpoints[0].breaker
+
+    # Test 1: art arda hatalarda devre açılır, açıkken istek atılmaz
+    print("\n📊 Test 1: Açılma")
+    client.script = ["error"] * breaker.failures
+    for _ in range(breaker.failures):
+        client.get("/candles", {})
+    calls = client.calls
+    blocked = client.get("/candles", {}) is None and client.calls == calls
+    print(f"   Durum: {breaker.state}")
+    if breaker.state == "open" and blocked:
+        print("✅ Başarılı! Devre açıldı ve istek atılmadı")
+    else:
+        print("❌ Hata: Devre açılmadı")
+
+    # Test 2: yarı açık deneme döngü bütçesi yüzünden zaman aşımına uğrar: sonuç sayılmaz
+    print("\n📊 Test 2: Yarı açık → bütçe zaman aşımı")
+    time.sleep(COOLDOWN)
+    client.script = ["limited"]
+    with cycle_deadline(5.0):
+        client.get("/candles", {})
+    print(f"   Durum: {breaker.state}, deneme sürüyor: {breaker._trial}")
+    if breaker.state == "half_open" and not breaker._trial:
+        print("✅ Başarılı! Deneme bırakıldı, devre yarı açık")
+    else:
+        print("❌ Hata: Deneme takılı kaldı")
+
+    # Test 3: sıradaki istek yeni deneme olur; başarılıysa devre kapanır
+    print("\n📊 Test 3: Yeni deneme → kapanma")
+    client.script = ["ok"]
+    data = client.get("/candles", {})
+    print(f"   Durum: {breaker.state}")
+    if data == {"data": []} and breaker.state == "closed":
+        print("✅ Başarılı! Devre kapandı")
+    else:
+        print("❌ Hata: Devre kapanmadı")
+
+    # Test 4: geç biten (terk edilmiş) deneme de aynı kurala uyar
+    print("\n📊 Test 4: Geç sonuçlar (_late_result)")
+    endpoint = client.endpoints[0]
+    results = []
+    for outcome in (_Failure("timeout", "zaman aşımı", limited=True), RuntimeError("beklenmeyen hata")):
+        open_circuit(client)
+        breaker.allow()  # deneme başladı, sonra terk edildi
+        future = Future()
+        future.set_exception(outcome)
+        client._late_result(future, endpoint)
+        results.append((breaker.state, breaker._trial))
+    print(f"   Bütçe zaman aşımı: {results[0]}, beklenmeyen hata: {results[1]}")
+    if results[0] == ("half_open", False):
+        print("✅ Başarılı! Sonuçsuz geç deneme bırakıldı")
+    else:
+        print("❌ Hata: Geç deneme devreyi kilitledi")
+    if results[1] == ("open", False):
+        print("✅ Başarılı! Beklenmeyen hata deneme hatası sayıldı, devre yeniden açıldı")
+    else:
+        print("❌ Hata: Beklenmeyen hata yutuldu")
+
+    # Test 5: ana yolda beklenmeyen hata da denemeyi bitirir
+    print("\n📊 Test 5: Yarı açık → beklenmeyen hata")
+    time.sleep(COOLDOWN)
+    client.script = ["crash"]
+    client.get("/candles", {})
+    print(f"   Durum: {breaker.state}, deneme sürüyor: {breaker._trial}")
+    time.sleep(COOLDOWN)
+    client.script = ["ok"]
+    client.get("/candles", {})
+    if breaker.state == "closed":
+        print("✅ Başarılı! Hata sonrası yeni deneme devreyi kapattı")
+    else:
+        print("❌ Hata: Devre takılı kaldı")
+
+    print("\n" + "=" * 50)
+    print("✅ Devre kesici testleri tamamlandı!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_circuit_breaker()
@@ -0,0 +1,123 @@
+import sys
+import os
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.history import SignalHistory
+
+SIGNALS = 20000
+HOUR = 3600
+NOW = 1_700_000_000 // HOUR * HOUR  # saat başı: frekans dilimleri sabit
+
+
+def test_history():
+    """SignalHistory: kuyruklu yazma, flush, sorgular ve kayıt hızı"""
+
+    print("=" * 50)
+    print("🧪 Sinyal Geçmişi Test Başlıyor...")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        history = SignalHistory(os.path.join(directory, "history.db"), flush_interval=0.05)
+        try:
+            # Test 1: record() sadece kuyruğa bırakır; flush() sonrası hepsi yazılmış olmalı
+            print("\n📊 Test 1: Kayıt ve flush")
+            history.record("no-risk", "BTCUSDT", "LONG", price="65000.5", tp=65325.5, sl=64805.5, bar_time=NOW,
+                           details={"rsi": 28.0, "adx": 30.0, "vol_pct": 150.0, "macd_cross": "up"}, ts=NOW + 10)
+            history.record("no-risk", "BTCUSDT", "SHORT", price=66000, details={"rsi": 72.0, "adx": 20.0,
+                           "vol_pct": float("nan")}, ts=NOW + HOUR + 10)
+            history.record("no-risk", "ETHUSDT", "LONG", price=3000, details={"rsi": 31.0}, ts=NOW + 20)
+            history.record("no-risk-2", "BTCUSDT", "LONG", price=65100, ts=NOW + 30)
+            flushed = history.flush()
+            stats = history.stats()
+            print(f"   {stats}")
+            if flushed and stats["written"] == 4 and stats["pending"] == 0 and stats["errors"] == 0:
+                print("✅ Başarılı! 4 kayıt yazıldı, kuyruk boş")
+            else:
+                print("❌ Hata: Kayıtlar yazılmadı")
+
+            # Test 2: recent() yeniden eskiye, filtreler ve details dict olarak
+            print("\n📊 Test 2: recent()")
+            rows = history.recent(10)
+            order = [row["ts"] for row in rows]
+            btc = history.recent(10, strategy="no-risk", symbol="BTCUSDT")
+            since = history.recent(10, since=NOW + HOUR)
+            first = btc[-1]
+            print(f"   Sıra: {order}")
+            if order == sorted(order, reverse=True) and len(rows) == 4:
+                print("✅ Başarılı! Son sinyaller yeniden eskiye")
+            else:
+                print("❌ Hata: Sıralama veya sayı yanlış")
+            if [row["side"] for row in btc] == ["SHORT", "LONG"] and [row["ts"] for row in since] == [NOW + HOUR + 10]:
+                print("✅ Başarılı! strategy / symbol / since filtreleri")
+            else:
+                print("❌ Hata: Filtreler yanlış")
+            if (first["price"] == 65000.5 and first["tp"] == 65325.5 and first["details"]["macd_cross"] == "up"
+                    and btc[0]["details"]["vol_pct"] is None and history.recent(1, strategy="no-risk-2")[0]["details"] == {}):
+                print("✅ Başarılı! Fiyat float, details dict, NaN -> null")
+            else:
+                print("❌ Hata: Kayıt içeriği yanlış")
+
+            # Test 3: frequency() saatlik dilim ve strateji başına sayım
+            print("\n📊 Test 3: frequency()")
+            buckets = [(row["bucket"], row["strategy"], row["count"]) for row in history.frequency(HOUR)]
+            print(f"   {buckets}")
+            if buckets == [(NOW, "no-risk", 2), (NOW, "no-risk-2", 1), (NOW + HOUR, "no-risk", 1)]:
+                print("✅ Başarılı! Dilim başına sayımlar doğru")
+            else:
+                print("❌ Hata: Frekans yanlış")
+
+            # Test 4: coin_stats() sayım, LONG/SHORT dağılımı ve detay ortalamaları
+            print("\n📊 Test 4: coin_stats()")
+            coins = {row["symbol"]: row for row in history.coin_stats(strategy="no-risk")}
+            btc_stats = coins.get("BTCUSDT", {})
+            print(f"   BTCUSDT: {btc_stats}")
+            if (list(coins) == ["BTCUSDT", "ETHUSDT"] and btc_stats["count"] == 2 and btc_stats["longs"] == 1
+                    and btc_stats["shorts"] == 1 and btc_stats["last_ts"] == NOW + HOUR + 10
+                    and btc_stats["avg_rsi"] == 50.0 and btc_stats["avg_adx"] == 25.0 and btc_stats["avg_vol_pct"] == 150.0):
+                print("✅ Başarılı! Coin istatistikleri doğru")
+            else:
+                print("❌ Hata: Coin istatistikleri yanlış")
+
+            # Test 5: record() event loop'u bekletmemeli; yazma toplu işlemlerle arka planda
+            print(f"\n📊 Test 5: Kayıt hızı ({SIGNALS} sinyal, 4 thread)")
+            batches = history.batches
+
+            def producer():
+                for i in range(SIGNALS // 4):
+                    history.record("load", f"COIN{i % 100}USDT", "LONG" if i % 2 else "SHORT", price=i,
+                                   details={"rsi": 50.0, "adx": 25.0}, ts=NOW + 2 * HOUR + i)
+
+            start = time.perf_counter()
+            threads = [threading.Thread(target=producer) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            recorded = time.perf_counter() - start
+            flushed = history.flush(timeout=30)
+            written = time.perf_counter() - start
+            count = sum(row["count"] for row in history.frequency(86400, strategy="load"))
+            print(f"   record(): {recorded:.3f} sn ({SIGNALS / recorded:,.0f} kayıt/sn, "
+                  f"{recorded / SIGNALS * 1e6:.1f} µs/kayıt)")
+            print(f"   Diske yazma: {written:.3f} sn ({SIGNALS / written:,.0f} kayıt/sn), "
+                  f"{history.batches - batches} işlem")
+            if flushed and count == SIGNALS and history.stats()["errors"] == 0:
+                print("✅ Başarılı! Tüm kayıtlar toplu işlemlerle yazıldı")
+            else:
+                print(f"❌ Hata: {count} / {SIGNALS} kayıt yazıldı")
+        finally:
+            history.close()
+            connection = getattr(history._local, "connection", None)
+            if connection is not None:
+                connection.close()
+
+    print("\n" + "=" * 50)
+    print("✅ Sinyal geçmişi testleri tamamlandı!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_history()
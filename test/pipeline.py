@@ -0,0 +1,95 @@
+import asyncio
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.pipeline import Pipeline, Stage
+
+COINS = 20
+# Aşama süreleri (sn): mum çekme ve grafik çizme thread'de, analiz event loop'ta
+FETCH_SECONDS = 0.20
+ANALYZE_SECONDS = 0.02
+RENDER_SECONDS = 0.30
+
+
+async def fetch(item):
+    await asyncio.to_thread(time.sleep, FETCH_SECONDS)
+    return item
+
+
+def analyze(item):
+    time.sleep(ANALYZE_SECONDS)
+    return item
+
+
+async def render(item):
+    await asyncio.to_thread(time.sleep, RENDER_SECONDS)
+    return item
+
+
+def send(item):
+    return item
+
+
+async def sequential(items):
+    start = time.perf_counter()
+    for item in items:
+        await render(analyze(await fetch(item)))
+        send(item)
+    return time.perf_counter() - start
+
+
+async def test_pipeline():
+    """Aşamalı işlem hattı: toplam süre aşamaların toplamına değil en yavaş aşamaya yaklaşmalı"""
+
+    print("=" * 50)
+    print("🧪 Pipeline Test Başlıyor...")
+    print("=" * 50)
+    items = [{"coin": f"COIN{i}USDT"} for i in range(COINS)]
+
+    print(f"\n📊 Test 1: Sıralı döngü ({COINS} coin)")
+    sequential_seconds = await sequential(items)
+    print(f"   Süre: {sequential_seconds:.2f} sn")
+
+    print(f"\n📊 Test 2: İşlem hattı (fetch x4, analyze x1, render x2, send x1)")
+    pipeline = Pipeline([
+        Stage("fetch", fetch, concurrency=4),
+        Stage("analyze", analyze),
+        Stage("render", render, concurrency=2),
+        Stage("send", send),
+    ], queue_size=4)
+    elapsed = await pipeline.run(items)
+    bottleneck = COINS * RENDER_SECONDS / 2
+    print(f"   Süre: {elapsed:.2f} sn (en yavaş aşama: render ~{bottleneck:.2f} sn)")
+    for name, values in pipeline.metrics()["stages"].items():
+        print(f"   {name:<8} işlenen {values['processed']:>3} | doluluk %{values['utilization'] * 100:>3.0f} | "
+              f"p50 {values['latency_p50'] * 1000:>4.0f} ms | kuyruk max {values['max_queue']} | "
+              f"backpressure {values['wait_seconds']:.2f} sn")
+    if elapsed < bottleneck * 1.5:
+        print(f"✅ Başarılı! x{sequential_seconds / elapsed:.1f} daha hızlı, süre en yavaş aşamaya yakın")
+    else:
+        print("❌ Hata: İşlem hattı beklenenden yavaş")
+
+    print(f"\n📊 Test 3: Hatalı öğe sadece kendini düşürmeli")
+
+    def flaky(item):
+        if item["coin"] == "COIN3USDT":
+            raise ValueError("bozuk veri")
+        return item
+
+    pipeline = Pipeline([Stage("analyze", flaky), Stage("send", send)])
+    await pipeline.run(items)
+    stages = pipeline.metrics()["stages"]
+    if stages["analyze"]["failed"] == 1 and stages["send"]["processed"] == COINS - 1:
+        print("✅ Başarılı! 1 hata, diğer coinler işlendi")
+    else:
+        print(f"❌ Hata: {stages}")
+
+    print("\n" + "=" * 50)
+    print("✅ Pipeline testleri tamamlandı!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    asyncio.run(test_pipeline())
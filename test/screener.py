@@ -0,0 +1,159 @@
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from lib.scheduler import threshold_distance
+from lib.screener import ScreenerRules, screen
+
+try:
+    import pandas_ta as ta
+except ImportError:
+    ta = None
+
+BARS = 300
+CHECK_COINS = 30
+SCALES = (10, 100, 1000, 5000)
+TOLERANCE = 1e-6
+
+
+def make_windows(count, bars=BARS, seed=7):
+    """GBM kapanışları + rastgele fitil ve hacim; her coin farklı oynaklıkta"""
+    rng = np.random.default_rng(seed)
+    sigma = rng.uniform(0.002, 0.02, size=(count, 1))
+    close = 10 ** rng.uniform(-3, 4, size=(count, 1)) * np.exp(np.cumsum(sigma * rng.standard_normal((count, bars)), axis=1))
+    open_ = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+    high = np.maximum(open_, close) * (1 + np.abs(rng.standard_normal((count, bars))) * sigma / 2)
+    low = np.minimum(open_, close) * (1 - np.abs(rng.standard_normal((count, bars))) * sigma / 2)
+    volume = np.exp(rng.normal(10, 1, size=(count, bars)))
+    return {f"COIN{i}USDT": {"high": high[i], "low": low[i], "close": close[i], "volume": volume[i]} for i in range(count)}
+
+
+# --------------------------
+# Referans: coin başına pandas (pandas_ta tanımları; kuruluysa pandas_ta'nın kendisi)
+# --------------------------
+
+def _rma(series, length):
+    return series.ewm(alpha=1 / length, min_periods=length).mean()
+
+
+def _ema(series, length):
+    series = series.copy()
+    first = series.first_valid_index()
+    start = series.index.get_loc(first)
+    series.iloc[start + length - 1] = series.iloc[start:start + length].mean()
+    series.iloc[:start + length - 1] = np.nan
+    return series.ewm(span=length, adjust=False).mean()
+
+
+def reference(window, rules):
+    high, low, close, volume = (pd.Series(window[name]) for name in ("high", "low", "close", "volume"))
+    if ta is not None:
+        rsi = ta.rsi(close, length=14)
+        ema50, ema200 = ta.ema(close, length=50), ta.ema(close, length=200)
+        macd_df = ta.macd(close)
+        macd, signal = macd_df.iloc[:, 0], macd_df.iloc[:, 2]
+        adx = ta.adx(high, low, close)["ADX_14"]
+    else:
+        change = close.diff()
+        gain, loss = _rma(change.clip(lower=0).where(change.notna()), 14), _rma((-change).clip(lower=0).where(change.notna()), 14)
+        rsi = 100 * gain / (gain + loss)
+        ema50, ema200 = _ema(close, 50), _ema(close, 200)
+        macd = _ema(close, 12) - _ema(close, 26)
+        signal = _ema(macd, 9)
+        prev_close = close.shift()
+        true_range = pd.concat([high - low, high - prev_close, prev_close - low], axis=1).abs().max(axis=1)
+        true_range.iloc[0] = np.nan
+        up, down = high - high.shift(), low.shift() - low
+        plus = 100 * _rma(((up > down) & (up > 0)) * up, 14) / _rma(true_range, 14)
+        minus = 100 * _rma(((down > up) & (down > 0)) * down, 14) / _rma(true_range, 14)
+        adx = _rma(100 * (plus - minus).abs() / (plus + minus), 14)
+
+    hist_scale = float((macd - signal).abs().tail(50).mean())
+    cross = 0
+    if macd.iloc[-2] <= signal.iloc[-2] and macd.iloc[-1] > signal.iloc[-1]:
+        cross = 1
+    elif macd.iloc[-2] >= signal.iloc[-2] and macd.iloc[-1] < signal.iloc[-1]:
+        cross = -1
+    vol_avg = float(volume.rolling(rules.volume_window).mean().iloc[-2])
+    details = {
+        "rsi": float(rsi.iloc[-1]), "ema50": float(ema50.iloc[-1]), "ema200": float(ema200.iloc[-1]),
+        "macd_cross": cross, "macd_gap": float(macd.iloc[-1] - signal.iloc[-1]) / hist_scale,
+        "adx": float(adx.iloc[-1]), "vol_pct": (float(volume.iloc[-1]) - vol_avg) / vol_avg * 100,
+    }
+    return details, reference_distance(details, rules)
+
+
+def reference_distance(details, rules):
+    """Stratejilerin signal_distance'ı (skaler)"""
+    def side_distance(long):
+        gap = details["macd_gap"]
+        if details["macd_cross"] == (1 if long else -1):
+            macd_part = 0.0
+        elif (gap > 0) == long:
+            macd_part = 1.0
+        else:
+            macd_part = min(1.0, abs(gap))
+        parts = [
+            threshold_distance(details["rsi"], rules.rsi_long if long else rules.rsi_short, below=long, scale=20),
+            macd_part,
+            threshold_distance(details["adx"], rules.adx_min, below=False, scale=rules.adx_min / 2),
+        ]
+        if rules.volume_pct is not None:
+            parts.append(threshold_distance(details["vol_pct"], rules.volume_pct, below=False, scale=100))
+        return sum(parts) / len(parts)
+
+    if rules.trend:
+        return side_distance(details["ema50"] > details["ema200"])
+    return min(side_distance(True), side_distance(False))
+
+
+def check_accuracy():
+    print(f"🔍 Doğruluk ({'pandas_ta' if ta is not None else 'pandas referansı'}, {CHECK_COINS} coin)")
+    windows = make_windows(CHECK_COINS)
+    failures = 0
+    for rules in (ScreenerRules(), ScreenerRules(volume_pct=None), ScreenerRules(volume_pct=None, trend=False)):
+        result = screen(windows, rules)
+        for i, symbol in enumerate(result.symbols):
+            details, distance = reference(windows[symbol], rules)
+            for name, expected in details.items():
+                actual = float(result.indicators[name][i])
+                if abs(actual - expected) > TOLERANCE * max(1.0, abs(expected)):
+                    failures += 1
+                    print(f"❌ {symbol} {name}: {actual} != {expected}")
+            if abs(result.distance[i] - distance) > TOLERANCE:
+                failures += 1
+                print(f"❌ {symbol} uzaklık ({rules}): {result.distance[i]} != {distance}")
+    print("✅ İndikatörler ve uzaklıklar referansla aynı" if not failures else f"❌ {failures} fark")
+    return failures
+
+
+def check_speed():
+    print("⏱️ Hız (tek geçiş vs coin başına pandas)")
+    rules = ScreenerRules()
+    for count in SCALES:
+        windows = make_windows(count)
+        vectorized = float("inf")
+        for _ in range(3):  # ilk geçiş yeni belleğe dokunur (sayfa hataları): en iyi süre
+            started = time.perf_counter()
+            result = screen(windows, rules)
+            vectorized = min(vectorized, time.perf_counter() - started)
+        sample = list(windows)[:min(count, 50)]
+        started = time.perf_counter()
+        for symbol in sample:
+            reference(windows[symbol], rules)
+        per_coin = (time.perf_counter() - started) / len(sample) * count
+        print(f"   {count:>5} coin: tarayıcı {vectorized * 1000:8.1f} ms | coin başına pandas ~{per_coin * 1000:8.0f} ms "
+              f"({per_coin / vectorized:.0f}x) | {int(result.triggered.sum())} sinyal")
+    top = result.top(3)
+    print("   En yakın: " + ", ".join(f"{row['symbol']} {row['side']} {row['distance']:.2f}" for row in top))
+
+
+if __name__ == "__main__":
+    failed = check_accuracy()
+    check_speed()
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,163 @@
+import sys
+import os
+import multiprocessing
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.shard import Coordinator, HashRing, ShardManager
+
+SYMBOLS = [f"COIN{i}USDT" for i in range(1000)]
+
+
+def test_hash_ring():
+    """Tutarlı hash halkası: dağılım dengesi ve worker kaybında taşınan coin sayısı"""
+
+    print("=" * 50)
+    print("🧪 HashRing Test Başlıyor...")
+    print("=" * 50)
+
+    # Test 1: 4 worker arasında dağılım
+    print("\n📊 Test 1: 1000 coin, 4 worker")
+    ring = HashRing([f"worker-{i}" for i in range(4)])
+    before = ring.assign(SYMBOLS)
+    sizes = {node: len(symbols) for node, symbols in sorted(before.items())}
+    print(f"   Dağılım: {sizes}")
+    if max(sizes.values()) <= 1.3 * len(SYMBOLS) / len(sizes):
+        print("✅ Başarılı! En yüklü worker ortalamanın %30 üzerinde değil")
+    else:
+        print("❌ Hata: Dağılım dengesiz")
+
+    # Test 2: Bir worker kaybolunca sadece onun coinleri taşınmalı
+    print("\n📊 Test 2: worker-1 kayboldu")
+    ring.remove("worker-1")
+    after = ring.assign(SYMBOLS)
+    owner = {symbol: node for node, symbols in before.items() for symbol in symbols}
+    moved = [symbol for node, symbols in after.items() for symbol in symbols if owner[symbol] != node]
+    print(f"   Taşınan coin: {len(moved)} (worker-1'de {sizes['worker-1']} coin vardı)")
+    if set(moved) == set(before["worker-1"]):
+        print("✅ Başarılı! Sadece kayıp worker'ın coinleri taşındı")
+    else:
+        print("❌ Hata: Diğer worker'ların coinleri de yer değiştirdi")
+
+    # Test 3: Worker geri katılınca eski atama geri gelmeli
+    print("\n📊 Test 3: worker-1 geri katıldı")
+    ring.add("worker-1")
+    if ring.assign(SYMBOLS) == before:
+        print("✅ Başarılı! Atamalar ilk duruma döndü")
+    else:
+        print("❌ Hata: Atamalar farklı")
+
+    print("\n" + "=" * 50)
+    print("✅ HashRing testleri tamamlandı!")
+    print("=" * 50)
+
+
+def fake_worker(address, authkey, worker_id):
+    """Uzak worker'ın koordinatörle konuşması: kalp atışı, atamayı okuma, teslimat kuyruğuna yazma"""
+    manager = ShardManager(address=address, authkey=authkey)
+    try:
+        manager.connect()
+    except multiprocessing.AuthenticationError:
+        sys.exit(3)
+    heartbeats, assignments, deliveries = manager.get_heartbeats(), manager.get_assignments(), manager.get_deliveries()
+    deadline = time.monotonic() + 10
+    while worker_id not in assignments and time.monotonic() < deadline:
+        heartbeats[worker_id] = time.time()
+        time.sleep(0.1)
+    deliveries.put({"worker": worker_id, "coins": list(assignments.get(worker_id, []))})
+
+
+def test_coordinator():
+    """Koordinatör anahtarı, worker protokolü ve yeniden dengeleme"""
+
+    print("\n" + "=" * 50)
+    print("🧪 Koordinatör Test Başlıyor...")
+    print("=" * 50)
+
+    # Test 1: Dışarı açık adreste anahtarsız başlamamalı, loopback'te rastgele anahtar
+    print("\n📊 Test 1: SHARD_AUTHKEY")
+    saved = os.environ.pop("SHARD_AUTHKEY", None)
+    try:
+        Coordinator("no-risk", host="0.0.0.0")
+        print("❌ Hata: 0.0.0.0 anahtarsız kabul edildi")
+    except ValueError:
+        print("✅ Başarılı! 0.0.0.0 anahtarsız reddedildi")
+    first, second = Coordinator("no-risk").authkey, Coordinator("no-risk").authkey
+    if len(first) >= 32 and first != second:
+        print("✅ Başarılı! Loopback'te her çalıştırmada farklı rastgele anahtar")
+    else:
+        print("❌ Hata: Loopback anahtarı rastgele değil")
+    os.environ["SHARD_AUTHKEY"] = "test-anahtari"
+    if Coordinator("no-risk", host="0.0.0.0").authkey == b"test-anahtari":
+        print("✅ Başarılı! SHARD_AUTHKEY ile 0.0.0.0 kabul edildi")
+    else:
+        print("❌ Hata: SHARD_AUTHKEY kullanılmadı")
+    os.environ.pop("SHARD_AUTHKEY")
+    if saved is not None:
+        os.environ["SHARD_AUTHKEY"] = saved
+
+    # Test 2: Yanlış anahtarla bağlanan worker reddedilmeli
+    coordinator = Coordinator("no-risk", symbols=SYMBOLS[:200])
+    coordinator.manager = ShardManager(address=("127.0.0.1", 0), authkey=coordinator.authkey)
+    coordinator.manager.start()
+    context = multiprocessing.get_context("spawn")
+    try:
+        print("\n📊 Test 2: Yanlış anahtarla bağlantı")
+        intruder = context.Process(target=fake_worker, args=(coordinator.manager.address, b"yanlis", "intruder"))
+        intruder.start()
+        intruder.join(30)
+        if intruder.exitcode == 3:
+            print("✅ Başarılı! Bağlantı reddedildi")
+        else:
+            print(f"❌ Hata: Bağlantı reddedilmedi (çıkış kodu {intruder.exitcode})")
+
+        # Test 3: İki worker katılır, atamaları alır ve teslimat kuyruğuna yazar
+        print("\n📊 Test 3: 2 worker, 200 coin")
+        workers = [context.Process(target=fake_worker, args=(coordinator.manager.address, coordinator.authkey, f"w{i}"))
+                   for i in range(2)]
+        for process in workers:
+            process.start()
+        heartbeats, deliveries = coordinator.manager.get_heartbeats(), coordinator.manager.get_deliveries()
+        deadline = time.monotonic() + 30
+        while len(heartbeats.keys()) < 2 and time.monotonic() < deadline:
+            time.sleep(0.1)
+        coordinator.rebalance(heartbeats.keys())
+        received = {}
+        for _ in workers:
+            item = deliveries.get(timeout=30)
+            received[item["worker"]] = item["coins"]
+        for process in workers:
+            process.join(30)
+        coins = [coin for worker_coins in received.values() for coin in worker_coins]
+        print(f"   Dağılım: { {worker: len(worker_coins) for worker, worker_coins in sorted(received.items())} }")
+        if sorted(coins) == sorted(SYMBOLS[:200]) and len(coins) == len(set(coins)):
+            print("✅ Başarılı! Her coin tam olarak bir worker'a atandı ve worker'lar atamayı okudu")
+        else:
+            print("❌ Hata: Atamalar eksik veya çakışıyor")
+
+        # Test 4: w1 kayboldu: sadece onun coinleri w0'a geçmeli, atama sözlüğünden silinmeli
+        print("\n📊 Test 4: w1 kayboldu")
+        moved_before = coordinator.moved
+        changed = coordinator.rebalance(["w0"])
+        assignments = dict(coordinator.manager.get_assignments().items())
+        moved = coordinator.moved - moved_before
+        print(f"   Taşınan coin: {moved} (w1'de {len(received['w1'])} coin vardı)")
+        if changed and moved == len(received["w1"]) and list(assignments) == ["w0"] and len(assignments["w0"]) == 200:
+            print("✅ Başarılı! Sadece kayıp worker'ın coinleri taşındı")
+        else:
+            print("❌ Hata: Yeniden dengeleme beklenenden farklı")
+        if not coordinator.rebalance(["w0"]):
+            print("✅ Başarılı! Değişiklik yokken atamalar yeniden yazılmadı")
+        else:
+            print("❌ Hata: Gereksiz yeniden dengeleme")
+    finally:
+        coordinator.manager.shutdown()
+
+    print("\n" + "=" * 50)
+    print("✅ Koordinatör testleri tamamlandı!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_hash_ring()
+    test_coordinator()
@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from lib.candles import CandleSeries
+from lib.shm import SharedCandleReader, SharedCandleStore
+
+SEGMENT = f"test-candles-{os.getpid()}"
+SYMBOLS = [f"COIN{i}USDT" for i in range(50)]
+LIMIT = 300
+READERS = 4
+SECONDS = 2.0
+STEP = 900 * 10 ** 9  # 15 dk (ns)
+
+
+def make_series(symbol: str, version: int) -> CandleSeries:
+    # Her yayında tüm değerler `version`, ilk mum zamanı version adım ileride: yırtık okuma hemen görülür
+    times = (np.arange(LIMIT + 50, dtype=np.int64) + version) * STEP
+    values = np.full((6, LIMIT + 50), float(version))
+    return CandleSeries.from_arrays(times, values, symbol=symbol, granularity="15min")
+
+
+def writer(ready, stop):
+    store = SharedCandleStore(SEGMENT, slots=len(SYMBOLS), capacity=LIMIT + 50)
+    version = 0
+    ready.set()
+    while not stop.is_set():
+        version += 1
+        for symbol in SYMBOLS:
+            store.publish(make_series(symbol, version))
+    print(f"✍️ Yazıcı: {store.published} yayın")
+    store.close()
+
+
+def reader(results):
+    shared = SharedCandleReader(SEGMENT)
+    reads = invalidated = torn = 0
+    deadline = time.time() + SECONDS
+    while time.time() < deadline:
+        for symbol in SYMBOLS:
+            view = shared.view(symbol, "15min", LIMIT)
+            if view is None:
+                continue
+            values = view.frame.to_numpy()
+            version = values[0, 0]
+            consistent = (values == version).all() and view.frame.index[0].value // STEP == version + 50
+            if not view.valid():
+                invalidated += 1  # yazıcı bu tampona geçti: çağıran tekrar okumalı
+            elif not consistent:
+                torn += 1
+            reads += 1
+    results.put((reads, invalidated, torn))
+
+
+def main():
+    ready, stop = multiprocessing.Event(), multiprocessing.Event()
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=writer, args=(ready, stop))
+    process.start()
+    ready.wait()
+    readers = [multiprocessing.Process(target=reader, args=(results,)) for _ in range(READERS)]
+    for p in readers:
+        p.start()
+    for p in readers:
+        p.join()
+    stop.set()
+    process.join()
+
+    totals = [results.get() for _ in readers]
+    reads = sum(r[0] for r in totals)
+    invalidated = sum(r[1] for r in totals)
+    torn = sum(r[2] for r in totals)
+    private = len(SYMBOLS) * make_series(SYMBOLS[0], 0).nbytes
+    print(f"📖 {READERS} okuyucu: {reads} kopyasız okuma, {invalidated} geçersizleşen görünüm, {torn} tutarsız okuma")
+    print(f"🧠 Mum belleği: paylaşılan segment tek kopya, süreç başına kopya olsaydı {READERS} x {private / 1024:.0f} KB")
+    if torn:
+        print("❌ Tutarsız okuma var")
+        sys.exit(1)
+    print("✅ Tüm geçerli görünümler tutarlı")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+# Proje root'unu sys.path'e ekle
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from lib.sms.fake_api import FakeTelegramServer
+
+CHART_PATH = str(project_root / "lib" / "sms" / "test_chart.png")
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+async def timed_signal(futures):
+    """Bir sinyalin tüm chatlere ulaşma süresi (sn) ve başarı durumu"""
+    start = time.perf_counter()
+    results = await asyncio.gather(*futures, return_exceptions=True)
+    return time.perf_counter() - start, all(not isinstance(r, Exception) for r in results)
+
+
+async def run_synthetic(args, sms):
+    """Her döngüde args.signals adet sinyal (+ teşhis mesajı) kuyruğa ekle ve teslimatı ölç"""
+    latencies = []
+    failed = 0
+    for cycle in range(args.cycles):
+        print(f"🔄 Döngü {cycle + 1}/{args.cycles}: {args.signals} sinyal")
+        tasks = []
+        for i in range(args.signals):
+            futures = sms.enqueue_message(
+                text=f"🧪 YÜK TESTİ #{cycle}-{i}\n💰 COIN{i}USDT\n✳️ Sinyal: 🟢 LONG",
+                chat_types=args.chats,
+                chart_path=CHART_PATH if args.chart else None,
+                priority="signal",
+            )
+            tasks.append(asyncio.create_task(timed_signal(futures)))
+        sms.enqueue_message(text=f"💤 Döngü {cycle} tamamlandı", chat_types=["log"], priority="status")
+        for latency, ok in await asyncio.gather(*tasks):
+            latencies.append(latency)
+            failed += 0 if ok else 1
+    return latencies, failed
+
+
+async def run_strategy(args, sms):
+    """Gerçek bir stratejinin run_cycle() fonksiyonunu sahte API üzerinden çalıştır"""
+    path = project_root / "strategies" / f"{args.strategy}.py"
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    for cycle in range(args.cycles):
+        print(f"🔄 {args.strategy} döngü {cycle + 1}/{args.cycles}")
+        await module.run_cycle()
+    await sms.outbound_queue.join()
+    metrics = sms.get_queue_metrics()
+    return list(sms.outbound_queue.latencies["signal"]), sum(lane["failed"] for lane in metrics["lanes"].values())
+
+
+async def main(args):
+    print("=" * 50)
+    print("🧪 Telegram Gönderim Yük Testi Başlıyor...")
+    print("=" * 50)
+
+    server = await FakeTelegramServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        upload_seconds_per_mb=args.upload_seconds_per_mb,
+        global_rate=args.global_rate,
+        chat_rate=args.chat_rate,
+        retry_after=args.retry_after,
+        error_rate=args.error_rate,
+        flood_rate=args.flood_rate,
+        seed=42,
+    ).start()
+
+    # lib.sms.sms import edilmeden önce dry-run ayarlanmalı
+    os.environ["TELEGRAM_DRY_RUN"] = "1"
+    os.environ["TELEGRAM_API_URL"] = server.base_url
+    os.environ.setdefault("TELEGRAM_WARMUP_CONNECTIONS", "1")
+    import lib.sms.sms as sms
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    # İstemci tarafı limitler (varsayılan: Telegram limitleri)
+    if args.client_chat_rate:
+        sms.outbound_queue.chat_rate = args.client_chat_rate
+    if args.client_group_rate:
+        sms.outbound_queue.group_rate_per_minute = args.client_group_rate
+
+    await sms.start_bot()
+    start = time.perf_counter()
+    try:
+        if args.strategy:
+            latencies, failed = await run_strategy(args, sms)
+        else:
+            latencies, failed = await run_synthetic(args, sms)
+        await sms.outbound_queue.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        await sms.shutdown_bot()
+        await server.stop()
+
+    metrics = sms.get_queue_metrics()
+    stats = server.stats()
+    delivered = sum(stats["delivered"].values())
+    print()
+    print(f"📊 Süre: {elapsed:.2f} sn | Teslim edilen mesaj: {delivered} | Verim: {delivered / elapsed:.1f} mesaj/sn")
+    print(f"📊 Sinyal teslim gecikmesi (sn): p50 {percentile(latencies, 50):.3f} | "
+          f"p95 {percentile(latencies, 95):.3f} | p99 {percentile(latencies, 99):.3f} | max {max(latencies, default=float('nan')):.3f}")
+    print(f"📊 Başarısız sinyal: {failed} | 429 (sunucu): {stats['rate_limited']} | 502 (sunucu): {stats['errors']} | "
+          f"Tekrar deneme (istemci): {metrics['retried']}")
+    print(f"📎 Yükleme: {stats['uploads']} dosya, {stats['bytes_received'] / 1024:.0f} KB alındı | "
+          f"file_id yeniden kullanım: {metrics['media']['reuses']}")
+    for lane, values in metrics["lanes"].items():
+        if values["sent"] or values["failed"]:
+            print(f"   {lane:<10} gönderilen {values['sent']:>5} | hata {values['failed']:>3} | "
+                  f"p50 {values['latency_p50'] or 0:.3f} sn | p95 {values['latency_p95'] or 0:.3f} sn")
+
+    print("=" * 50)
+    print("✅ Yük testi tamamlandı!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sahte Telegram API üzerinden gönderim yük testi")
+    parser.add_argument("--signals", type=int, default=100, help="döngü başına sinyal sayısı")
+    parser.add_argument("--cycles", type=int, default=1)
+    parser.add_argument("--chats", default="signal,log", help="virgülle ayrılmış chat tipleri")
+    parser.add_argument("--chart", action="store_true", help="sinyallere grafik ekle")
+    parser.add_argument("--strategy", default=None, help="sentetik sinyal yerine bu stratejinin run_cycle()'ını çalıştır")
+    parser.add_argument("--client-chat-rate", type=float, default=None, help="kuyruk chat limiti (mesaj/sn)")
+    parser.add_argument("--client-group-rate", type=float, default=None, help="kuyruk grup limiti (mesaj/dk)")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--upload-seconds-per-mb", type=float, default=0.5)
+    parser.add_argument("--global-rate", type=float, default=30)
+    parser.add_argument("--chat-rate", type=float, default=1)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--flood-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    args.chats = [c.strip() for c in args.chats.split(",") if c.strip()]
+    asyncio.run(main(args))
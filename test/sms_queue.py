@@ -0,0 +1,61 @@
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram.error import NetworkError
+
+from lib.sms.queue import OutboundMessage, OutboundQueue, QueueStopped
+
+
+async def test_stop():
+    """stop() sonrası chat yığınında veya tekrar denemede kalan mesajlar sessizce kaybolmamalı"""
+
+    print("=" * 50)
+    print("🧪 Gönderim Kuyruğu Durdurma Testi Başlıyor...")
+    print("=" * 50)
+
+    sent = []
+
+    async def send(message):
+        if message.text == "ağ hatası":
+            raise NetworkError("bağlantı koptu")
+        await asyncio.sleep(0.01)
+        sent.append(message.text)
+
+    queue = OutboundQueue(send, chat_rate=1)
+    # Grup chat'i 1 mesaj/sn: ilki gider, kalanlar chat yığınında bekler; ağ hatası alan mesaj tekrar denemede
+    futures = [queue.submit(OutboundMessage(chat_id="-100", text=f"mesaj {i}", priority="diagnostic")) for i in range(5)]
+    futures.append(queue.submit(OutboundMessage(chat_id="7", text="ağ hatası")))
+    await asyncio.sleep(0.2)
+
+    # Test 1: kuyruk boşalmadan durdurulur
+    print("\n📊 Test 1: Boşalmadan durdurma")
+    await queue.stop(timeout=0.3)
+    results = await asyncio.gather(*futures, return_exceptions=True)
+    metrics = queue.metrics()
+    dropped = {lane: values["dropped"] for lane, values in metrics["lanes"].items()}
+    stopped = sum(isinstance(result, QueueStopped) for result in results)
+    print(f"   Gönderilen: {sent}, bırakılan: {dropped}, derinlik: {metrics['depth']}, bekleyen: {metrics['pending']}")
+    if (sent == ["mesaj 0"] and stopped == 5 and dropped == {"signal": 0, "status": 1, "diagnostic": 4}
+            and metrics["depth"] == 0 and metrics["pending"] == 0):
+        print("✅ Başarılı! Kalan mesajlar sayıldı ve future'ları QueueStopped ile tamamlandı")
+    else:
+        print("❌ Hata: Kalan mesajlar kayboldu")
+
+    # Test 2: durdurulan kuyruk yeni mesajla yeniden başlar
+    print("\n📊 Test 2: Yeniden başlatma")
+    await queue.submit(OutboundMessage(chat_id="8", text="yeniden"))
+    await queue.stop()
+    if sent[-1] == "yeniden" and queue.metrics()["pending"] == 0:
+        print("✅ Başarılı! Yeni mesaj gönderildi")
+    else:
+        print("❌ Hata: Kuyruk yeniden başlamadı")
+
+    print("\n" + "=" * 50)
+    print("✅ Gönderim kuyruğu testleri tamamlandı!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    asyncio.run(test_stop())